@@ -0,0 +1,581 @@
+"""
+AICU 离线基准测试
+
+在本地启动一个 HTTP 桩服务器，模拟插件用到的全部上游接口
+（评论 / 视频弹幕 / 直播弹幕 / 设备标记 / 入场 / 粉丝牌 / 大航海 / B站卡片与视频信息 / AI 分析 SSE），
+支持注入延迟与错误，然后用假的消息事件端到端驱动 /评论 /弹幕 /直播弹幕 /入场 四个指令，
+输出吞吐、延迟分位数与峰值内存；另有只测解析、只测渲染的微基准。
+
+需要在装有 AstrBot 及插件依赖的环境中运行，不访问外网：
+
+    python benchmark.py --requests 200 --concurrency 8 --latency 50 --error-rate 0.05
+    python benchmark.py --jinja-only --output bench_output.txt   # 不启动浏览器，只做模板渲染
+    python benchmark.py --browser-profiles --requests 8          # 对比渲染进程各浏览器启动配置的冷启动与内存
+
+--payload-dir 目录下可放置录制的响应（reply.json、danmaku.json、live.json、mark.json、entry.json、
+medal.json、guard.json、card.json、video.json、ai.txt），存在时替换对应的合成数据。
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import random
+import resource
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+PLUGIN_DIR = Path(__file__).resolve().parent
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+# 1x1 透明 PNG，替代头像等外链图片
+PIXEL_PNG = (
+    b"\x89PNG\r\n\x1a\n"
+    + _png_chunk(b"IHDR", struct.pack(">IIBBBBB", 1, 1, 8, 6, 0, 0, 0))
+    + _png_chunk(b"IDAT", zlib.compress(b"\x00\x00\x00\x00\x00"))
+    + _png_chunk(b"IEND", b"")
+)
+
+# 指令名 -> (插件方法, 模板)
+COMMANDS = {
+    "评论": ("analyze_uid", "template.html"),
+    "弹幕": ("analyze_danmaku", "template_danmaku.html"),
+    "直播弹幕": ("analyze_live_danmaku", "template_live.html"),
+    "入场": ("analyze_entry", "template_entry.html"),
+}
+
+
+# ================= 合成数据 =================
+def _text(rng: random.Random, low: int = 4, high: int = 60) -> str:
+    alphabet = "今天的直播真好看哈哈哈主播加油原神启动这个视频太有意思了awsl草"
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(low, high)))
+
+
+def synthetic_payloads(rows: int, base_url: str, seed: int = 0) -> dict:
+    """按接口生成与真实响应结构一致的合成数据"""
+    rng = random.Random(seed)
+    now = int(time.time())
+    avatar = f"{base_url}/avatar.png"
+
+    def ts():
+        return now - rng.randint(0, 180 * 86400)
+
+    rooms = [(1000 + i, f"直播间{i}", f"主播{i}") for i in range(max(rows // 10, 1))]
+
+    live_list = []
+    for room_id, room_name, anchor in rooms:
+        live_list.append({
+            "roominfo": {"roomid": room_id, "roomname": room_name, "upname": anchor},
+            "danmu": [
+                {"ts": ts(), "text": _text(rng), "uname": "用户"}
+                for _ in range(max(rows // len(rooms), 1))
+            ],
+        })
+
+    entry_records = []
+    for _ in range(rows):
+        room_id, room_name, anchor = rng.choice(rooms)
+        start = ts() * 1000
+        entry_records.append({
+            "channel": {
+                "uName": anchor, "roomId": room_id, "faceUrl": avatar, "title": room_name,
+                "tags": ["虚拟主播", "唱见", "游戏"], "totalDanmakuCount": rng.randint(0, 10 ** 6),
+                "totalIncome": rng.random() * 10 ** 5, "totalLiveCount": rng.randint(1, 2000),
+                "isLiving": rng.random() < 0.2,
+            },
+            "live": {
+                "title": _text(rng, 4, 20), "startDate": start, "stopDate": start + rng.randint(600, 14400) * 1000,
+                "parentArea": "虚拟主播", "area": "虚拟日常", "watchCount": rng.randint(0, 10 ** 5),
+                "likeCount": rng.randint(0, 10 ** 5), "totalIncome": rng.random() * 10 ** 4,
+                "danmakusCount": rng.randint(0, 10 ** 4),
+            },
+            "danmakus": [{"sendDate": start + rng.randint(0, 600) * 1000}],
+        })
+
+    def medal_info():
+        return {
+            "medal_name": _text(rng, 2, 4), "level": rng.randint(1, 40), "medal_level": rng.randint(1, 40),
+            "medal_color_start": rng.randint(0, 0xFFFFFF), "medal_color_end": rng.randint(0, 0xFFFFFF),
+            "medal_color_border": rng.randint(0, 0xFFFFFF), "wearing_status": 0, "guard_level": rng.randint(0, 3),
+            "intimacy": rng.randint(0, 5000), "next_intimacy": 5000, "today_feed": 0, "day_limit": 1500,
+        }
+
+    return {
+        "reply": {"code": 0, "data": {"replies": [
+            {"rpid": i, "time": ts(), "message": _text(rng), "rank": 1} for i in range(rows)
+        ]}},
+        "danmaku": {"code": 0, "data": {"cursor": {"all_count": rows}, "videodmlist": [
+            {"ctime": ts(), "content": _text(rng), "oid": str(rng.randint(1, max(rows // 5, 1))),
+             "progress": rng.randint(0, 600000)} for _ in range(rows)
+        ]}},
+        "live": {"code": 0, "data": {"cursor": {"all_count": rows}, "list": live_list}},
+        "mark": {"code": 0, "data": {"device": [{"name": "Xiaomi 14"}], "hname": ["旧昵称A", "旧昵称B"]}},
+        "entry": {"code": 200, "data": {
+            "total": rows, "pageNum": 0, "pageSize": rows, "hasMore": False,
+            "data": {"records": entry_records},
+        }},
+        "medal": {"code": 0, "data": {"list": [
+            {"target_name": anchor, "medal_info": medal_info()} for _, _, anchor in rooms[:20]
+        ]}},
+        # 桩服务器对每一页返回相同内容，info.page 让插件走并发分页
+        "guard": {"code": 0, "data": {"info": {"num": 30, "page": 3, "now": 1}, "top3": [], "list": [
+            {"username": anchor, "guard_level": rng.randint(1, 3), "accompany": rng.randint(1, 900),
+             "rank": i + 1, "medal_info": medal_info()} for i, (_, _, anchor) in enumerate(rooms[:10])
+        ]}},
+        "card": {"code": 0, "data": {"card": {
+            "name": "基准测试用户", "face": avatar, "sign": "offline benchmark", "fans": 12345, "friend": 67,
+            "level_info": {"current_level": 6}, "vip": {"label": {"text": "年度大会员"}},
+        }}},
+        "video": {"code": 0, "data": {"bvid": "BV1xx411c7mD", "title": "测试视频", "owner": {"name": "UP"}}},
+        "ai": "".join(
+            f"data: {json.dumps({'response': _text(rng, 10, 30)}, ensure_ascii=False)}\n\n" for _ in range(20)
+        ) + "data: [DONE]\n\n",
+    }
+
+
+def load_recorded_payloads(payloads: dict, payload_dir: Path) -> dict:
+    """用录制的响应替换合成数据"""
+    for name in payloads:
+        path = payload_dir / (f"{name}.txt" if name == "ai" else f"{name}.json")
+        if path.exists():
+            text = path.read_text(encoding="utf-8")
+            payloads[name] = text if name == "ai" else json.loads(text)
+    return payloads
+
+
+# ================= 上游桩服务器 =================
+ROUTES = (
+    ("/api/v3/search/getreply", "reply"),
+    ("/api/v3/search/getvideodm", "danmaku"),
+    ("/api/v3/search/getlivedm", "live"),
+    ("/api/v3/user/getusermark", "mark"),
+    ("/api/v2/user", "entry"),
+    ("/bilibili/user-medals/", "medal"),
+    ("/bilibili/live-guards/", "guard"),
+    ("/x/web-interface/card", "card"),
+    ("/x/web-interface/view", "video"),
+    ("/ai", "ai"),
+)
+
+# 插件接口名 -> 桩服务器上的路径
+ENDPOINT_PATHS = {
+    "reply": "/api/v3/search/getreply",
+    "mark": "/api/v3/user/getusermark",
+    "danmaku": "/api/v3/search/getvideodm",
+    "live_danmaku": "/api/v3/search/getlivedm",
+    "entry": "/api/v2/user",
+    "medal": "/bilibili/user-medals/{uid}",
+    "guard": "/bilibili/live-guards/{uid}?p={page}",
+    "ai": "/ai",
+    "bili_video": "/x/web-interface/view",
+    "bili_card": "/x/web-interface/card",
+}
+
+
+class StubServer:
+    """在后台线程运行的上游接口桩，每个请求按配置休眠并按概率返回 503"""
+
+    def __init__(self, latency_ms: float = 0, jitter: float = 0.5, error_rate: float = 0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.payloads: dict = {}
+        self.hits: dict[str, int] = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _delay_and_fail(self) -> bool:
+        with self._lock:
+            delay = self.latency_ms * (1 + self._rng.uniform(-self.jitter, self.jitter))
+            failed = self._rng.random() < self.error_rate
+        if delay > 0:
+            time.sleep(delay / 1000)
+        return failed
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, body: bytes, content_type: str):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _route(self):
+                if self.path.startswith("/avatar.png"):
+                    self._reply(200, PIXEL_PNG, "image/png")
+                    return
+                name = next((name for prefix, name in ROUTES if self.path.startswith(prefix)), None)
+                if name is None:
+                    self._reply(404, b"{}", "application/json")
+                    return
+                with stub._lock:
+                    stub.hits[name] = stub.hits.get(name, 0) + 1
+                if stub._delay_and_fail():
+                    self._reply(503, b"{}", "application/json")
+                elif name == "ai":
+                    self._reply(200, stub.payloads["ai"].encode("utf-8"), "text/event-stream")
+                else:
+                    body = json.dumps(stub.payloads[name], ensure_ascii=False).encode("utf-8")
+                    self._reply(200, body, "application/json")
+
+            def do_GET(self):
+                self._route()
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                self._route()
+
+        return Handler
+
+
+# ================= 假事件与插件装配 =================
+class FakeEvent:
+    """只实现指令处理函数用到的 AstrMessageEvent 接口"""
+
+    def __init__(self, text: str = "", sender: str = "10000", group: str = "bench"):
+        self.message_str = text
+        self.unified_msg_origin = f"bench:GroupMessage:{group}"
+        self._sender = sender
+        self._group = group
+
+    def get_sender_id(self):
+        return self._sender
+
+    def get_group_id(self):
+        return self._group
+
+    def plain_result(self, text):
+        return ("plain", text)
+
+    def image_result(self, path):
+        return ("image", path)
+
+    def chain_result(self, chain):
+        return ("chain", chain)
+
+
+class FakeContext:
+    async def send_message(self, umo, chain):
+        return True
+
+
+def load_plugin_module():
+    """插件使用相对导入，需作为包导入"""
+    sys.path.insert(0, str(PLUGIN_DIR.parent))
+    return importlib.import_module(f"{PLUGIN_DIR.name}.main")
+
+
+def build_plugin(module, data_dir: Path, base_url: str, config: dict):
+    """构造插件实例，数据目录放到临时目录，上游地址通过 endpoint_urls 配置全部指向桩服务器"""
+
+    class BenchStarTools:
+        @staticmethod
+        def get_data_dir(name):
+            path = data_dir / name
+            path.mkdir(parents=True, exist_ok=True)
+            return path
+
+    module.StarTools = BenchStarTools
+    config = {**config, "endpoint_urls": {name: base_url + path for name, path in ENDPOINT_PATHS.items()}}
+    plugin = module.AicuAnalysisPlugin(FakeContext(), config)
+    plugin.DEFAULT_AVATAR_URL = f"{base_url}/avatar.png"
+    return plugin
+
+
+def capture_renders(plugin, jinja_only: bool) -> dict:
+    """记录每个模板最近一次的渲染数据；jinja_only 时只渲染 HTML，不启动浏览器"""
+    captured = {}
+    render_image = plugin._render_image
+
+    async def wrapped(render_data, template_name: str = "template.html"):
+        captured[template_name] = render_data
+        if jinja_only:
+            with plugin._metrics.span("template_render", template_name):
+                plugin._get_template(template_name).render(**render_data)
+            return str(plugin.output_dir / "jinja-only.png")
+        return await render_image(render_data, template_name)
+
+    plugin._render_image = wrapped
+    return captured
+
+
+# ================= 统计工具 =================
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+
+def format_latency(samples: list[float]) -> str:
+    ordered = sorted(samples)
+    return " / ".join(f"{percentile(ordered, q) * 1000:.1f}" for q in (0.5, 0.95, 0.99))
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF) -> float:
+    """峰值常驻内存（Linux 上 ru_maxrss 单位为 KB）"""
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+def browser_rss_mb() -> float:
+    """本进程所有子孙进程（浏览器及其渲染进程）当前 RSS 之和，读取 /proc，仅 Linux；共享页会被重复计入"""
+    parents, rss = {}, {}
+    for status in Path("/proc").glob("[0-9]*/status"):
+        try:
+            fields = dict(line.split(":", 1) for line in status.read_text().splitlines() if ":" in line)
+        except OSError:
+            continue
+        pid = int(status.parent.name)
+        parents[pid] = int(fields["PPid"])
+        rss[pid] = int(fields.get("VmRSS", "0 kB").split()[0])
+
+    def descends(pid: int) -> bool:
+        while pid in parents and pid != 1:
+            pid = parents[pid]
+            if pid == os.getpid():
+                return True
+        return False
+
+    return sum(kb for pid, kb in rss.items() if descends(pid)) / 1024
+
+
+def time_calls(fn, iterations: int) -> list[float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+# ================= 基准 =================
+async def bench_commands(plugin, commands: list[str], requests: int, concurrency: int, uids: int) -> list[str]:
+    """端到端：按轮询顺序并发执行指令，只有产出图片才算成功"""
+    semaphore = asyncio.Semaphore(concurrency)
+    results: dict[str, list] = {name: [] for name in commands}
+
+    async def run_one(i: int):
+        name = commands[i % len(commands)]
+        handler = getattr(plugin, COMMANDS[name][0])
+        async with semaphore:
+            start = time.perf_counter()
+            ok = False
+            async for kind, _ in handler(FakeEvent(), str(100000 + i % uids)):
+                ok = ok or kind == "image"
+            results[name].append((time.perf_counter() - start, ok))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run_one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    lines = [
+        f"## 端到端指令（{requests} 次，并发 {concurrency}）",
+        f"总耗时 {elapsed:.2f}s，吞吐 {requests / elapsed:.1f} 次/s",
+        "指令 | 次数 | 成功 | p50 / p95 / p99 (ms)",
+    ]
+    for name, samples in results.items():
+        succeeded = sum(1 for _, ok in samples if ok)
+        lines.append(f"/{name} | {len(samples)} | {succeeded} | {format_latency([s for s, _ in samples])}")
+    return lines
+
+
+def bench_parse(plugin, payloads: dict, iterations: int) -> list[str]:
+    """只测解析与统计，不涉及网络和渲染"""
+    parsers = importlib.import_module(f"{PLUGIN_DIR.name}.parsers")
+    cases = {
+        "parse_replies": lambda: parsers.parse_replies(payloads["reply"]),
+        "parse_danmaku": lambda: parsers.parse_danmaku(payloads["danmaku"]),
+        "parse_live_danmaku": lambda: parsers.parse_live_danmaku(payloads["live"]),
+        "parse_entry": lambda: parsers.parse_entry(payloads["entry"]),
+        "_parse_medal_data": lambda: plugin._parse_medal_data(payloads["medal"]),
+        "_parse_guard_data": lambda: plugin._parse_guard_data(payloads["guard"]),
+    }
+    lines = [f"## 解析微基准（每项 {iterations} 次）", "函数 | 次/s | p50 / p95 / p99 (ms)"]
+    for name, fn in cases.items():
+        samples = time_calls(fn, iterations)
+        lines.append(f"{name} | {len(samples) / sum(samples):.0f} | {format_latency(samples)}")
+    return lines
+
+
+async def bench_render(plugin, captured: dict, iterations: int, screenshot_iterations: int) -> list[str]:
+    """只测渲染：复用端到端阶段记录的渲染数据，分别统计 Jinja 与浏览器截图"""
+    if not captured:
+        return ["## 渲染微基准", "没有可用的渲染数据（端到端阶段未成功渲染任何模板）"]
+
+    lines = [f"## 渲染微基准（Jinja 每项 {iterations} 次）", "模板 | Jinja p50 / p95 / p99 (ms) | 截图 p50 / p95 / p99 (ms)"]
+    for template_name, render_data in sorted(captured.items()):
+        template = plugin._get_template(template_name)
+        jinja_samples = time_calls(lambda: template.render(**render_data), iterations)
+
+        shot = "跳过"
+        if screenshot_iterations:
+            shot_samples = []
+            for _ in range(screenshot_iterations):
+                start = time.perf_counter()
+                path = await plugin.__class__._render_image(plugin, render_data, template_name)
+                shot_samples.append(time.perf_counter() - start)
+                Path(path).unlink(missing_ok=True)
+            shot = format_latency(shot_samples)
+        lines.append(f"{template_name} | {format_latency(jinja_samples)} | {shot}")
+    return lines
+
+
+async def bench_browser_profiles(plugin, captured: dict) -> list[str]:
+    """
+    每种启动配置冷启动一个渲染进程用的浏览器，依次截图全部模板，记录启动耗时、首张截图耗时与浏览器进程内存。
+    插件进程内的浏览器还要过 Cloudflare 验证，固定使用标准参数，不参与对比。
+    """
+    if not captured:
+        return ["## 浏览器启动配置对比", "没有可用的渲染数据（端到端阶段未成功渲染任何模板）"]
+
+    render_worker = importlib.import_module(f"{PLUGIN_DIR.name}.render_worker")
+    lines = [
+        "## 浏览器启动配置对比",
+        "配置 | 冷启动 (ms) | 首张截图 (ms) | 全部模板 (ms) | 浏览器进程 RSS 之和 (MB)",
+    ]
+    viewport = {"width": 1000, "height": 1000}
+    timeout = plugin.config.get("browser_timeout", 30) * 1000
+    pages = [(plugin._get_template(name), data) for name, data in sorted(captured.items())]
+    for profile in render_worker.BROWSER_PROFILES:
+        server = render_worker.RenderServer(
+            pages=1, profile=profile, executable_path=plugin.config.get("browser_executable", "")
+        )
+        try:
+            start = time.perf_counter()
+            await server.browser()
+            launched = time.perf_counter() - start
+
+            first = None
+            start = time.perf_counter()
+            for template, render_data in pages:
+                await server.render(template.render(**render_data), viewport, timeout, 2)
+                first = first or time.perf_counter() - start
+            total = time.perf_counter() - start
+            rss = browser_rss_mb()
+        finally:
+            await server.close()
+        lines.append(f"{profile} | {launched * 1000:.0f} | {first * 1000:.0f} | {total * 1000:.0f} | {rss:.1f}")
+    return lines
+
+
+async def main(args) -> str:
+    stub = StubServer(args.latency, args.jitter, args.error_rate, args.seed)
+    stub.payloads = synthetic_payloads(args.rows, stub.base_url, args.seed)
+    if args.payload_dir:
+        load_recorded_payloads(stub.payloads, Path(args.payload_dir))
+    stub.start()
+
+    data_dir = Path(tempfile.mkdtemp(prefix="aicu_bench_"))
+    module = load_plugin_module()
+    config = {
+        "cache_ttl": args.cache_ttl,
+        "medal_guard_cache_ttl": args.cache_ttl,
+        "enable_ai_analysis": args.ai,
+        "max_reply_count": args.rows,
+        "max_danmaku_count": args.rows,
+        "dd_page_size": args.rows,
+        "hedge_delay": args.hedge_delay,
+        "stream_json": not args.no_stream_json,
+        "persistent_pages": 0 if args.no_persistent_pages else 1,
+        # 基准用同一个发送者连续发起请求，关闭指令限流
+        "throttle_user_per_minute": 0,
+        "throttle_group_per_minute": 0,
+    }
+    plugin = build_plugin(module, data_dir, stub.base_url, config)
+    captured = capture_renders(plugin, args.jinja_only)
+    commands = args.commands or list(COMMANDS)
+
+    report = [
+        "# AICU 离线基准",
+        f"数据行数 {args.rows}，桩延迟 {args.latency}ms ±{args.jitter:.0%}，错误率 {args.error_rate:.0%}，"
+        f"缓存 {args.cache_ttl}s，AI 分析 {'开' if args.ai else '关'}，渲染 {'仅 Jinja' if args.jinja_only else 'Playwright'}",
+        "",
+    ]
+    try:
+        report += await bench_commands(plugin, commands, args.requests, args.concurrency, args.uids)
+        report.append("")
+        report += bench_parse(plugin, stub.payloads, args.iterations)
+        report.append("")
+        report += await bench_render(
+            plugin, captured, args.iterations, 0 if args.jinja_only else args.screenshot_iterations
+        )
+        if args.browser_profiles and not args.jinja_only:
+            report.append("")
+            report += await bench_browser_profiles(plugin, captured)
+        report += ["", "## 插件运行指标", plugin._format_metrics_report()]
+        report += ["", "## 桩服务器请求数", ", ".join(f"{k}={v}" for k, v in sorted(stub.hits.items()))]
+    finally:
+        await plugin.on_plugin_unload()
+        stub.stop()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    report += [
+        "",
+        f"峰值内存：本进程 {peak_rss_mb():.1f} MB，已退出子进程（浏览器等）{peak_rss_mb(resource.RUSAGE_CHILDREN):.1f} MB",
+    ]
+    return "\n".join(report)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="AICU 插件离线基准测试")
+    parser.add_argument("--requests", type=int, default=40, help="端到端指令总次数")
+    parser.add_argument("--concurrency", type=int, default=4, help="端到端并发数")
+    parser.add_argument("--uids", type=int, default=10, help="轮换使用的 UID 数量")
+    parser.add_argument("--commands", nargs="*", choices=list(COMMANDS), help="只测指定指令，默认全部四个")
+    parser.add_argument("--rows", type=int, default=100, help="每个接口返回的记录条数")
+    parser.add_argument("--latency", type=float, default=20, help="桩服务器平均延迟（毫秒）")
+    parser.add_argument("--jitter", type=float, default=0.5, help="延迟抖动比例，0.5 表示 ±50%%")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回 503 的概率")
+    parser.add_argument("--cache-ttl", type=float, default=0, help="插件共享缓存时间，默认关闭以测量完整路径")
+    parser.add_argument("--hedge-delay", type=float, default=2.0, help="对冲请求延迟（秒）")
+    parser.add_argument("--ai", action="store_true", help="开启 AI 分析（请求桩服务器的 SSE 接口）")
+    parser.add_argument("--no-stream-json", action="store_true", help="关闭流式 JSON 解码，整包解析后对比内存")
+    parser.add_argument("--browser-profiles", action="store_true", help="对比各浏览器启动配置的冷启动耗时与内存")
+    parser.add_argument("--no-persistent-pages", action="store_true", help="关闭常驻模板页面，每次截图都 set_content")
+    parser.add_argument("--jinja-only", action="store_true", help="不启动浏览器，渲染只执行 Jinja")
+    parser.add_argument("--iterations", type=int, default=200, help="解析 / Jinja 微基准每项次数")
+    parser.add_argument("--screenshot-iterations", type=int, default=5, help="截图微基准每个模板次数")
+    parser.add_argument("--payload-dir", help="录制响应所在目录")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--output", help="报告另存为文件，如 bench_output.txt")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    text = asyncio.run(main(args))
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
@@ -0,0 +1,122 @@
+"""
+AICU 上游响应缓存
+
+进程内 TTL 缓存，供各指令共享（个人信息、设备标记、批量查询等）。
+同一个键的并发请求会合并为一次上游调用；失败结果（None）不写入缓存。
+ttl 可以是按结果计算的函数，用于给「用户不存在」这类负结果设置较短的缓存时间。
+
+get_or_fetch 支持 stale-while-revalidate：每个条目在 ttl 内为新鲜，之后再保留 stale 秒为过期可用。
+过期可用的条目立即返回旧值，同时在后台发起一次刷新（同键只刷新一次），超过 stale 才阻塞等待上游。
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Union
+
+
+class TTLCache:
+    """带过期时间、LRU 淘汰与并发合并的异步缓存"""
+
+    def __init__(self, maxsize: int = 2048):
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, tuple[float, float, Any]] = OrderedDict()  # (新鲜截止, 可用截止, 值)
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self._refreshing: dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0  # 命中中返回过期值并触发后台刷新的次数
+
+    def _lookup(self, key: Hashable) -> tuple[str | None, Any]:
+        """返回 ("fresh" / "stale" / None, 值)"""
+        entry = self._data.get(key)
+        if entry is None:
+            return None, None
+        fresh_until, stale_until, value = entry
+        now = time.monotonic()
+        if now >= stale_until:
+            del self._data[key]
+            return None, None
+        self._data.move_to_end(key)
+        return ("fresh" if now < fresh_until else "stale"), value
+
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        """返回 (是否命中, 值)，只有新鲜的条目算命中"""
+        state, value = self._lookup(key)
+        return state == "fresh", value if state == "fresh" else None
+
+    def set(self, key: Hashable, value: Any, ttl: float, stale: float = 0):
+        if ttl <= 0:
+            return
+        fresh_until = time.monotonic() + ttl
+        self._data[key] = (fresh_until, fresh_until + max(stale, 0), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        self._data.pop(key, None)
+
+    async def get_or_fetch(
+        self, key: Hashable, ttl: Union[float, Callable[[Any], float]], fetch: Callable[[], Awaitable[Any]],
+        stale: Union[float, Callable[[Any], float]] = 0
+    ) -> Any:
+        """
+        新鲜命中直接返回；过期可用时返回旧值并在后台刷新；
+        否则调用 fetch，同键并发请求共享同一次调用
+        """
+        state, value = self._lookup(key)
+        if state == "fresh":
+            self.hits += 1
+            return value
+        if state == "stale":
+            self.hits += 1
+            self.stale_hits += 1
+            if key not in self._inflight and key not in self._refreshing:
+                task = asyncio.get_running_loop().create_task(self._refresh(key, ttl, fetch, stale))
+                self._refreshing[key] = task
+                task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.hits += 1
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        return await self._fetch(key, ttl, fetch, stale)
+
+    async def _refresh(self, key, ttl, fetch, stale):
+        """后台刷新：失败时保留旧值，直到可用截止时间"""
+        try:
+            await self._fetch(key, ttl, fetch, stale)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass
+
+    async def _fetch(self, key, ttl, fetch, stale) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await fetch()
+            if value is not None:
+                self.set(
+                    key, value, ttl(value) if callable(ttl) else ttl, stale(value) if callable(stale) else stale
+                )
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 没有其他等待者时取出异常，避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def cancel_refreshes(self):
+        """取消进行中的后台刷新（插件卸载时调用）"""
+        for task in list(self._refreshing.values()):
+            task.cancel()
@@ -0,0 +1,106 @@
+"""
+AICU 双用户对比
+
+把一个用户的评论、视频弹幕、直播弹幕、入场文档（与搜索索引、监控共用的文档结构）
+和设备标记汇总为「足迹」：去过的直播间、关注的主播、发过弹幕的视频、24 小时活跃分布、设备与历史昵称。
+两份足迹之间用集合交并与向量余弦计算重合程度，用于判断两个账号是否可能为同一人。
+"""
+import math
+from collections import Counter
+
+from .stats import StatColumns, summarize
+
+
+def _device_names(mark_raw) -> set[str]:
+    if not mark_raw or mark_raw.get('code') != 0:
+        return set()
+    data = mark_raw.get('data', {})
+    if not isinstance(data, dict):
+        return set()
+    devices = data.get('device', []) or []
+    return {d.get('name') or d.get('type') for d in devices if isinstance(d, dict) and (d.get('name') or d.get('type'))}
+
+
+def _history_names(mark_raw) -> set[str]:
+    if not mark_raw or mark_raw.get('code') != 0:
+        return set()
+    data = mark_raw.get('data', {})
+    names = data.get('hname', []) if isinstance(data, dict) else []
+    return {name for name in names if isinstance(name, str) and name} if isinstance(names, list) else set()
+
+
+def footprint(docs: list[dict], mark_raw=None) -> dict:
+    """汇总一个用户的足迹；docs 为 docs_from_* 的输出（可混合多个来源）"""
+    rooms, anchors, videos = Counter(), Counter(), Counter()
+    room_anchor: dict[str, str] = {}
+    columns = StatColumns()
+    for doc in docs:
+        columns.add(doc["ts"])
+        meta = doc["meta"]
+        room_id = str(meta.get("room_id") or "")
+        if room_id:
+            rooms[room_id] += 1
+            anchor = meta.get("anchor_name") or ""
+            if anchor:
+                anchors[anchor] += 1
+                room_anchor[room_id] = anchor
+        video_id = str(meta.get("video_id") or "")
+        if video_id:
+            videos[video_id] += 1
+    return {
+        "rooms": rooms,
+        "anchors": anchors,
+        "videos": videos,
+        "room_anchor": room_anchor,
+        "hour_hist": summarize(columns)["hour_hist"],
+        "record_count": len(columns),
+        "devices": _device_names(mark_raw),
+        "history_names": _history_names(mark_raw),
+    }
+
+
+def jaccard(a, b) -> float:
+    """两个集合（或 Counter 的键）的 Jaccard 系数，都为空时为 0"""
+    a, b = set(a), set(b)
+    union = len(a | b)
+    return len(a & b) / union if union else 0.0
+
+
+def cosine(a: list, b: list) -> float:
+    """两个等长向量的余弦相似度，任一为零向量时为 0"""
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def _shared(a: Counter, b: Counter, top_k: int) -> list[tuple]:
+    """共同的键，按两边出现次数的较小值从高到低排序，返回 [(键, A 次数, B 次数)]"""
+    keys = a.keys() & b.keys()
+    ranked = sorted(keys, key=lambda key: (min(a[key], b[key]), a[key] + b[key]), reverse=True)
+    return [(key, a[key], b[key]) for key in ranked[:top_k]]
+
+
+def compare_footprints(a: dict, b: dict, top_k: int = 10) -> dict:
+    """两份足迹的重合情况"""
+    room_anchor = {**b["room_anchor"], **a["room_anchor"]}
+    return {
+        "rooms": [
+            (room_id, room_anchor.get(room_id, ""), count_a, count_b)
+            for room_id, count_a, count_b in _shared(a["rooms"], b["rooms"], top_k)
+        ],
+        "anchors": _shared(a["anchors"], b["anchors"], top_k),
+        "videos": _shared(a["videos"], b["videos"], top_k),
+        "shared_counts": {
+            "rooms": len(a["rooms"].keys() & b["rooms"].keys()),
+            "anchors": len(a["anchors"].keys() & b["anchors"].keys()),
+            "videos": len(a["videos"].keys() & b["videos"].keys()),
+        },
+        "similarity": {
+            "rooms": jaccard(a["rooms"], b["rooms"]),
+            "anchors": jaccard(a["anchors"], b["anchors"]),
+            "videos": jaccard(a["videos"], b["videos"]),
+            "hours": cosine(a["hour_hist"], b["hour_hist"]),
+        },
+        "devices": sorted(a["devices"] & b["devices"]),
+        "history_names": sorted(a["history_names"] & b["history_names"]),
+    }
@@ -0,0 +1,104 @@
+"""
+AICU 账号 Cookie 池
+
+上游按账号限流，只配一个 Cookie 时所有请求都压在同一个账号的额度上。
+CookiePool 在多个账号之间轮换：
+- 每次取最久未使用的可用 Cookie（LRU），请求量均摊到各账号
+- 被限流（HTTP 429/412 或 JSON code -412/-509）的 Cookie 进入冷却，连续限流时冷却时间指数增长
+- HTTP 403 多为 Cloudflare 质询而不是账号限流，归类为 challenged，不影响账号状态，由调用方刷新 Cloudflare Cookie
+- 鉴权失败（HTTP 401 或 JSON code -101）的 Cookie 标记为失效并长时间冷却（auth_cooldown），
+  冷却结束后重新参与轮换，再次请求成功即恢复；偶发的鉴权失败不会让账号永久出局
+所有 Cookie 都在冷却（包括全部失效）时仍取最早恢复的一个，避免退化为不带 Cookie 请求。
+"""
+import time
+
+THROTTLE_STATUS = (412, 429)
+CHALLENGE_STATUS = (403,)
+THROTTLE_CODES = (-412, -509)
+AUTH_STATUS = (401,)
+AUTH_CODES = (-101,)
+
+
+class CookieLease:
+    """一个账号 Cookie 及其健康状态"""
+
+    __slots__ = ("cookie", "label", "last_used", "down_until", "strikes", "rejected", "requests", "throttled")
+
+    def __init__(self, cookie: str, label: str):
+        self.cookie = cookie
+        self.label = label  # 日志与指标中只显示序号，不暴露 Cookie 内容
+        self.last_used = 0.0
+        self.down_until = 0.0
+        self.strikes = 0       # 连续被限流次数
+        self.rejected = False  # 最近一次结果为鉴权失败，请求成功后清除
+        self.requests = 0
+        self.throttled = 0
+
+
+class CookiePool:
+    """多个账号 Cookie 的 LRU 轮换、限流冷却与失效冷却"""
+
+    def __init__(
+        self, cookies: list[str], cooldown: float = 120, max_cooldown: float = 1800, auth_cooldown: float = 3600
+    ):
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.auth_cooldown = auth_cooldown
+        unique = [cookie for cookie in dict.fromkeys(c.strip() for c in cookies if c) if cookie]
+        self.leases = [CookieLease(cookie, f"#{i}") for i, cookie in enumerate(unique, 1)]
+
+    def __bool__(self) -> bool:
+        return bool(self.leases)
+
+    def healthy_count(self) -> int:
+        now = time.monotonic()
+        return sum(1 for lease in self.leases if lease.down_until <= now)
+
+    def acquire(self) -> CookieLease | None:
+        """取最久未使用的可用 Cookie；全部冷却时取最早恢复的；没有配置 Cookie 时返回 None"""
+        if not self.leases:
+            return None
+        now = time.monotonic()
+        ready = [lease for lease in self.leases if lease.down_until <= now]
+        lease = min(ready, key=lambda l: l.last_used) if ready else min(self.leases, key=lambda l: l.down_until)
+        lease.last_used = now
+        lease.requests += 1
+        return lease
+
+    @staticmethod
+    def classify(status, data) -> str:
+        """把一次响应归类为 ok / throttled / rejected / challenged / error（网络异常等与账号无关的失败）"""
+        code = data.get("code") if isinstance(data, dict) else None
+        if status in AUTH_STATUS or code in AUTH_CODES:
+            return "rejected"
+        if status in THROTTLE_STATUS or code in THROTTLE_CODES:
+            return "throttled"
+        if status in CHALLENGE_STATUS:
+            return "challenged"
+        if status == 200:
+            return "ok"
+        return "error"
+
+    def report(self, lease: CookieLease, status, data) -> str:
+        """记录一次请求的结果，返回归类"""
+        verdict = self.classify(status, data)
+        if verdict == "ok":
+            lease.strikes = 0
+            lease.rejected = False
+        elif verdict == "throttled":
+            lease.throttled += 1
+            lease.strikes += 1
+            lease.down_until = time.monotonic() + min(self.max_cooldown, self.cooldown * 2 ** (lease.strikes - 1))
+        elif verdict == "rejected":
+            lease.rejected = True
+            lease.down_until = time.monotonic() + self.auth_cooldown
+        return verdict
+
+    def summary(self) -> dict:
+        now = time.monotonic()
+        return {
+            "active": sum(1 for lease in self.leases if lease.down_until <= now),
+            "cooling": sum(1 for lease in self.leases if lease.down_until > now and not lease.rejected),
+            "rejected": sum(1 for lease in self.leases if lease.down_until > now and lease.rejected),
+            "requests": {lease.label: lease.requests for lease in self.leases},
+        }
@@ -0,0 +1,158 @@
+"""
+AICU 上游接口选路
+
+每个接口可配置一个主地址和若干镜像（地址中可带 {uid} 等占位符）。
+EndpointRouter 记录每个地址的延迟（指数滑动平均）与最近失败情况，
+请求时按「可用优先、延迟从低到高、配置顺序」排列候选地址：
+- 没测过的地址延迟视为 0，会先被试一次，从而得到真实延迟
+- 失败的地址进入冷却期，冷却期内排到最后
+
+同时按接口名保留最近成功请求的耗时窗口，供自适应超时与对冲延迟使用。
+call 按上述顺序依次尝试各地址，慢接口可在对冲延迟后向下一个地址发出备份请求。
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+from .metrics import Metrics, RollingHistogram
+
+# fetch(url, timeout) 负责单次请求，失败时返回 None
+Fetch = Callable[[str, float], Awaitable]
+
+
+class EndpointRouter:
+    """按观测延迟为主地址与镜像排序"""
+
+    def __init__(self, alpha: float = 0.3, cooldown: float = 60, window: int = 200, min_samples: int = 20,
+                 metrics: Metrics = None):
+        self.alpha = alpha              # 滑动平均中新样本的权重
+        self.cooldown = cooldown        # 失败后降级的秒数
+        self.window = window            # 每个接口保留的耗时样本数
+        self.min_samples = min_samples  # 样本不足时不给出分位数
+        self.metrics = metrics          # 记录对冲请求的触发与胜出次数
+        self._latency: dict[str, float] = {}
+        self._down_until: dict[str, float] = {}
+        self._histograms: dict[str, RollingHistogram] = {}
+
+    def record(self, template: str, seconds: float, ok: bool):
+        if not ok:
+            self._down_until[template] = time.monotonic() + self.cooldown
+            return
+        self._down_until.pop(template, None)
+        previous = self._latency.get(template)
+        self._latency[template] = seconds if previous is None else previous + self.alpha * (seconds - previous)
+
+    def order(self, templates: list[str]) -> list[str]:
+        now = time.monotonic()
+        ranked = sorted(
+            enumerate(templates),
+            key=lambda item: (
+                self._down_until.get(item[1], 0) > now,
+                self._latency.get(item[1], 0.0),
+                item[0],
+            ),
+        )
+        return [template for _, template in ranked]
+
+    def cooling(self, template: str) -> bool:
+        """地址是否仍在失败冷却期内"""
+        return self._down_until.get(template, 0) > time.monotonic()
+
+    def latency(self, template: str) -> float | None:
+        return self._latency.get(template)
+
+    def observe(self, name: str, seconds: float):
+        """记录接口一次成功请求的耗时"""
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            histogram = self._histograms[name] = RollingHistogram(self.window)
+        histogram.observe(seconds)
+
+    def percentile(self, name: str, q: float) -> float | None:
+        """接口成功请求耗时的分位数，样本不足时返回 None"""
+        histogram = self._histograms.get(name)
+        if histogram is None or len(histogram.samples) < self.min_samples:
+            return None
+        return histogram.quantiles((q,))[0]
+
+    def observed_names(self) -> list[str]:
+        return sorted(self._histograms)
+
+    def adaptive_timeout(self, name: str, ceiling: float, factor: float, floor: float) -> float:
+        """样本足够时取成功请求 p99 的 factor 倍，夹在 [floor, ceiling] 之间；否则返回 ceiling"""
+        p99 = self.percentile(name, 0.99)
+        if p99 is None:
+            return ceiling
+        return min(ceiling, max(floor, p99 * factor))
+
+    def hedge_delay(self, name: str, default: float) -> float:
+        """对冲延迟：样本足够时取成功请求的 p95，否则使用 default"""
+        p95 = self.percentile(name, 0.95)
+        if p95 is None:
+            return default
+        return max(p95, 0.05)
+
+    # ================= 请求 =================
+    async def call(self, name: str, templates: list[str], fetch: Fetch, timeout: float,
+                   hedge_delay: float = None, url_args: dict = None):
+        """
+        按延迟顺序依次尝试主地址与镜像，直到某个地址返回非 None 结果。
+        hedge_delay 非空时，主请求超过该延迟仍未返回，
+        会并发向下一个镜像（没有镜像则同一地址）发出备份请求，先成功者胜出；
+        备份地址处于失败冷却期时不发对冲请求。
+        """
+        url_args = url_args or {}
+        pending = self.order(templates)
+        while pending:
+            template = pending.pop(0)
+            if hedge_delay is not None:
+                backup = pending.pop(0) if pending else template
+                result = await self._hedged_attempt(name, template, backup, fetch, timeout, url_args, hedge_delay)
+            else:
+                result = await self._attempt(name, template, fetch, timeout, url_args)
+            if result is not None:
+                return result
+        return None
+
+    async def _attempt(self, name: str, template: str, fetch: Fetch, timeout: float, url_args: dict):
+        start = time.perf_counter()
+        result = await fetch(template.format(**url_args), timeout)
+        elapsed = time.perf_counter() - start
+        self.record(template, elapsed, result is not None)
+        if result is not None:
+            self.observe(name, elapsed)
+        return result
+
+    async def _hedged_attempt(self, name: str, template: str, backup: str, fetch: Fetch, timeout: float,
+                              url_args: dict, delay: float):
+        primary = asyncio.create_task(self._attempt(name, template, fetch, timeout, url_args))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                # 主请求在对冲延迟内返回：成功直接用，失败则顺延尝试镜像；没有镜像时不立即重试同一地址
+                result = primary.result()
+                if result is not None or backup == template:
+                    return result
+                return await self._attempt(name, backup, fetch, timeout, url_args)
+
+            if self.cooling(backup):
+                self._count(name, "skipped_cooling")
+                return await primary
+
+            self._count(name, "fired")
+            tasks.add(asyncio.create_task(self._attempt(name, backup, fetch, timeout, url_args)))
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.result() is not None:
+                        self._count(name, "primary_won" if task is primary else "backup_won")
+                        return task.result()
+            return None
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _count(self, name: str, outcome: str):
+        if self.metrics is not None:
+            self.metrics.inc("hedge", name, outcome)
@@ -0,0 +1,191 @@
+"""
+AICU 流式 JSON 解码
+
+评论、视频弹幕、直播弹幕接口的响应主体是一个大数组（data.replies / data.videodmlist / data.list）。
+整包 json.loads 会先构造完整的字典树，峰值内存是响应体的数倍。
+ArrayStreamDecoder 边接收边解码：数组元素逐个解析，只保留投影后的少量字段；
+数组以外的部分（code、cursor 等）很小，最后单独解析为外层结构，再把投影后的列表放回原位。
+"""
+import codecs
+import json
+import re
+from typing import Callable
+
+_WHITESPACE = " \t\n\r"
+_STRUCTURAL = re.compile(r'["\[\]{},]')  # 字符串之外需要关心的字符
+_STRING_SPECIAL = re.compile(r'["\\]')  # 字符串之内需要关心的字符
+
+
+class ArrayStreamDecoder:
+    """增量解码 JSON 文本中第一个名为 key 的数组"""
+
+    # 找不到数组键时，每次保留缓冲区末尾这么多字符，防止键被切在两个分块之间
+    _KEY_OVERLAP = 64
+
+    def __init__(self, key: str, project: Callable[[dict], dict] = None):
+        self.key = key
+        self.project = project
+        self._key_pattern = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._state = "seek"   # seek -> items -> tail
+        self._buffer = ""
+        # 元素边界扫描状态：跨分块保留，每个字符只扫描一次
+        self._start = None   # 当前元素在缓冲区中的起点，None 表示尚未开始
+        self._scan = 0       # 下一个待扫描的位置
+        self._depth = 0
+        self._in_string = False
+        self._head: list[str] = []  # 数组之前的文本
+        self._tail: list[str] = []  # 数组之后的文本
+        self.items: list = []
+
+    def feed(self, chunk: bytes | str):
+        text = self._utf8.decode(chunk) if isinstance(chunk, bytes) else chunk
+        if not text:
+            return
+        if self._state == "tail":
+            self._tail.append(text)
+            return
+        self._buffer += text
+        if self._state == "seek":
+            self._seek()
+        if self._state == "items":
+            self._decode_items()
+
+    def _seek(self):
+        match = self._key_pattern.search(self._buffer)
+        if match is None:
+            keep = max(0, len(self._buffer) - self._KEY_OVERLAP)
+            self._head.append(self._buffer[:keep])
+            self._buffer = self._buffer[keep:]
+            return
+        # 外层结构中数组替换为空数组，数组内容逐个解码
+        self._head.append(self._buffer[:match.end()])
+        self._buffer = self._buffer[match.end():]
+        self._state = "items"
+
+    def _decode_items(self):
+        """
+        逐个解码完整的数组元素。
+        先扫描到元素结束（括号深度回到 0）再调用 raw_decode，元素未收全时不做解析尝试，
+        一个大元素被切成很多小分块时也不会反复从头解析。
+        """
+        buffer, size = self._buffer, len(self._buffer)
+        pos, start = self._scan, self._start
+        while True:
+            if start is None:
+                while pos < size and (buffer[pos] in _WHITESPACE or buffer[pos] == ","):
+                    pos += 1
+                if pos >= size:
+                    break
+                if buffer[pos] == "]":
+                    self._state = "tail"
+                    self._tail.append(buffer[pos:])
+                    self._buffer = ""
+                    return
+                start = pos
+            end, pos = self._scan_element(buffer, pos)
+            if end is None:
+                break  # 元素不完整，等待后续分块
+            item = self._decoder.raw_decode(buffer[start:end])[0]
+            self.items.append(self.project(item) if self.project else item)
+            start, pos = None, end
+
+        # 丢弃已解码的部分，扫描位置随之平移
+        cut = pos if start is None else start
+        self._buffer = buffer[cut:]
+        self._scan = pos - cut
+        self._start = None if start is None else 0
+
+    def _scan_element(self, buffer: str, pos: int) -> tuple[int | None, int]:
+        """从 pos 继续扫描当前元素，返回 (元素结束位置或 None, 下次扫描位置)"""
+        while True:
+            if self._in_string:
+                match = _STRING_SPECIAL.search(buffer, pos)
+                if match is None:
+                    return None, max(pos, len(buffer))
+                pos = match.end()
+                if match.group() == "\\":
+                    pos += 1  # 跳过被转义的字符（可能还在下一个分块里）
+                    continue
+                self._in_string = False
+                if self._depth == 0:
+                    return pos, pos  # 元素本身是字符串
+                continue
+
+            match = _STRUCTURAL.search(buffer, pos)
+            if match is None:
+                return None, len(buffer)
+            char = match.group()
+            if char == '"':
+                self._in_string = True
+                pos = match.end()
+            elif char in "[{":
+                self._depth += 1
+                pos = match.end()
+            elif self._depth == 0:
+                # 数字、true 等标量元素在下一个逗号或数组结尾处结束
+                return match.start(), match.start()
+            elif char == ",":
+                pos = match.end()
+            else:
+                self._depth -= 1
+                pos = match.end()
+                if self._depth == 0:
+                    return pos, pos
+
+    def close(self):
+        """结束输入，返回外层结构（数组位置已换成投影后的元素列表）"""
+        self.feed(self._utf8.decode(b"", final=True))
+        if self._state == "items":
+            raise ValueError(f"JSON 数组 {self.key} 不完整")
+        if self._state == "seek":
+            # 响应中没有该数组（如错误响应），按普通 JSON 解析
+            return json.loads("".join(self._head) + self._buffer)
+
+        envelope = json.loads("".join(self._head) + "".join(self._tail))
+        if not _replace_first_array(envelope, self.key, self.items):
+            raise ValueError(f"未能定位 JSON 数组 {self.key}")
+        return envelope
+
+
+def _replace_first_array(node, key: str, items: list) -> bool:
+    """按文档顺序找到第一个名为 key 的空数组并替换为 items（与流式定位到的数组是同一个）"""
+    if isinstance(node, dict):
+        for name, value in node.items():
+            if name == key and value == []:
+                node[name] = items
+                return True
+            if _replace_first_array(value, key, items):
+                return True
+    elif isinstance(node, list):
+        return any(_replace_first_array(value, key, items) for value in node)
+    return False
+
+
+def _pick(item: dict, fields: tuple) -> dict:
+    return {name: item[name] for name in fields if name in item}
+
+
+# 各接口需要流式解码的数组与元素投影：只保留解析、统计、搜索索引与监控用到的字段
+def project_reply(item: dict) -> dict:
+    return _pick(item, ("rpid", "message", "time", "rank"))
+
+
+def project_danmaku(item: dict) -> dict:
+    return _pick(item, ("id", "oid", "ctime", "content", "progress"))
+
+
+def project_live_room(item: dict) -> dict:
+    room = item.get("roominfo", {}) or {}
+    return {
+        "roominfo": _pick(room, ("roomid", "roomname", "upname")),
+        "danmu": [_pick(d, ("ts", "text", "uname")) for d in item.get("danmu", []) or []],
+    }
+
+
+STREAM_ARRAYS = {
+    "reply": ("replies", project_reply),
+    "danmaku": ("videodmlist", project_danmaku),
+    "live_danmaku": ("list", project_live_room),
+}
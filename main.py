@@ -1,21 +1,65 @@
 # 标准库
 import asyncio
+import csv
+import importlib
 import json
+import math
 import time
 import re
-from collections import Counter
+import sys
+import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
 
-# 第三方库
-import jinja2
-from curl_cffi.requests import AsyncSession
-from playwright.async_api import async_playwright
+_IMPORT_STARTED = time.perf_counter()
+
+# 第三方库 jinja2 / curl_cffi / playwright 较重，首次使用（或后台预热）时才导入，见 _lazy_import
 
 # AstrBot
-from astrbot.api.event import filter, AstrMessageEvent
+from astrbot.api.event import filter, AstrMessageEvent, MessageChain
 from astrbot.api.star import Context, Star, register, StarTools
 from astrbot.api import logger
+import astrbot.api.message_components as Comp
+
+# 插件内模块
+from .cache import TTLCache
+from .compare import compare_footprints, footprint
+from .cookie_pool import CHALLENGE_STATUS, CookiePool
+from .endpoints import EndpointRouter
+from .jsonstream import STREAM_ARRAYS, ArrayStreamDecoder
+from .metrics import Metrics, endpoint_name
+from .parsers import ParsePool, fetch_guard_pages
+from .records import TEMPLATE_FILTERS, MedalRecord, GuardRecord, fmt_time, truncate_text
+from .room_index import RoomIndex
+from .rollups import RollupStore
+from .render_worker import RenderJobError, RenderWorkerPool, launch_options, page_options
+from .search_index import (
+    KIND_NAMES, SearchIndex, docs_from_replies, docs_from_danmaku, docs_from_live_danmaku, docs_from_entry,
+)
+from .stats import merge_histograms
+from .template_pages import TemplatePages
+from .throttle import FairScheduler, RateLimiter, current_group
+from .watchlist import WATCH_KINDS, Watchlist, advance_cursors
+
+_IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+
+# 延迟导入的第三方模块，预热时按此顺序导入
+LAZY_MODULES = ("jinja2", "curl_cffi.requests", "playwright.async_api")
+# 可选依赖：未安装时预热直接跳过（统计引擎会退回纯 Python 实现）
+OPTIONAL_LAZY_MODULES = ("numpy",)
+
+
+def _lazy_import(name: str, metrics: Metrics = None):
+    """导入第三方模块；首次导入的耗时计入 lazy_import 阶段"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    if metrics is not None:
+        metrics.observe("lazy_import", name, time.perf_counter() - started)
+    return module
 
 
 @register("aicu_analysis", "Huahuatgc", "AICU B站评论查询", "2.9.5", "https://github.com/Huahuatgc/astrbot_plugin_aicu")
@@ -34,7 +78,7 @@ class AicuAnalysisPlugin(Star):
 
     # 新增的粉丝牌和大航海 API
     AICU_MEDAL_API_URL = "https://workers.vrp.moe/bilibili/user-medals/{uid}"  # 粉丝牌信息
-    AICU_GUARD_API_URL = "https://workers.vrp.moe/bilibili/live-guards/{uid}?p=1"  # 大航海信息
+    AICU_GUARD_API_URL = "https://workers.vrp.moe/bilibili/live-guards/{uid}?p={page}"  # 大航海信息（分页）
 
     # 新增的AI分析API
     AICU_AI_ANALYSIS_URL = "https://api.aicu.cc/ai"  # AI分析评论
@@ -42,11 +86,84 @@ class AicuAnalysisPlugin(Star):
     BILI_VIDEO_INFO_URL = "https://api.bilibili.com/x/web-interface/view"  # B站视频信息API
     BILI_USER_CARD_URL = "https://api.bilibili.com/x/web-interface/card"   # B站用户空间卡片API
 
+    # 接口名 -> (默认地址, 默认超时秒数)；地址、超时和镜像均可在配置中按接口名覆盖
+    ENDPOINTS = {
+        "reply": (AICU_REPLY_API_URL, 30),
+        "mark": (AICU_MARK_API_URL, 30),
+        "danmaku": (AICU_DANMAKU_API_URL, 30),
+        "live_danmaku": (AICU_LIVE_DANMAKU_API_URL, 30),
+        "entry": (AICU_ENTRY_API_URL, 30),
+        "medal": (AICU_MEDAL_API_URL, 30),
+        "guard": (AICU_GUARD_API_URL, 30),
+        "ai": (AICU_AI_ANALYSIS_URL, 30),
+        "bili_video": (BILI_VIDEO_INFO_URL, 10),
+        "bili_card": (BILI_USER_CARD_URL, 10),
+    }
+
     DEFAULT_REPLY_PAGE_SIZE = 100  # 默认抓取评论数
     DEFAULT_DANMAKU_PAGE_SIZE = 100  # 默认弹幕查询数量
     DEFAULT_ENTRY_PAGE_SIZE = 20  # 默认入场信息每页数量
+    DEFAULT_LIVE_DISPLAY_COUNT = 50  # 直播弹幕最多展示条数
+    DEFAULT_PARSE_WORKERS = 0  # 解析进程池大小，0 为不使用子进程
+    DEFAULT_PARSE_OFFLOAD_THRESHOLD = 2000  # 记录数达到该值才离开事件循环解析
+    DEFAULT_DISPLAY_COUNT = 100  # 评论、视频弹幕最多展示条数（统计仍覆盖全部抓取结果）
     DEFAULT_AVATAR_URL = "https://i0.hdslb.com/bfs/face/member/noface.jpg"
     DEFAULT_AI_ANALYSIS_TIMEOUT = 30  # AI分析超时时间（秒）
+    DEFAULT_CACHE_TTL = 300  # 上游响应共享缓存时间（秒）
+    DEFAULT_MEDAL_GUARD_CACHE_TTL = 21600  # 粉丝牌、大航海每天最多变化一次，按 UID 长时间缓存（秒）
+    DEFAULT_GUARD_MAX_PAGES = 10  # 大航海最多拉取的页数
+    DEFAULT_NEGATIVE_CACHE_TTL = 60  # 「用户不存在」「没有记录」等负结果的缓存时间（秒）
+    # 各接口缓存过期后仍可先返回旧值、同时后台刷新的时间（秒），超过后才阻塞等待上游
+    DEFAULT_STALE_WINDOWS = {
+        "reply": 1800,
+        "mark": 3600,
+        "danmaku": 1800,
+        "live_danmaku": 1800,
+        "entry": 1800,
+        "medal": 21600,
+        "guard": 21600,
+        "bili_video": 86400,
+        "bili_card": 3600,
+    }
+    DEFAULT_UID_PROBE_TIMEOUT = 2.0  # 用户存在性预检最多等待的秒数，超时则照常查询
+    BILI_MISSING_USER_CODES = (-404, -626)  # B站卡片接口表示用户不存在的返回码
+    DEFAULT_SEARCH_CACHE_TTL = 600  # 同一关键词在此时间内直接查本地索引（秒）
+    DEFAULT_SEARCH_DISPLAY_COUNT = 50  # 搜索结果最多展示条数
+    DEFAULT_SEARCH_INDEX_MAX_DOCS = 5000  # 本地索引每个 UID 最多保留的文档数
+    DEFAULT_REPORT_SECTION_COUNT = 8  # 综合报告每个板块最多展示条数
+    DEFAULT_BATCH_MAX_UIDS = 50  # 批量查询单次最多UID数
+    DEFAULT_BATCH_CONCURRENCY = 4  # 批量查询同时处理的UID数
+    DEFAULT_THROTTLE_USER_PER_MINUTE = 6  # 每个发送者每分钟可发起的查询数，0 为不限
+    DEFAULT_THROTTLE_USER_BURST = 3  # 每个发送者可连续发起的查询数
+    DEFAULT_THROTTLE_GROUP_PER_MINUTE = 20  # 每个会话（群聊/私聊）每分钟可发起的查询数，0 为不限
+    DEFAULT_THROTTLE_GROUP_BURST = 10  # 每个会话可连续发起的查询数
+    DEFAULT_FETCH_CONCURRENCY = 16  # 同时进行的上游请求数，各会话轮流分配
+    DEFAULT_RENDER_CONCURRENCY = 2  # 同时进行的浏览器截图数，各会话轮流分配
+    DEFAULT_RENDER_WORKERS = 0  # 本机独立渲染进程数，0 为在插件进程内渲染
+    DEFAULT_RENDER_WORKER_PAGES = 2  # 每个渲染进程同时渲染的页面数
+    DEFAULT_BROWSER_PROFILE = "lean"  # 渲染配置：lean 为渲染进程精简参数并关闭一次性渲染页 JavaScript，standard 为原参数
+    DEFAULT_PERSISTENT_PAGES = 1  # 每个模板保留的常驻页面数，0 为每次新建页面并 set_content
+    DEFAULT_BATCH_PAGE_SIZE = 20  # 批量查询每个来源抓取的条数
+    DEFAULT_COOKIE_COOLDOWN = 120  # Cookie 被限流后的首次冷却时间（秒），连续限流时翻倍
+    DEFAULT_COOKIE_AUTH_COOLDOWN = 3600  # Cookie 鉴权失败后暂停使用的时间（秒），之后重新参与轮换
+    DEFAULT_COOKIE_ATTEMPTS = 2  # 单次请求最多换几个账号 Cookie 尝试
+    DEFAULT_COMPARE_TOP_COUNT = 10  # /对比 每个重合项列出的条数
+    DEFAULT_ROOM_REPORT_COUNT = 20  # /房间 列出的观众数与共同访问直播间数
+    DEFAULT_ROOM_INDEX_MAX_ROOMS = 5000  # 直播间索引最多保留的直播间数
+    DEFAULT_ROLLUP_TIMELINE_DAYS = 180  # 综合报告活跃时间线覆盖的天数
+    DEFAULT_WATCH_INTERVAL = 30  # 监控轮询周期（分钟）
+    DEFAULT_WATCH_PAGE_SIZE = 20  # 监控每次轮询每个来源抓取的条数
+    DEFAULT_WATCH_MIN_GAP = 5  # 相邻两个UID轮询之间的最小间隔（秒）
+    DEFAULT_WATCH_MAX_PER_GROUP = 20  # 每个会话最多监控的UID数
+    DEFAULT_HEDGE_ENDPOINTS = ["entry", "medal", "guard"]  # 默认启用对冲请求的慢接口
+    DEFAULT_HEDGE_DELAY = 2.0  # 延迟样本不足时，主请求超过该时间（秒）未返回即发出对冲请求
+    DEFAULT_ADAPTIVE_TIMEOUT_FACTOR = 3.0  # 自适应超时 = 成功请求 p99 × 该系数
+    DEFAULT_ADAPTIVE_TIMEOUT_MIN = 3.0  # 自适应超时下限（秒）
+    DEFAULT_COMMAND_DEADLINE = 5.0  # 个人信息、设备标记、粉丝牌、大航海等辅助数据的等待上限（秒，从指令开始计）
+    DEFAULT_FOLLOWUP_TIMEOUT = 60  # 迟到数据最多再等多久（秒）用于补发更新后的图片
+
+    # 辅助数据来源 -> 缺失提示中显示的名称
+    SOURCE_NAMES = {"profile": "个人信息", "mark": "设备与历史昵称", "medal": "粉丝牌", "guard": "大航海"}
 
     # 请求头常量
     DEFAULT_HEADERS = {
@@ -100,6 +217,7 @@ class AicuAnalysisPlugin(Star):
     }
 
     def __init__(self, context: Context, config: dict):
+        init_started = time.perf_counter()
         super().__init__(context)
         self.config = config
         self._browser = None
@@ -107,6 +225,12 @@ class AicuAnalysisPlugin(Star):
 
         # Cloudflare 验证相关缓存
         self._aicu_cf_cookie: str | None = None
+        # 账号 Cookie 池：cookie 与 cookies 中的全部账号轮换使用
+        self._cookie_pool = CookiePool(
+            [self.config.get("cookie", ""), *self.config.get("cookies", [])],
+            cooldown=self.config.get("cookie_cooldown", self.DEFAULT_COOKIE_COOLDOWN),
+            auth_cooldown=self.config.get("cookie_auth_cooldown", self.DEFAULT_COOKIE_AUTH_COOLDOWN),
+        )
         self._aicu_cf_cookie_expires_at: float = 0.0  # 时间戳，避免过于频繁刷新
 
         # 使用框架提供的标准数据目录
@@ -114,37 +238,128 @@ class AicuAnalysisPlugin(Star):
         self.output_dir = self.data_dir / "temp"
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
+        # 运行指标：分阶段耗时、接口状态码、缓存命中率
+        self._metrics = Metrics(
+            export_path=self.data_dir / "aicu_metrics.prom" if self.config.get("metrics_prometheus_file", False) else None,
+        )
+
+        # 上游接口选路：主地址与镜像按观测延迟排序
+        self._router = EndpointRouter(metrics=self._metrics)
+
+        # 上游响应共享缓存（个人信息、设备标记、批量查询等）
+        self._cache = TTLCache()
+        self._metrics.register_gauge("cache_hits", lambda: self._cache.hits)
+        self._metrics.register_gauge("cache_misses", lambda: self._cache.misses)
+        self._metrics.register_gauge("cache_stale_hits", lambda: self._cache.stale_hits)
+
+        # 限流：按发送者与会话的令牌桶；上游请求与浏览器渲染按会话轮流分配并发槽位
+        self._user_limiter = RateLimiter(
+            self.config.get("throttle_user_per_minute", self.DEFAULT_THROTTLE_USER_PER_MINUTE),
+            self.config.get("throttle_user_burst", self.DEFAULT_THROTTLE_USER_BURST),
+        )
+        self._group_limiter = RateLimiter(
+            self.config.get("throttle_group_per_minute", self.DEFAULT_THROTTLE_GROUP_PER_MINUTE),
+            self.config.get("throttle_group_burst", self.DEFAULT_THROTTLE_GROUP_BURST),
+        )
+        self._fetch_scheduler = FairScheduler(self.config.get("fetch_concurrency", self.DEFAULT_FETCH_CONCURRENCY))
+        # 使用独立渲染进程时，默认并发数为各进程可同时渲染的页面总数
+        worker_pages = self.config.get("render_workers", self.DEFAULT_RENDER_WORKERS) * self.config.get(
+            "render_worker_pages", self.DEFAULT_RENDER_WORKER_PAGES
+        ) + len(self.config.get("render_worker_urls", [])) * self.DEFAULT_RENDER_WORKER_PAGES
+        self._render_scheduler = FairScheduler(
+            self.config.get("render_concurrency", max(self.DEFAULT_RENDER_CONCURRENCY, worker_pages))
+        )
+        self._metrics.register_gauge("fetch_waiting", lambda: self._fetch_scheduler.waiting)
+        self._metrics.register_gauge("render_waiting", lambda: self._render_scheduler.waiting)
+
+        # 大结果的解析与统计离开事件循环执行（子进程或线程池），小结果直接解析
+        self._parse_pool = ParsePool(
+            self.config.get("parse_workers", self.DEFAULT_PARSE_WORKERS),
+            self.config.get("parse_offload_threshold", self.DEFAULT_PARSE_OFFLOAD_THRESHOLD),
+        )
+
+        # 独立渲染进程：浏览器在插件进程之外运行，首次渲染时才启动
+        self._render_pool = RenderWorkerPool(
+            local_count=self.config.get("render_workers", self.DEFAULT_RENDER_WORKERS),
+            remote=self.config.get("render_worker_urls", []),
+            pages=self.config.get("render_worker_pages", self.DEFAULT_RENDER_WORKER_PAGES),
+            headless=self.config.get("browser_headless", True),
+            profile=self.config.get("browser_profile", self.DEFAULT_BROWSER_PROFILE),
+            executable_path=self.config.get("browser_executable", ""),
+            token=self.config.get("render_worker_token", ""),
+        )
+
+        # 本地关键词索引：覆盖所有查询过的评论与弹幕
+        self._search_index = SearchIndex(
+            self.data_dir / "search_index",
+            max_docs=self.config.get("search_index_max_docs", self.DEFAULT_SEARCH_INDEX_MAX_DOCS),
+        )
+
+        # 直播间反向索引：直播间 -> 查询与监控中见过的 UID
+        self._room_index = RoomIndex(
+            self.data_dir / "room_index.json",
+            max_rooms=self.config.get("room_index_max_rooms", self.DEFAULT_ROOM_INDEX_MAX_ROOMS),
+        )
+
+        # 活跃度预聚合：星期×小时、按日计数与直播间观看时长，随查询与轮询增量更新
+        self._rollups = RollupStore(self.data_dir / "rollups")
+
+        # 监控列表：定时增量轮询并推送提醒
+        self._watchlist = Watchlist(self.data_dir / "watchlist.json")
+        self._watch_task: asyncio.Task | None = None
+
+        # 后台任务（补发更新后的图片等），卸载时统一取消
+        self._background_tasks: set[asyncio.Task] = set()
+        try:
+            self._start_watch_task()
+        except RuntimeError:
+            # 没有运行中的事件循环时，首次使用 /监控 指令时再启动
+            pass
+
         # 插件源码目录
         self.plugin_dir = Path(__file__).parent
 
+        # 模板环境：记录只保存原始数值，格式化通过过滤器在渲染时完成；首次渲染时才创建
+        self._jinja_env = None
+        self._templates: dict = {}
+        # 常驻模板页面：样式只解析一次，之后每次渲染只注入 body 片段
+        self._template_pages = TemplatePages(
+            self.config.get("persistent_pages", self.DEFAULT_PERSISTENT_PAGES) or 1,
+            profile=self.config.get("browser_profile", self.DEFAULT_BROWSER_PROFILE),
+        )
+        self._warmup_task: asyncio.Task | None = None
+
+        # 启动耗时：模块导入与插件初始化，重型依赖的导入与浏览器启动不在此路径上
+        self._metrics.observe("startup", "import", _IMPORT_SECONDS)
+        self._metrics.observe("startup", "init", time.perf_counter() - init_started)
+
+    def _new_session(self):
+        """创建 curl_cffi 会话，首次调用时才导入 curl_cffi"""
+        return _lazy_import("curl_cffi.requests", self._metrics).AsyncSession()
+
     async def _get_browser(self):
         """获取或创建浏览器实例"""
         if self._browser is None:
+            started = time.perf_counter()
+            async_playwright = _lazy_import("playwright.async_api", self._metrics).async_playwright
             self._playwright = await async_playwright().start()
             try:
-                headless = self.config.get("browser_headless", True)
-                launch_options = {
-                    "headless": headless,
-                    "args": [
-                        "--disable-blink-features=AutomationControlled",
-                        "--disable-dev-shm-usage",
-                        "--no-sandbox",
-                        "--disable-setuid-sandbox",
-                    ],
-                }
+                # 该浏览器还要通过 aicu.cc 的 Cloudflare 验证，固定使用标准参数，精简参数只用于渲染进程
+                options = launch_options(
+                    self.config.get("browser_headless", True), "standard", self.config.get("browser_executable", "")
+                )
                 try:
-                    self._browser = await self._playwright.chromium.launch(**launch_options)
+                    self._browser = await self._playwright.chromium.launch(**options)
                 except Exception:
                     logger.warning("[AICU] 无法正常启动浏览器，尝试使用无沙箱模式(简化参数)")
-                    self._browser = await self._playwright.chromium.launch(
-                        headless=headless,
-                        args=['--no-sandbox'],
-                    )
+                    options["args"] = ['--no-sandbox']
+                    self._browser = await self._playwright.chromium.launch(**options)
             except Exception as e:
                 logger.error(f"[AICU] 启动浏览器严重失败: {e}")
                 await self._playwright.stop()
                 self._playwright = None
                 raise e
+            self._metrics.observe("startup", "browser", time.perf_counter() - started)
         return self._browser
 
     async def _ensure_aicu_cf_cookie(self):
@@ -166,6 +381,7 @@ class AicuAnalysisPlugin(Star):
             # 这里 _aicu_cf_cookie_expires_at 表示“下次再尝试过码”的时间点
             return
 
+        started = time.perf_counter()
         browser = await self._get_browser()
         context = await browser.new_context(
             viewport={"width": 1280, "height": 720},
@@ -218,9 +434,20 @@ class AicuAnalysisPlugin(Star):
                 await context.close()
             except Exception:
                 pass
+            # 只统计真正打开浏览器过码的耗时，命中缓存/冷却期的直接返回不计入
+            self._metrics.observe("cf_cookie", "", time.perf_counter() - started)
+            self._metrics.inc("cf_cookie_result", "", "ok" if self._aicu_cf_cookie else "error")
+
+    def _invalidate_aicu_cf_cookie(self):
+        """aicu.cc 返回 403（Cloudflare 质询）时丢弃已缓存的 CF Cookie，下次请求重新过码；过码失败的冷却期不受影响"""
+        if self._aicu_cf_cookie:
+            logger.info("[AICU] aicu.cc 返回 403，Cloudflare Cookie 可能已失效，将重新获取")
+            self._aicu_cf_cookie = None
+            self._aicu_cf_cookie_expires_at = 0.0
 
     async def _close_browser(self):
         """关闭浏览器实例"""
+        await self._template_pages.clear()
         if self._browser:
             await self._browser.close()
             self._browser = None
@@ -229,10 +456,54 @@ class AicuAnalysisPlugin(Star):
             await self._playwright.stop()
             self._playwright = None
 
+    async def _warmup(self):
+        """后台预热：导入重型依赖、编译模板，按配置提前启动浏览器"""
+        started = time.perf_counter()
+        try:
+            for name in LAZY_MODULES + OPTIONAL_LAZY_MODULES:
+                if name in sys.modules:
+                    continue
+                # 导入在线程中进行，避免阻塞事件循环上的其他插件
+                import_started = time.perf_counter()
+                try:
+                    await asyncio.to_thread(importlib.import_module, name)
+                except ImportError:
+                    if name in OPTIONAL_LAZY_MODULES:
+                        continue
+                    raise
+                self._metrics.observe("lazy_import", name, time.perf_counter() - import_started)
+            for template_path in sorted(self.plugin_dir.glob("template*.html")):
+                self._get_template(template_path.name)
+            if self.config.get("warmup_browser", False):
+                await self._get_browser()
+            self._metrics.observe("startup", "warmup", time.perf_counter() - started)
+            logger.info(f"[AICU] 预热完成，耗时 {time.perf_counter() - started:.2f}s")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"[AICU] 预热失败，将在首次使用时再加载: {e}")
+
     async def on_plugin_load(self):
+        if self.config.get("warmup_on_load", False):
+            self._warmup_task = asyncio.create_task(self._warmup())
         logger.info(f"[AICU] 插件加载完成，所有群聊和私聊均可使用")
 
     async def on_plugin_unload(self):
+        if self._warmup_task:
+            self._warmup_task.cancel()
+            self._warmup_task = None
+        if self._watch_task:
+            self._watch_task.cancel()
+            self._watch_task = None
+        for task in list(self._background_tasks):
+            task.cancel()
+        self._cache.cancel_refreshes()
+        try:
+            self._room_index.flush()
+        except Exception as e:
+            logger.warning(f"[AICU] 保存直播间索引失败: {e}")
+        self._parse_pool.shutdown()
+        await self._render_pool.close()
         await self._close_browser()
         logger.info("[AICU] 插件卸载，浏览器资源已清理")
 
@@ -293,9 +564,123 @@ class AicuAnalysisPlugin(Star):
 
         return True, extracted_uid
 
+    # ================= 新增：限流与公平调度 =================
+    def _throttle(self, event: AstrMessageEvent, cost: int = 1) -> str | None:
+        """
+        按发送者与会话的令牌桶限流，超限时返回带等待时间的提示；
+        通过时扣除令牌，并把当前会话记入上下文，供上游请求与渲染的公平调度使用。
+        """
+        group = event.unified_msg_origin
+        current_group.set(group)
+
+        checks = []
+        if self._user_limiter.rate > 0:
+            checks.append(("user", "你的查询", self._user_limiter.bucket(str(event.get_sender_id()))))
+        if self._group_limiter.rate > 0:
+            checks.append(("group", "本会话的查询", self._group_limiter.bucket(group)))
+
+        for scope, label, bucket in checks:
+            wait = bucket.retry_after(min(cost, bucket.capacity))
+            if wait > 0:
+                self._metrics.inc("throttled", scope)
+                return f"⏳ {label}过于频繁，请 {math.ceil(wait)} 秒后再试"
+        for _, _, bucket in checks:
+            bucket.take(min(cost, bucket.capacity))
+        return None
+
+    @asynccontextmanager
+    async def _fair_slot(self, scheduler: FairScheduler, resource: str):
+        """获取共享资源的并发槽位，排队耗时计入 queue_wait 阶段"""
+        started = time.perf_counter()
+        async with scheduler.slot():
+            self._metrics.observe("queue_wait", resource, time.perf_counter() - started)
+            yield
+
     # ================= 1. 异步请求封装 =================
-    async def _make_request(self, url: str, params: dict, cookie_override: str = None, use_entry_headers: bool = False):
-        """异步通用请求（对 aicu.cc 域名自动通过浏览器获取 Cloudflare Cookie）"""
+    def _endpoint_templates(self, name: str) -> list[str]:
+        """接口的主地址与镜像地址（可含 {uid} 占位符），主地址在前"""
+        primary = (self.config.get("endpoint_urls") or {}).get(name) or self.ENDPOINTS[name][0]
+        mirrors = (self.config.get("endpoint_mirrors") or {}).get(name) or []
+        return list(dict.fromkeys([primary, *mirrors]))
+
+    def _endpoint_timeout(self, name: str) -> float:
+        """
+        单次请求超时：配置值（或默认值）为上限；开启自适应超时且样本足够时，
+        取成功请求 p99 的若干倍，并不低于自适应下限
+        """
+        ceiling = (self.config.get("endpoint_timeouts") or {}).get(name)
+        if not ceiling:
+            if name == "ai":
+                ceiling = self.config.get("ai_analysis_timeout", self.DEFAULT_AI_ANALYSIS_TIMEOUT)
+            else:
+                ceiling = self.ENDPOINTS[name][1]
+
+        if not self.config.get("adaptive_timeout", True):
+            return ceiling
+        return self._router.adaptive_timeout(
+            name, ceiling,
+            self.config.get("adaptive_timeout_factor", self.DEFAULT_ADAPTIVE_TIMEOUT_FACTOR),
+            self.config.get("adaptive_timeout_min", self.DEFAULT_ADAPTIVE_TIMEOUT_MIN),
+        )
+
+    def _hedge_delay(self, name: str) -> float:
+        """对冲延迟：样本足够时取成功请求的 p95，否则使用配置值"""
+        return self._router.hedge_delay(name, self.config.get("hedge_delay", self.DEFAULT_HEDGE_DELAY))
+
+    async def _call_endpoint(self, name: str, fetch, hedge: bool = False, url_args: dict = None):
+        """
+        按延迟顺序依次尝试主地址与镜像（见 EndpointRouter.call），fetch(url, timeout) 失败时返回 None。
+        hedge=True 且该接口在对冲列表中时，慢请求会向下一个地址发出对冲请求。
+        """
+        timeout = self._endpoint_timeout(name)
+        hedge = hedge and name in self.config.get("hedge_endpoints", self.DEFAULT_HEDGE_ENDPOINTS)
+        async with self._fair_slot(self._fetch_scheduler, "fetch"):
+            return await self._router.call(
+                name, self._endpoint_templates(name), fetch, timeout,
+                hedge_delay=self._hedge_delay(name) if hedge else None, url_args=url_args,
+            )
+
+    async def _make_request(
+        self, endpoint: str, params: dict, cookie_override: str = None,
+        use_entry_headers: bool = False, cache_ttl: float = None, url_args: dict = None
+    ):
+        """异步通用请求，endpoint 为 ENDPOINTS 中的接口名，cache_ttl 非空时结果写入共享缓存"""
+        if cache_ttl is None:
+            return await self._request_uncached(endpoint, params, cookie_override, use_entry_headers, url_args)
+
+        key = (
+            "request", endpoint, tuple(sorted(params.items())), cookie_override, use_entry_headers,
+            tuple(sorted((url_args or {}).items())),
+        )
+        fresh, stale = self._cache_windows(endpoint, cache_ttl)
+        return await self._cache.get_or_fetch(
+            key, fresh,
+            lambda: self._request_uncached(endpoint, params, cookie_override, use_entry_headers, url_args),
+            stale=stale
+        )
+
+    async def _request_uncached(
+        self, endpoint: str, params: dict, cookie_override: str = None,
+        use_entry_headers: bool = False, url_args: dict = None
+    ):
+        """GET 请求幂等，可对慢接口发出对冲请求；评论与弹幕类大数组响应走流式解码"""
+        stream_array = STREAM_ARRAYS.get(endpoint) if self.config.get("stream_json", True) else None
+        return await self._call_endpoint(
+            endpoint,
+            lambda url, timeout: self._request_once(
+                url, params, cookie_override, use_entry_headers, timeout, stream_array
+            ),
+            hedge=True, url_args=url_args
+        )
+
+    async def _request_once(
+        self, url: str, params: dict, cookie_override: str = None,
+        use_entry_headers: bool = False, timeout: float = 30, stream_array: tuple = None
+    ):
+        """
+        单次 GET 请求（对 aicu.cc 域名自动通过浏览器获取 Cloudflare Cookie）。
+        stream_array 为 (数组键, 元素投影函数) 时边下载边解码该数组，只保留投影后的字段。
+        """
         headers = self.DEFAULT_HEADERS.copy()
 
         if use_entry_headers:
@@ -308,69 +693,143 @@ class AicuAnalysisPlugin(Star):
             except Exception as e:
                 logger.warning(f"[AICU] 获取 Cloudflare Cookie 失败，将继续使用原始请求: {e}")
 
-        # 组装 cookie：调用方覆盖 / 用户配置 + Cloudflare Cookie
-        cookie_parts: list[str] = []
-
+        # 调用方指定 Cookie（如不带 Cookie 重试）时不经过账号池
         if cookie_override is not None:
-            if cookie_override:
-                cookie_parts.append(cookie_override)
-        elif self.config.get("cookie"):
-            cookie_parts.append(self.config.get("cookie"))
+            _, data = await self._get_once(url, params, headers, cookie_override, timeout, stream_array)
+            return data
+        # 账号池只用于 aicu.cc：入场、粉丝牌、大航海等第三方接口的限流与鉴权失败与 AICU 账号无关，沿用原来的请求头
+        if not self._uses_cookie_pool(url):
+            cookie = self.config.get("cookie", "") if "aicu.cc" not in url else ""
+            _, data = await self._get_once(url, params, headers, cookie, timeout, stream_array)
+            return data
+
+        # 账号池：取最久未用的 Cookie，被限流或失效时换下一个账号再试
+        max_attempts = self.config.get("cookie_attempts", self.DEFAULT_COOKIE_ATTEMPTS)
+        attempts = max(1, min(max_attempts, self._cookie_pool.healthy_count()))
+        for _ in range(attempts):
+            lease = self._cookie_pool.acquire()
+            if lease is None:
+                break
+            status, data = await self._get_once(url, params, headers, lease.cookie, timeout, stream_array)
+            verdict = self._cookie_pool.report(lease, status, data)
+            self._metrics.inc("cookie_result", "", verdict)
+            if verdict == "rejected":
+                logger.warning(f"[AICU] Cookie {lease.label} 鉴权失败，暂停使用 {self._cookie_pool.auth_cooldown:.0f} 秒")
+            elif verdict == "throttled":
+                logger.info(f"[AICU] Cookie {lease.label} 被限流，进入冷却")
+            elif verdict == "challenged":
+                # Cloudflare 质询与账号无关：重新过码后再试，账号不进入冷却
+                try:
+                    await self._ensure_aicu_cf_cookie()
+                except Exception as e:
+                    logger.warning(f"[AICU] 重新获取 Cloudflare Cookie 失败: {e}")
+            else:
+                return data
+        return None
 
-        if self._aicu_cf_cookie:
-            cookie_parts.append(self._aicu_cf_cookie)
+    def _uses_cookie_pool(self, url: str) -> bool:
+        return "aicu.cc" in url and bool(self._cookie_pool)
 
+    async def _get_once(
+        self, url: str, params: dict, headers: dict, cookie: str, timeout: float, stream_array: tuple = None
+    ) -> tuple:
+        """带指定账号 Cookie（与 Cloudflare Cookie 合并）发出一次 GET，返回 (状态码, 解码结果)；异常时状态码为 None"""
+        headers = dict(headers)
+        cookie_parts = [part for part in (cookie, self._aicu_cf_cookie) if part]
         if cookie_parts:
             headers["cookie"] = "; ".join(cookie_parts)
 
-        async with AsyncSession() as session:
+        endpoint = endpoint_name(url)
+        async with self._new_session() as session:
             try:
                 logger.debug(f"[AICU] Fetching: {url}")
-                response = await session.get(url, params=params, headers=headers, timeout=30)
+                with self._metrics.span("request", endpoint):
+                    response = await session.get(
+                        url, params=params, headers=headers, timeout=timeout, stream=bool(stream_array)
+                    )
+                self._metrics.inc("request_status", endpoint, response.status_code)
 
                 if response.status_code != 200:
                     logger.warning(f"[AICU] 请求返回非200状态码: {response.status_code} | URL: {url}")
-                    return None
+                    if response.status_code in CHALLENGE_STATUS and "aicu.cc" in url:
+                        self._invalidate_aicu_cf_cookie()
+                    if stream_array:
+                        await response.aclose()
+                    return response.status_code, None
+
+                if stream_array:
+                    # 流式响应的下载时间计入解码阶段
+                    with self._metrics.span("json_decode", endpoint):
+                        return 200, await self._decode_stream(response, *stream_array)
 
                 loop = asyncio.get_running_loop()
-                return await loop.run_in_executor(None, response.json)
+                with self._metrics.span("json_decode", endpoint):
+                    return 200, await loop.run_in_executor(None, response.json)
 
             except Exception as e:
+                self._metrics.inc("request_status", endpoint, "exception")
                 logger.error(f"[AICU] 网络请求异常: {e}")
-                return None
+                return None, None
+
+    async def _decode_stream(self, response, key: str, project):
+        """逐块读取响应并增量解码其中的大数组，峰值内存只与投影后的数据量相关"""
+        decoder = ArrayStreamDecoder(key, project)
+        try:
+            async for chunk in response.aiter_content():
+                decoder.feed(chunk)
+        finally:
+            await response.aclose()
+        return decoder.close()
 
     async def _make_ai_analysis_request(self, comments_text: str):
         """发送AI分析请求"""
         headers = self.AI_ANALYSIS_HEADERS.copy()
 
         # AI 分析也在 aicu.cc 域名下，需要先尝试过 Cloudflare
-        try:
-            await self._ensure_aicu_cf_cookie()
-        except Exception as e:
-            logger.warning(f"[AICU] 获取 Cloudflare Cookie 失败（AI分析），将继续使用原始请求: {e}")
+        if any("aicu.cc" in url for url in self._endpoint_templates("ai")):
+            try:
+                await self._ensure_aicu_cf_cookie()
+            except Exception as e:
+                logger.warning(f"[AICU] 获取 Cloudflare Cookie 失败（AI分析），将继续使用原始请求: {e}")
 
-        cookie_parts: list[str] = []
-        if self.config.get("cookie"):
-            cookie_parts.append(self.config.get("cookie"))
-        if self._aicu_cf_cookie:
-            cookie_parts.append(self._aicu_cf_cookie)
+        # POST 非幂等，只做镜像顺延，不发对冲请求
+        return await self._call_endpoint(
+            "ai", lambda url, timeout: self._post_ai_analysis(url, comments_text, headers, timeout)
+        )
+
+    async def _post_ai_analysis(self, url: str, comments_text: str, headers: dict, timeout: float):
+        # aicu.cc 地址从账号池取 Cookie 并回报结果，其他镜像沿用配置的 Cookie
+        lease = self._cookie_pool.acquire() if self._uses_cookie_pool(url) else None
+        headers = dict(headers)
+        cookie_parts = [
+            part for part in (
+                lease.cookie if lease else ("" if "aicu.cc" in url else self.config.get("cookie", "")),
+                self._aicu_cf_cookie,
+            ) if part
+        ]
         if cookie_parts:
             headers["cookie"] = "; ".join(cookie_parts)
 
-        timeout = self.config.get("ai_analysis_timeout", self.DEFAULT_AI_ANALYSIS_TIMEOUT)
-
-        async with AsyncSession() as session:
+        async with self._new_session() as session:
             try:
                 logger.debug(f"[AICU] 发送AI分析请求，评论长度: {len(comments_text)}")
-                response = await session.post(
-                    self.AICU_AI_ANALYSIS_URL,
-                    data=comments_text.encode('utf-8'),
-                    headers=headers,
-                    timeout=timeout
-                )
+                endpoint = endpoint_name(url)
+                with self._metrics.span("request", endpoint):
+                    response = await session.post(
+                        url,
+                        data=comments_text.encode('utf-8'),
+                        headers=headers,
+                        timeout=timeout
+                    )
+                self._metrics.inc("request_status", endpoint, response.status_code)
+                if lease is not None:
+                    verdict = self._cookie_pool.report(lease, response.status_code, None)
+                    self._metrics.inc("cookie_result", "", verdict)
 
                 if response.status_code != 200:
                     logger.warning(f"[AICU] AI分析请求返回非200状态码: {response.status_code}")
+                    if response.status_code in CHALLENGE_STATUS and "aicu.cc" in url:
+                        self._invalidate_aicu_cf_cookie()
                     return None
 
                 # 解析SSE流式响应
@@ -408,11 +867,12 @@ class AicuAnalysisPlugin(Star):
                 return analysis_result.strip()
 
             except Exception as e:
+                self._metrics.inc("request_status", endpoint_name(url), "exception")
                 logger.error(f"[AICU] AI分析请求异常: {e}")
                 return None
 
     async def _get_bili_video_info(self, aid: str = None, bvid: str = None):
-        """获取B站视频信息"""
+        """获取B站视频信息，结果在各指令间共享缓存"""
         if not aid and not bvid:
             return None
 
@@ -427,19 +887,53 @@ class AicuAnalysisPlugin(Star):
             'Referer': 'https://www.bilibili.com'
         }
 
-        async with AsyncSession() as session:
+        fresh, stale = self._cache_windows("bili_video", self._cache_ttl())
+        return await self._cache.get_or_fetch(
+            ("bili_video", bvid or "", aid or ""), fresh,
+            lambda: self._call_endpoint(
+                "bili_video", lambda url, timeout: self._fetch_bili_video_info(url, params, headers, timeout),
+                hedge=True
+            ),
+            stale=stale
+        )
+
+    async def _fetch_bili_video_info(self, url: str, params: dict, headers: dict, timeout: float):
+        async with self._new_session() as session:
+            endpoint = endpoint_name(url)
             try:
-                response = await session.get(self.BILI_VIDEO_INFO_URL, params=params, headers=headers, timeout=10)
+                with self._metrics.span("request", endpoint):
+                    response = await session.get(url, params=params, headers=headers, timeout=timeout)
+                self._metrics.inc("request_status", endpoint, response.status_code)
                 if response.status_code == 200:
                     data = response.json()
                     if data.get('code') == 0:
                         return data.get('data', {})
             except Exception as e:
+                self._metrics.inc("request_status", endpoint, "exception")
                 logger.warning(f"[AICU] 获取视频信息失败: {e}")
         return None
 
     async def _get_bili_user_profile(self, uid: str):
+        """获取 B 站用户空间信息，结果在各指令间共享缓存"""
+        fresh, stale = self._cache_windows("bili_card", self._cache_ttl())
+        return await self._cache.get_or_fetch(
+            ("bili_card", uid),
+            lambda card: self._negative_ttl() if self._is_missing_user(card) else fresh,
+            lambda: self._fetch_bili_user_profile(uid),
+            # 「用户不存在」只按负结果缓存时间缓存，过期后不再返回旧值
+            stale=lambda card: 0 if self._is_missing_user(card) else stale
+        )
+
+    def _is_missing_user(self, card) -> bool:
+        return bool(card) and card.get("code") in self.BILI_MISSING_USER_CODES
+
+    async def _fetch_bili_user_profile(self, uid: str):
         """直接从 B 站获取用户空间信息（头像/昵称/粉丝等）"""
+        return await self._call_endpoint(
+            "bili_card", lambda url, timeout: self._request_bili_card(url, uid, timeout), hedge=True
+        )
+
+    async def _request_bili_card(self, url: str, uid: str, timeout: float):
         params = {
             "mid": uid,
             "photo": "1",
@@ -451,48 +945,203 @@ class AicuAnalysisPlugin(Star):
         if self.config.get("cookie"):
             headers["cookie"] = self.config.get("cookie")
 
-        async with AsyncSession() as session:
+        endpoint = endpoint_name(url)
+        async with self._new_session() as session:
             try:
-                resp = await session.get(
-                    self.BILI_USER_CARD_URL,
-                    params=params,
-                    headers=headers,
-                    timeout=10,
-                )
+                with self._metrics.span("request", endpoint):
+                    resp = await session.get(
+                        url,
+                        params=params,
+                        headers=headers,
+                        timeout=timeout,
+                    )
+                self._metrics.inc("request_status", endpoint, resp.status_code)
                 if resp.status_code == 200:
                     data = resp.json()
-                    if data.get("code") == 0:
+                    if data.get("code") == 0 or data.get("code") in self.BILI_MISSING_USER_CODES:
+                        # 「用户不存在」也是确定的结果，交给调用方做存在性预检与负缓存
                         return data
                     else:
                         logger.warning(
                             f"[AICU] B站用户卡片接口返回异常 code={data.get('code')}, message={data.get('message')}"
                         )
             except Exception as e:
+                self._metrics.inc("request_status", endpoint, "exception")
                 logger.warning(f"[AICU] 获取 B 站用户空间信息失败: {e}")
         return None
 
+    def _cache_ttl(self) -> float:
+        """上游响应缓存时间（秒），0 表示关闭"""
+        return self.config.get("cache_ttl", self.DEFAULT_CACHE_TTL)
+
+    def _cache_windows(self, endpoint: str, default_ttl: float) -> tuple[float, float]:
+        """
+        接口的 (新鲜时间, 过期可用时间)：新鲜时间内直接返回缓存；
+        之后的过期可用时间内先返回旧值并在后台刷新；共享缓存关闭（新鲜时间为 0）时两者都不生效
+        """
+        fresh = (self.config.get("endpoint_cache_ttl") or {}).get(endpoint)
+        if fresh is None or fresh < 0:
+            fresh = default_ttl  # 未配置或 -1 时沿用全局缓存时间，显式的 0 表示该接口不缓存
+        if not fresh or fresh <= 0:
+            return 0, 0
+        stale = (self.config.get("endpoint_stale_ttl") or {}).get(endpoint)
+        if stale is None:
+            stale = self.DEFAULT_STALE_WINDOWS.get(endpoint, 0)
+        return fresh, stale
+
+    def _negative_ttl(self) -> float:
+        """负结果缓存时间（秒），0 表示关闭"""
+        return self.config.get("negative_cache_ttl", self.DEFAULT_NEGATIVE_CACHE_TTL)
+
+    def _remember_empty(self, kind: str, uid: str, message: str):
+        """记录某个 UID 在某个来源下没有记录，短时间内重复查询直接返回提示"""
+        self._cache.set(("negative", kind, uid), message, self._negative_ttl())
+
+    async def _precheck_uid(self, uid: str, kind: str = None) -> tuple[str | None, asyncio.Future | None]:
+        """
+        在拉取各数据来源之前做廉价预检，返回 (需要直接回复的提示, 预检请求)，提示为 None 表示照常查询：
+        1. 命中负结果缓存（用户近期确认不存在，或该来源近期查过且没有记录）
+        2. B站卡片接口确认用户不存在（优先取缓存；预检超时则照常查询，请求在后台继续并写入缓存）
+        预检请求交给 _identity_sources 作为个人信息来源，关闭缓存时也不会再请求一次卡片接口
+        """
+        for scope in ("user", kind) if kind else ("user",):
+            hit, message = self._cache.get(("negative", scope, uid))
+            if hit:
+                self._metrics.inc("uid_precheck", scope, "negative_cache")
+                return message, None
+
+        if not self.config.get("uid_precheck", True):
+            return None, None
+        probe_timeout = self.config.get("uid_probe_timeout", self.DEFAULT_UID_PROBE_TIMEOUT)
+        probe = asyncio.ensure_future(self._get_bili_user_profile(uid))
+        try:
+            card = await asyncio.wait_for(asyncio.shield(probe), timeout=probe_timeout)
+        except asyncio.TimeoutError:
+            self._metrics.inc("uid_precheck", "", "timeout")
+            return None, probe
+        except Exception:
+            return None, None
+        if self._is_missing_user(card):
+            self._metrics.inc("uid_precheck", "", "missing_user")
+            notice = f"❌ UID: {uid} 对应的B站用户不存在，请检查输入"
+            self._remember_empty("user", uid, notice)
+            return notice, None
+        return None, probe
+
+    async def _gather_sources(self, required: dict, optional: dict = None):
+        """
+        并发执行各数据来源。required 中的主数据等到完成（自身受接口超时约束）；
+        optional 中的辅助数据（个人信息、设备标记、粉丝牌、大航海）最多等到指令截止时间（从调用时起算）。
+        返回 (结果, 未按时返回的来源 -> 仍在后台执行的任务)，缺失来源的结果为 None；
+        后台任务执行完后结果照常写入缓存，也可用于补发更新后的图片。
+        """
+        optional = optional or {}
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + self.config.get("command_deadline", self.DEFAULT_COMMAND_DEADLINE)
+        tasks = {name: asyncio.ensure_future(coro) for name, coro in {**required, **optional}.items()}
+        try:
+            if required:
+                await asyncio.gather(*(tasks[name] for name in required))
+            waiting = [tasks[name] for name in optional if not tasks[name].done()]
+            remaining = deadline_at - loop.time()
+            if waiting and remaining > 0:
+                await asyncio.wait(waiting, timeout=remaining)
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+
+        results, missing = {}, {}
+        for name, task in tasks.items():
+            if task.done():
+                try:
+                    results[name] = task.result()
+                except Exception as e:
+                    logger.warning(f"[AICU] 获取 {name} 失败: {e}")
+                    results[name] = None
+                continue
+            results[name] = None
+            missing[name] = task
+            self._metrics.inc("deadline_missed", name)
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        if missing:
+            logger.info(f"[AICU] 以下数据未在截止时间内返回，先按缺失渲染: {', '.join(missing)}")
+        return results, missing
+
+    def _identity_sources(self, uid: str, probe: asyncio.Future = None) -> dict:
+        """各指令共用的辅助数据：个人信息与设备标记；传入预检请求时直接复用其结果"""
+        return {
+            "profile": probe if probe is not None else self._get_bili_user_profile(uid),
+            "mark": self._fetch_mark_data(uid),
+        }
+
+    def _parse_identity(self, results: dict, uid: str, missing) -> tuple[dict, str, list]:
+        """解析个人信息与设备标记，设备标记未按时返回时显示占位"""
+        profile = self._parse_profile(results.get("profile"), uid)
+        if "mark" in missing:
+            return profile, "加载超时", []
+        device_name, history_names = self._parse_device(results.get("mark"))
+        if not isinstance(history_names, list):
+            history_names = []
+        return profile, device_name, history_names
+
+    def _pending_fields(self, missing, followup: bool) -> dict:
+        """模板中缺失数据提示所需的字段"""
+        return {
+            "missing_sources": [self.SOURCE_NAMES.get(name, name) for name in missing],
+            "followup_pending": followup,
+        }
+
+    def _schedule_followup(self, umo: str, missing: dict, results: dict, build, template_name: str) -> bool:
+        """
+        辅助数据迟到时，在后台等待其返回，用 build(结果, 仍缺失的来源, False) 重新生成渲染数据，
+        补发一张更新后的图片。返回是否会补发。
+        """
+        if not missing or not self.config.get("send_updated_image", True):
+            return False
+
+        async def followup():
+            try:
+                done, _ = await asyncio.wait(missing.values(), timeout=self.DEFAULT_FOLLOWUP_TIMEOUT)
+                arrived = {
+                    name: task.result() for name, task in missing.items()
+                    if task in done and not task.cancelled() and task.exception() is None and task.result() is not None
+                }
+                if not arrived:
+                    return
+                still_missing = [name for name in missing if name not in arrived]
+                img_path = await self._render_image(build({**results, **arrived}, still_missing, False), template_name)
+                names = "、".join(self.SOURCE_NAMES.get(name, name) for name in arrived)
+                await self.context.send_message(
+                    umo, MessageChain().message(f"🔄 {names}已返回，以下为更新后的图片").file_image(img_path)
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[AICU] 补发更新图片失败: {e}")
+
+        task = asyncio.create_task(followup())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return True
+
+    async def _fetch_mark_data(self, uid: str):
+        """获取用户设备与历史昵称标记"""
+        return await self._make_request("mark", {'uid': uid}, cache_ttl=self._cache_ttl())
+
     # ================= 2. 原有评论查询功能 =================
-    async def _fetch_all_data(self, uid: str, page_size: int):
-        """并发获取所有用户数据"""
-        # 个人信息直接走 B 站官方接口，避免依赖已失效的 worker.aicu.cc
-        task_bili = self._get_bili_user_profile(uid)
-        task_mark = self._make_request(self.AICU_MARK_API_URL, {'uid': uid})
-
-        reply_data = await self._make_request(
-            self.AICU_REPLY_API_URL,
-            {'uid': uid, 'pn': "1", 'ps': str(page_size), 'mode': "0", 'keyword': ""}
-        )
+    async def _fetch_reply_data(self, uid: str, page_size: int, keyword: str = "", cache_ttl: float = None):
+        """获取用户评论数据，失败时不带 Cookie 重试一次"""
+        params = {'uid': uid, 'pn': "1", 'ps': str(page_size), 'mode': "0", 'keyword': keyword}
+        reply_data = await self._make_request("reply", params, cache_ttl=cache_ttl)
 
         if not reply_data or not reply_data.get('data'):
             logger.info("[AICU] 评论获取失败，尝试不带 Cookie 重试...")
             reply_data = await self._make_request(
-                self.AICU_REPLY_API_URL,
-                {'uid': uid, 'pn': "1", 'ps': str(page_size), 'mode': "0", 'keyword': ""},
-                cookie_override=""
+                "reply", params, cookie_override="", cache_ttl=cache_ttl
             )
 
-        bili_data, mark_data = await asyncio.gather(task_bili, task_mark)
-        return bili_data, mark_data, reply_data
+        return reply_data
 
     def _parse_profile(self, bili_raw, uid):
         profile = {
@@ -538,7 +1187,7 @@ class AicuAnalysisPlugin(Star):
                 if not isinstance(history_names, list):
                     history_names = []
 
-            elif not self.config.get("cookie"):
+            elif not self._cookie_pool:
                 device_name = "需配置Cookie"
         except Exception as e:
             logger.warning(f"[AICU] 解析设备信息时出错: {e}")
@@ -546,49 +1195,38 @@ class AicuAnalysisPlugin(Star):
 
         return device_name, history_names
 
-    def _parse_replies(self, reply_raw):
-        """解析评论列表"""
-        replies = []
-        if reply_raw and reply_raw.get('code') == 0:
-            data_block = reply_raw.get('data', {})
-            if 'replies' not in data_block and isinstance(data_block.get('data'), dict):
-                data_block = data_block['data']
-            replies = data_block.get('replies', []) or []
-
-        # 确保 replies 是列表
-        if not isinstance(replies, list):
-            replies = []
-
-        formatted_replies = []
-        hours = []
-        lengths = []
-
-        for i, r in enumerate(replies):
-            ts = r.get('time', 0)
-            dt = datetime.fromtimestamp(ts)
-            msg = r.get('message', '')
-            hours.append(dt.strftime("%H"))
-            lengths.append(len(msg))
-            formatted_replies.append({
-                "index": i + 1,
-                "message": msg,
-                "readable_time": dt.strftime('%Y-%m-%d %H:%M'),
-                "rank": r.get('rank', 0),
-                "timestamp": ts
-            })
-
-        hour_counts = Counter(hours)
-        most_common_hour = hour_counts.most_common(1)
-        active_hour = most_common_hour[0][0] if most_common_hour else "N/A"
-        avg_len = round(sum(lengths) / len(lengths), 1) if lengths else 0
-
+    async def _parse(self, kind: str, raw, display_limit: int = None) -> dict:
+        """
+        解析单个来源（reply / danmaku / live / entry），按记录数决定在事件循环、线程池还是子进程中执行；
+        子进程不可用时退回线程池。
+        """
+        if kind == "live" and display_limit is None:
+            display_limit = self.DEFAULT_LIVE_DISPLAY_COUNT
+        kwargs = {"display_limit": display_limit}
+        if kind == "entry":
+            kwargs["default_avatar"] = self.DEFAULT_AVATAR_URL
+
+        placement = self._parse_pool.placement(kind, raw)
+        self._metrics.inc("parse_placement", kind, placement)
+        with self._metrics.span("parse", kind):
+            try:
+                return await self._parse_pool.run(kind, raw, **kwargs)
+            except Exception as e:
+                if placement != "process":
+                    raise
+                logger.warning(f"[AICU] 解析进程池不可用，改用线程池: {e}")
+                self._parse_pool.disable()
+                return await self._parse_pool.run(kind, raw, **kwargs)
+
+    def _distribution_fields(self, stats: dict):
+        """从统计结果中提取模板所需的分布数据"""
         return {
-            "list": formatted_replies,
-            "count": len(formatted_replies),
-            "stats": {
-                "active_hour": active_hour,
-                "avg_length": avg_len
-            }
+            "hour_hist": stats["hour_hist"],
+            "weekday_hist": stats["weekday_hist"],
+            "active_weekday": stats["active_weekday"],
+            "active_days": stats["active_days"],
+            "max_streak": stats["max_streak"],
+            "length_percentiles": stats["length_percentiles"],
         }
 
     async def _generate_ai_analysis(self, replies):
@@ -605,13 +1243,14 @@ class AicuAnalysisPlugin(Star):
             # 构建分析文本
             analysis_text = f"请分析以下用户的评论内容，总结评论特点和发言风格：\n\n"
             for i, reply in enumerate(analysis_replies):
-                analysis_text += f"评论{i+1} ({reply['readable_time']}): {reply['message']}\n"
+                analysis_text += f"评论{i+1} ({fmt_time(reply.timestamp)}): {reply.message}\n"
 
             # 添加分析要求
             analysis_text += "\n请分析：\n1. 评论内容主题和情感倾向\n2. 发言者的兴趣偏好\n3. 语言风格和表达特点\n4. 可能的年龄群体或身份特征\n5. 总体评价"
 
             # 调用AI分析API
-            analysis_result = await self._make_ai_analysis_request(analysis_text)
+            with self._metrics.span("ai_analysis"):
+                analysis_result = await self._make_ai_analysis_request(analysis_text)
 
             return analysis_result
 
@@ -620,215 +1259,71 @@ class AicuAnalysisPlugin(Star):
             return None
 
     # ================= 3. 新增弹幕查询功能 =================
-    async def _fetch_danmaku_data(self, uid: str, page_size: int):
+    async def _fetch_danmaku_data(self, uid: str, page_size: int, keyword: str = "", cache_ttl: float = None):
         """获取用户弹幕数据"""
         return await self._make_request(
-            self.AICU_DANMAKU_API_URL,
-            {'uid': uid, 'pn': "1", 'ps': str(page_size), 'keyword': ""}
+            "danmaku",
+            {'uid': uid, 'pn': "1", 'ps': str(page_size), 'keyword': keyword},
+            cache_ttl=cache_ttl
         )
 
-    def _parse_danmaku(self, danmaku_raw, enable_video_info: bool = True):
-        """解析弹幕数据"""
-        danmaku_list = []
-        if danmaku_raw and danmaku_raw.get('code') == 0:
-            data = danmaku_raw.get('data', {})
-            cursor = data.get('cursor', {})
-            total_count = cursor.get('all_count', 0)
-            items = data.get('videodmlist', [])
-
-            # 统计信息
-            hours = []
-            lengths = []
-            video_ids = []
-
-            for i, item in enumerate(items):
-                ts = item.get('ctime', 0)
-                dt = datetime.fromtimestamp(ts)
-                content = item.get('content', '')
-                oid = item.get('oid', '')  # 视频aid
-                progress = item.get('progress', 0)  # 弹幕时间点(毫秒)
-
-                # 转换为分:秒格式
-                seconds = progress // 1000
-                minutes = seconds // 60
-                remaining_seconds = seconds % 60
-                time_point = f"{minutes}:{remaining_seconds:02d}"
-
-                hours.append(dt.strftime("%H"))
-                lengths.append(len(content))
-                video_ids.append(oid)
-
-                danmaku_list.append({
-                    "index": i + 1,
-                    "content": content,
-                    "readable_time": dt.strftime('%Y-%m-%d %H:%M'),
-                    "video_id": oid,
-                    "time_point": time_point,
-                    "timestamp": ts,
-                    "progress": progress
-                })
-
-            # 统计活跃时段
-            hour_counts = Counter(hours)
-            most_common_hour = hour_counts.most_common(1)
-            active_hour = most_common_hour[0][0] if most_common_hour else "N/A"
-
-            # 统计最活跃的视频
-            video_counts = Counter(video_ids)
-            most_active_video = video_counts.most_common(1)[0][0] if video_counts else None
-
-            avg_length = round(sum(lengths) / len(lengths), 1) if lengths else 0
-
-            return {
-                "list": danmaku_list,
-                "total_count": total_count,
-                "fetched_count": len(danmaku_list),
-                "stats": {
-                    "active_hour": active_hour,
-                    "avg_length": avg_length,
-                    "most_active_video": most_active_video,
-                    "video_count": len(set(video_ids))
-                }
-            }
-
-        return {
-            "list": [],
-            "total_count": 0,
-            "fetched_count": 0,
-            "stats": {
-                "active_hour": "N/A",
-                "avg_length": 0,
-                "most_active_video": None,
-                "video_count": 0
-            }
-        }
-
     # ================= 4. 新增直播弹幕查询功能 =================
-    async def _fetch_live_danmaku_data(self, uid: str, page_size: int):
+    async def _fetch_live_danmaku_data(self, uid: str, page_size: int, keyword: str = "", cache_ttl: float = None):
         """获取用户直播弹幕数据"""
         return await self._make_request(
-            self.AICU_LIVE_DANMAKU_API_URL,
-            {'uid': uid, 'pn': "1", 'ps': str(page_size), 'keyword': ""}
+            "live_danmaku",
+            {'uid': uid, 'pn': "1", 'ps': str(page_size), 'keyword': keyword},
+            cache_ttl=cache_ttl
         )
 
-    def _parse_live_danmaku(self, live_danmaku_raw):
-        """解析直播弹幕数据"""
-        live_list = []
-        if live_danmaku_raw and live_danmaku_raw.get('code') == 0:
-            data = live_danmaku_raw.get('data', {})
-            cursor = data.get('cursor', {})
-            total_count = cursor.get('all_count', 0)
-            items = data.get('list', [])
-
-            # 统计信息
-            hours = []
-            lengths = []
-            room_ids = []
-            anchors = []
-            all_danmaku = []  # 收集所有弹幕用于展示
-
-            for room_info in items:
-                room_data = room_info.get('roominfo', {})
-                danmaku_items = room_info.get('danmu', [])
-
-                room_id = room_data.get('roomid', '')
-                room_name = room_data.get('roomname', '')
-                anchor_name = room_data.get('upname', '')
-                anchor_uid = room_data.get('upuid', '')
-
-                room_ids.append(room_id)
-                anchors.append(anchor_name)
-
-                for i, danmaku in enumerate(danmaku_items):
-                    ts = danmaku.get('ts', 0)
-                    dt = datetime.fromtimestamp(ts)
-                    content = danmaku.get('text', '')
-                    username = danmaku.get('uname', '')
-
-                    hours.append(dt.strftime("%H"))
-                    lengths.append(len(content))
-
-                    all_danmaku.append({
-                        "index": len(all_danmaku) + 1,
-                        "content": content,
-                        "readable_time": dt.strftime('%Y-%m-%d %H:%M'),
-                        "room_id": room_id,
-                        "room_name": room_name[:30] + "..." if len(room_name) > 30 else room_name,
-                        "anchor_name": anchor_name[:15] + "..." if len(anchor_name) > 15 else anchor_name,
-                        "username": username,
-                        "timestamp": ts
-                    })
-
-            # 限制展示数量
-            display_danmaku = all_danmaku[:50]  # 最多显示50条
-
-            # 统计信息
-            hour_counts = Counter(hours)
-            most_common_hour = hour_counts.most_common(1)
-            active_hour = most_common_hour[0][0] if most_common_hour else "N/A"
-
-            room_counts = Counter(room_ids)
-            most_active_room = room_counts.most_common(1)[0][0] if room_counts else None
-
-            anchor_counts = Counter(anchors)
-            most_active_anchor = anchor_counts.most_common(1)[0][0] if anchor_counts else None
-
-            avg_length = round(sum(lengths) / len(lengths), 1) if lengths else 0
-
-            return {
-                "list": display_danmaku,
-                "total_count": total_count,
-                "fetched_count": len(all_danmaku),
-                "stats": {
-                    "active_hour": active_hour,
-                    "avg_length": avg_length,
-                    "most_active_room": most_active_room,
-                    "most_active_anchor": most_active_anchor,
-                    "room_count": len(set(room_ids)),
-                    "anchor_count": len(set(anchors))
-                }
-            }
-
-        return {
-            "list": [],
-            "total_count": 0,
-            "fetched_count": 0,
-            "stats": {
-                "active_hour": "N/A",
-                "avg_length": 0,
-                "most_active_room": None,
-                "most_active_anchor": None,
-                "room_count": 0,
-                "anchor_count": 0
-            }
-        }
-
     # ================= 5. 新增入场信息查询功能 =================
-    async def _fetch_entry_data(self, uid: str, page_num: int = 0, page_size: int = None):
+    async def _fetch_entry_data(self, uid: str, page_num: int = 0, page_size: int = None, cache_ttl: float = None):
         """获取用户入场信息数据"""
         if page_size is None:
             page_size = self.DEFAULT_ENTRY_PAGE_SIZE
 
         return await self._make_request(
-            self.AICU_ENTRY_API_URL,
+            "entry",
             {
                 'uid': uid,
                 'pageSize': str(page_size),
                 'pageNum': str(page_num),
                 'target': ''
             },
-            use_entry_headers=True
+            use_entry_headers=True,
+            cache_ttl=cache_ttl
         )
 
+    def _medal_guard_ttl(self) -> float:
+        return self.config.get("medal_guard_cache_ttl", self.DEFAULT_MEDAL_GUARD_CACHE_TTL)
+
     async def _fetch_medal_data(self, uid: str):
-        """获取用户粉丝牌数据"""
-        url = self.AICU_MEDAL_API_URL.format(uid=uid)
-        return await self._make_request(url, {}, use_entry_headers=True)
+        """获取用户粉丝牌数据，按 UID 长时间缓存"""
+        return await self._make_request(
+            "medal", {}, use_entry_headers=True, cache_ttl=self._medal_guard_ttl(), url_args={"uid": uid}
+        )
 
     async def _fetch_guard_data(self, uid: str):
-        """获取用户大航海数据"""
-        url = self.AICU_GUARD_API_URL.format(uid=uid)
-        return await self._make_request(url, {}, use_entry_headers=True)
+        """获取用户全部大航海数据（所有分页合并），按 UID 长时间缓存"""
+        fresh, stale = self._cache_windows("guard", self._medal_guard_ttl())
+        return await self._cache.get_or_fetch(
+            ("guard_pages", uid), fresh,
+            lambda: self._fetch_guard_pages(uid),
+            stale=stale
+        )
+
+    async def _fetch_guard_page(self, uid: str, page: int):
+        return await self._make_request("guard", {}, use_entry_headers=True, url_args={"uid": uid, "page": page})
+
+    async def _fetch_guard_pages(self, uid: str):
+        """获取全部分页并合并（见 parsers.fetch_guard_pages）"""
+        merged, failed = await fetch_guard_pages(
+            lambda page: self._fetch_guard_page(uid, page),
+            self.config.get("guard_max_pages", self.DEFAULT_GUARD_MAX_PAGES),
+        )
+        for page in failed:
+            logger.warning(f"[AICU] 大航海第 {page} 页获取失败，结果可能不完整")
+        return merged
 
     def _parse_medal_data(self, medal_raw):
         """解析粉丝牌数据"""
@@ -839,33 +1334,20 @@ class AicuAnalysisPlugin(Star):
 
             for medal in medal_list:
                 medal_info = medal.get('medal_info', {})
-                target_name = medal.get('target_name', '')
-
-                # 解析颜色值
-                color_start = medal_info.get('medal_color_start', 0)
-                color_end = medal_info.get('medal_color_end', 0)
-                color_border = medal_info.get('medal_color_border', 0)
-
-                # 转换颜色值为十六进制
-                def int_to_hex(color_int):
-                    if color_int <= 0:
-                        return "#cccccc"
-                    return f"#{color_int:06x}"
-
-                medals.append({
-                    "name": medal_info.get('medal_name', ''),
-                    "level": medal_info.get('level', 0),
-                    "target_name": target_name,
-                    "color_start": int_to_hex(color_start),
-                    "color_end": int_to_hex(color_end),
-                    "color_border": int_to_hex(color_border),
-                    "is_wearing": medal_info.get('wearing_status', 0) == 1,
-                    "guard_level": medal_info.get('guard_level', 0),
-                    "intimacy": medal_info.get('intimacy', 0),
-                    "next_intimacy": medal_info.get('next_intimacy', 0),
-                    "today_feed": medal_info.get('today_feed', 0),
-                    "day_limit": medal_info.get('day_limit', 0)
-                })
+                medals.append(MedalRecord(
+                    name=medal_info.get('medal_name', ''),
+                    level=medal_info.get('level', 0),
+                    target_name=medal.get('target_name', ''),
+                    color_start=medal_info.get('medal_color_start', 0),
+                    color_end=medal_info.get('medal_color_end', 0),
+                    color_border=medal_info.get('medal_color_border', 0),
+                    is_wearing=medal_info.get('wearing_status', 0) == 1,
+                    guard_level=medal_info.get('guard_level', 0),
+                    intimacy=medal_info.get('intimacy', 0),
+                    next_intimacy=medal_info.get('next_intimacy', 0),
+                    today_feed=medal_info.get('today_feed', 0),
+                    day_limit=medal_info.get('day_limit', 0)
+                ))
 
         return medals
 
@@ -875,290 +1357,578 @@ class AicuAnalysisPlugin(Star):
         if guard_raw and guard_raw.get('code') == 0:
             data = guard_raw.get('data', {})
 
-            # 处理 top3 列表
-            top3_list = data.get('top3', [])
-            guard_list = data.get('list', [])
-
             # 合并 top3 和 list
-            all_guards = top3_list + guard_list
+            all_guards = data.get('top3', []) + data.get('list', [])
 
             for guard in all_guards:
-                medal_info = guard.get('medal_info', {})
                 guard_level = guard.get('guard_level', 0)
 
                 # 跳过未开通大航海的项
                 if guard_level == 0:
                     continue
 
-                # 获取舰长等级名称
-                guard_name_map = {
-                    1: "总督",
-                    2: "提督",
-                    3: "舰长"
-                }
-                guard_name = guard_name_map.get(guard_level, "舰长")
-
-                # 解析粉丝牌颜色
-                color_start = medal_info.get('medal_color_start', 0)
-                color_end = medal_info.get('medal_color_end', 0)
-                color_border = medal_info.get('medal_color_border', 0)
-
-                def int_to_hex(color_int):
-                    if color_int <= 0:
-                        return "#cccccc"
-                    return f"#{color_int:06x}"
-
-                guards.append({
-                    "anchor_name": guard.get('username', ''),
-                    "guard_name": guard_name,
-                    "guard_level": guard_level,
-                    "medal_name": medal_info.get('medal_name', ''),
-                    "medal_level": medal_info.get('medal_level', 0),
-                    "color_start": int_to_hex(color_start),
-                    "color_end": int_to_hex(color_end),
-                    "color_border": int_to_hex(color_border),
-                    "accompany_days": guard.get('accompany', 0),
-                    "rank": guard.get('rank', 0)
-                })
+                medal_info = guard.get('medal_info', {})
+                guards.append(GuardRecord(
+                    anchor_name=guard.get('username', ''),
+                    guard_level=guard_level,
+                    medal_name=medal_info.get('medal_name', ''),
+                    medal_level=medal_info.get('medal_level', 0),
+                    color_start=medal_info.get('medal_color_start', 0),
+                    color_end=medal_info.get('medal_color_end', 0),
+                    color_border=medal_info.get('medal_color_border', 0),
+                    accompany_days=guard.get('accompany', 0),
+                    rank=guard.get('rank', 0)
+                ))
 
         # 按舰长等级排序（总督>提督>舰长）
-        guards.sort(key=lambda x: x['guard_level'])
+        guards.sort(key=lambda x: x.guard_level)
 
         return guards
 
-    def _parse_entry(self, entry_raw):
-        """解析入场信息数据"""
-        if not entry_raw or entry_raw.get('code') != 200:
-            return {
-                "list": [],
-                "total": 0,
-                "has_more": False,
-                "page_num": 0,
-                "page_size": 0,
-                "stats": {
-                    "room_count": 0,
-                    "anchor_count": 0,
-                    "total_duration": 0,
-                    "avg_duration": 0
-                }
-            }
+    # ================= 6. 关键词搜索 =================
+    async def _index_search_docs(self, uid: str, docs: list, keyword: str = None):
+        """把抓取到的评论/弹幕写入本地索引（在线程池中执行，避免阻塞事件循环）"""
+        if not docs and not keyword:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self._search_index.add, uid, docs, keyword)
+        except Exception as e:
+            logger.warning(f"[AICU] 写入关键词索引失败: {e}")
 
-        data = entry_raw.get('data', {})
-        total = data.get('total', 0)
-        page_num = data.get('pageNum', 0)
-        page_size = data.get('pageSize', 0)
-        has_more = data.get('hasMore', False)
-
-        records = data.get('data', {}).get('records', [])
-
-        formatted_entries = []
-        room_ids = []
-        anchor_names = []
-        durations = []
-        live_titles = []
-
-        for i, record in enumerate(records):
-            channel = record.get('channel', {})
-            live = record.get('live', {})
-            danmakus = record.get('danmakus', [])
-
-            # 提取主播信息
-            anchor_name = channel.get('uName', '未知主播')
-            anchor_avatar = channel.get('faceUrl', self.DEFAULT_AVATAR_URL)
-            room_id = channel.get('roomId', '')
-            room_title = channel.get('title', '')
-
-            # 主播标签
-            tags = channel.get('tags', [])
-            if not isinstance(tags, list):
-                tags = []
-            tags = tags[:3]  # 只取前3个标签
-
-            # 提取直播信息
-            live_title = live.get('title', '')
-            parent_area = live.get('parentArea', '')
-            area = live.get('area', '')
-
-            # 直播间统计数据
-            watch_count = live.get('watchCount', 0)
-            like_count = live.get('likeCount', 0)
-            total_income = live.get('totalIncome', 0)
-            danmakus_count = live.get('danmakusCount', 0)
-
-            # 主播总数据
-            channel_total_danmaku = channel.get('totalDanmakuCount', 0)
-            channel_total_income = channel.get('totalIncome', 0)
-            channel_total_live = channel.get('totalLiveCount', 0)
-
-            start_date = live.get('startDate', 0)
-            stop_date = live.get('stopDate', 0)
-
-            # 计算直播时长（分钟）
-            duration_minutes = 0
-            if start_date > 0 and stop_date > 0:
-                duration_seconds = (stop_date - start_date) // 1000
-                duration_minutes = duration_seconds // 60
-
-            # 提取入场时间（取第一个弹幕时间）
-            entry_time = 0
-            if danmakus and len(danmakus) > 0:
-                entry_time = danmakus[0].get('sendDate', 0)
-
-            # 转换为可读时间
-            if entry_time > 0:
-                entry_dt = datetime.fromtimestamp(entry_time / 1000)
-                readable_entry_time = entry_dt.strftime('%Y/%m/%d %H:%M:%S')
-                readable_date = entry_dt.strftime('%Y/%m/%d')
-                readable_weekday = ['周一', '周二', '周三', '周四', '周五', '周六', '周日'][entry_dt.weekday()]
-            else:
-                readable_entry_time = "未知时间"
-                readable_date = "未知日期"
-                readable_weekday = "未知"
-
-            # 计算观看时长
-            watch_duration = "N/A"
-            if entry_time > 0 and stop_date > 0:
-                watch_seconds = (stop_date - entry_time) // 1000
-                if watch_seconds > 0:
-                    watch_hours = watch_seconds // 3600
-                    watch_minutes = (watch_seconds % 3600) // 60
-                    watch_duration = f"{watch_hours}h {watch_minutes}m"
-
-            # 收入信息格式化
-            income_str = f"¥{total_income:.1f}" if total_income > 0 else "¥0"
-            channel_income_str = f"¥{channel_total_income:.0f}" if channel_total_income > 0 else "¥0"
-
-            # 观看人数格式化
-            if watch_count >= 10000:
-                watch_count_str = f"{watch_count/10000:.1f}w"
-            else:
-                watch_count_str = str(watch_count)
+    async def _search_keyword(self, uid: str, keyword: str):
+        """
+        关键词搜索：近期已远程查询过的关键词直接查本地索引，
+        否则先用上游的 keyword 过滤并发拉取三类数据写入索引，再统一从索引中检索。
+        返回 (命中文档, 已索引文档数, 是否来自本地索引)
+        """
+        ttl = self.config.get("search_cache_ttl", self.DEFAULT_SEARCH_CACHE_TTL)
+        loop = asyncio.get_running_loop()
+        from_local = await loop.run_in_executor(
+            None, self._search_index.recently_searched, uid, keyword, ttl
+        )
+        self._metrics.inc("search_source", "", "local" if from_local else "remote")
+
+        if not from_local:
+            reply_size = self.config.get("max_reply_count", self.DEFAULT_REPLY_PAGE_SIZE)
+            danmaku_size = self.config.get("max_danmaku_count", self.DEFAULT_DANMAKU_PAGE_SIZE)
+            reply_raw, danmaku_raw, live_raw = await asyncio.gather(
+                self._fetch_reply_data(uid, reply_size, keyword),
+                self._fetch_danmaku_data(uid, danmaku_size, keyword),
+                self._fetch_live_danmaku_data(uid, danmaku_size, keyword),
+            )
+            docs = docs_from_replies(reply_raw) + docs_from_danmaku(danmaku_raw) + docs_from_live_danmaku(live_raw)
+            # 三个来源都失败时不记录关键词，下次仍会重新请求
+            succeeded = any(raw is not None for raw in (reply_raw, danmaku_raw, live_raw))
+            await self._index_search_docs(uid, docs, keyword if succeeded else None)
 
-            # 点赞数格式化
-            if like_count >= 10000:
-                like_count_str = f"{like_count/10000:.1f}w"
-            elif like_count >= 1000:
-                like_count_str = f"{like_count/1000:.1f}k"
-            else:
-                like_count_str = str(like_count)
+        hits, indexed_count = await loop.run_in_executor(None, self._search_index.search, uid, keyword)
+        return hits, indexed_count, from_local
 
-            # 弹幕数格式化
-            if danmakus_count >= 10000:
-                danmakus_count_str = f"{danmakus_count/10000:.1f}w"
-            elif danmakus_count >= 1000:
-                danmakus_count_str = f"{danmakus_count/1000:.1f}k"
-            else:
-                danmakus_count_str = str(danmakus_count)
+    # ================= 7. 批量查询 =================
+    def _extract_uid_list(self, text: str) -> list[str]:
+        """
+        从批量输入中提取 UID 列表，去重并保持输入顺序
+
+        支持空格 / 逗号 / 顿号 / 分号分隔，以及 space.bilibili.com/<UID> 链接
+        """
+        uids = []
+        for token in re.split(r'[\s,，、;；]+', text or ""):
+            link = re.search(r'space\.bilibili\.com/(\d+)', token)
+            uid = link.group(1) if link else self._extract_uid(token)
+            if uid:
+                uids.append(uid)
+        return list(dict.fromkeys(uids))
+
+    async def _fetch_batch_row(self, uid: str, page_size: int):
+        """并发获取单个UID的各项数据，汇总为一行关键统计"""
+        notice, probe = await self._precheck_uid(uid)
+        if notice:
+            return {**self._empty_batch_row(uid), "device_name": "用户不存在"}
+        ttl = self._cache_ttl()
+        results, missing = await self._gather_sources(
+            {
+                "reply": self._fetch_reply_data(uid, page_size, cache_ttl=ttl),
+                "danmaku": self._fetch_danmaku_data(uid, page_size, cache_ttl=ttl),
+                "live": self._fetch_live_danmaku_data(uid, page_size, cache_ttl=ttl),
+                "entry": self._fetch_entry_data(uid, page_size=page_size, cache_ttl=ttl),
+            },
+            self._identity_sources(uid, probe),
+        )
+        reply_raw, danmaku_raw, live_raw, entry_raw = (
+            results["reply"], results["danmaku"], results["live"], results["entry"]
+        )
+        bili_raw = results["profile"]
+
+        reply_docs, danmaku_docs = docs_from_replies(reply_raw), docs_from_danmaku(danmaku_raw)
+        live_docs, entry_docs = docs_from_live_danmaku(live_raw), docs_from_entry(entry_raw)
+        await self._index_search_docs(uid, reply_docs + danmaku_docs + live_docs)
+        await self._index_rooms(uid, live_docs + entry_docs)
+        await self._index_rollups(uid, reply_docs + danmaku_docs + live_docs + entry_docs)
+
+        profile, device_name, _ = self._parse_identity(results, uid, missing)
+        # 批量汇总只需要统计，不构造展示记录
+        reply_data, danmaku_data, live_data, entry_data = await asyncio.gather(
+            self._parse("reply", reply_raw, display_limit=0),
+            self._parse("danmaku", danmaku_raw, display_limit=0),
+            self._parse("live", live_raw, display_limit=0),
+            self._parse("entry", entry_raw, display_limit=0),
+        )
+
+        merged = merge_histograms(
+            [reply_data["stats"], danmaku_data["stats"], live_data["stats"], entry_data["stats"]]
+        )
+
+        return {
+            "uid": uid,
+            "ok": any(raw is not None for raw in (bili_raw, reply_raw, danmaku_raw, live_raw, entry_raw)),
+            "name": profile["name"],
+            "level": profile["level"],
+            "fans": profile["fans"],
+            "device_name": device_name,
+            "reply_count": reply_data["count"],
+            "danmaku_count": danmaku_data["total_count"],
+            "live_count": live_data["total_count"],
+            "entry_count": entry_data["total"],
+            "active_hour": merged["active_hour"],
+            "last_active": merged["last_ts"],
+        }
+
+    def _empty_batch_row(self, uid: str):
+        return {
+            "uid": uid, "ok": False, "name": f"UID:{uid}", "level": 0, "fans": 0,
+            "device_name": "未知设备", "reply_count": 0, "danmaku_count": 0,
+            "live_count": 0, "entry_count": 0, "active_hour": "N/A", "last_active": 0,
+        }
+
+    async def _fetch_batch_rows(self, uids: list[str]):
+        """有界并发地处理所有UID，单个UID失败不影响其它UID"""
+        concurrency = max(1, self.config.get("batch_concurrency", self.DEFAULT_BATCH_CONCURRENCY))
+        page_size = self.config.get("batch_page_size", self.DEFAULT_BATCH_PAGE_SIZE)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(uid: str):
+            async with semaphore:
+                try:
+                    return await self._fetch_batch_row(uid, page_size)
+                except Exception as e:
+                    logger.warning(f"[AICU] 批量查询 UID:{uid} 失败: {e}")
+                    return self._empty_batch_row(uid)
+
+        return await asyncio.gather(*(run(uid) for uid in uids))
+
+    def _write_batch_csv(self, rows: list[dict]) -> str:
+        """批量结果写入 CSV（带 BOM，方便 Excel 直接打开）"""
+        file_path = self.output_dir / f"aicu_batch_{int(time.time())}_{uuid.uuid4().hex[:8]}.csv"
+        with open(file_path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["UID", "昵称", "等级", "粉丝", "设备", "评论数", "视频弹幕", "直播弹幕", "入场记录", "活跃时段", "最近活跃", "状态"])
+            for row in rows:
+                writer.writerow([
+                    row["uid"], row["name"], row["level"], row["fans"], row["device_name"],
+                    row["reply_count"], row["danmaku_count"], row["live_count"], row["entry_count"],
+                    row["active_hour"], fmt_time(row["last_active"], default=""),
+                    "成功" if row["ok"] else "失败",
+                ])
+        return str(file_path)
+
+    # ================= 8. 监控列表 =================
+    def _start_watch_task(self):
+        """启动监控轮询后台任务，需在事件循环中调用"""
+        if self._watch_task is None or self._watch_task.done():
+            self._watch_task = asyncio.get_running_loop().create_task(self._watch_loop())
+
+    async def _watch_loop(self):
+        """
+        按周期轮询所有被监控的UID。
+        同一周期内的UID均匀错开执行，且相邻两次至少间隔 watch_min_gap 秒，
+        每个UID对每个上游站点只发一次请求，从而把请求分散到整个周期。
+        """
+        while True:
+            interval = max(1, self.config.get("watch_interval", self.DEFAULT_WATCH_INTERVAL)) * 60
+            uids = self._watchlist.all_uids()
+            if not uids:
+                await asyncio.sleep(interval)
+                continue
+
+            min_gap = self.config.get("watch_min_gap", self.DEFAULT_WATCH_MIN_GAP)
+            gap = max(interval / len(uids), min_gap)
+            for uid in uids:
+                started = time.monotonic()
+                try:
+                    await self._poll_and_notify(uid)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"[AICU] 监控轮询 UID:{uid} 失败: {e}")
+                await asyncio.sleep(max(0.0, gap - (time.monotonic() - started)))
 
-            # 主播总弹幕数格式化
-            if channel_total_danmaku >= 10000:
-                channel_total_danmaku_str = f"{channel_total_danmaku/10000:.1f}w"
-            elif channel_total_danmaku >= 1000:
-                channel_total_danmaku_str = f"{channel_total_danmaku/1000:.1f}k"
+    async def _poll_watch_uid(self, uid: str):
+        """
+        拉取一次增量，返回 {来源: 新记录列表}（按时间倒序）。
+        每个来源首次成功拉取时只建立游标基线，不产生提醒；某个来源请求失败时保留其原游标。
+        """
+        page_size = self.config.get("watch_page_size", self.DEFAULT_WATCH_PAGE_SIZE)
+        reply_raw, danmaku_raw, live_raw, entry_raw = await asyncio.gather(
+            self._fetch_reply_data(uid, page_size),
+            self._fetch_danmaku_data(uid, page_size),
+            self._fetch_live_danmaku_data(uid, page_size),
+            self._fetch_entry_data(uid, page_size=page_size),
+        )
+
+        sources = {
+            "reply": (reply_raw, docs_from_replies(reply_raw)),
+            "danmaku": (danmaku_raw, docs_from_danmaku(danmaku_raw)),
+            "live": (live_raw, docs_from_live_danmaku(live_raw)),
+            "entry": (entry_raw, docs_from_entry(entry_raw)),
+        }
+        await self._index_search_docs(
+            uid, sources["reply"][1] + sources["danmaku"][1] + sources["live"][1]
+        )
+        await self._index_rooms(uid, sources["live"][1] + sources["entry"][1])
+        await self._index_rollups(uid, [doc for _, docs in sources.values() for doc in docs])
+
+        cursors = self._watchlist.get_cursors(uid)
+        deltas = advance_cursors(cursors, sources)
+        self._watchlist.set_cursors(uid, cursors)
+        return deltas
+
+    def _format_watch_notice(self, uid: str, name: str, deltas: dict, page_size: int) -> str:
+        """组装简短的增量提醒文本"""
+        lines = [f"🔔 监控提醒：{name}（UID:{uid}）"]
+        for kind, title in WATCH_KINDS.items():
+            docs = deltas.get(kind)
+            if not docs:
+                continue
+            count = f"{len(docs)}+" if len(docs) >= page_size else str(len(docs))
+            latest = docs[0]
+            when = fmt_time(latest["ts"], '%m-%d %H:%M')
+            if kind == "entry":
+                detail = f"{latest['meta'].get('anchor_name', '')} 的直播间"
+            elif kind == "live":
+                detail = f"@{latest['meta'].get('anchor_name', '')}：{truncate_text(latest['text'], 30)}"
             else:
-                channel_total_danmaku_str = str(channel_total_danmaku)
-
-            room_ids.append(room_id)
-            anchor_names.append(anchor_name)
-            durations.append(duration_minutes)
-            live_titles.append(live_title)
-
-            formatted_entries.append({
-                "index": i + 1,
-                "anchor_name": anchor_name,
-                "anchor_avatar": anchor_avatar,
-                "room_id": room_id,
-                "room_title": room_title[:50] + "..." if len(room_title) > 50 else room_title,
-                "live_title": live_title[:60] + "..." if len(live_title) > 60 else live_title,
-                "readable_date": readable_date,
-                "readable_weekday": readable_weekday,
-                "readable_entry_time": readable_entry_time,
-                "entry_timestamp": entry_time,
-                "watch_duration": watch_duration,
-                "duration_minutes": duration_minutes,
-                "parent_area": parent_area,
-                "area": area,
-                "tags": tags,
-                "total_income": income_str,
-                "channel_total_income": channel_income_str,
-                "danmakus_count": danmakus_count_str,
-                "channel_total_danmaku": channel_total_danmaku_str,
-                "watch_count": watch_count_str,
-                "like_count": like_count_str,
-                "channel_total_live": channel_total_live,
-                "is_living": channel.get('isLiving', False)
-            })
-
-        # 统计信息
-        room_count = len(set(room_ids))
-        anchor_count = len(set(anchor_names))
-        total_duration = sum(durations)
-        avg_duration = round(total_duration / len(durations), 1) if durations else 0
-
-        # 统计最常观看的主播
-        anchor_counts = Counter(anchor_names)
-        most_active_anchor = anchor_counts.most_common(1)[0][0] if anchor_counts else "N/A"
+                detail = truncate_text(latest["text"], 30)
+            lines.append(f"{title} {count} 条，最新 {when} {detail}")
+        return "\n".join(lines)
+
+    async def _poll_and_notify(self, uid: str):
+        deltas = await self._poll_watch_uid(uid)
+        if not deltas:
+            return
+
+        profile = self._parse_profile(await self._get_bili_user_profile(uid), uid)
+        page_size = self.config.get("watch_page_size", self.DEFAULT_WATCH_PAGE_SIZE)
+        notice = self._format_watch_notice(uid, profile["name"], deltas, page_size)
+        for origin in self._watchlist.subscribers(uid):
+            try:
+                await self.context.send_message(origin, MessageChain().message(notice))
+            except Exception as e:
+                logger.warning(f"[AICU] 推送监控提醒到 {origin} 失败: {e}")
+
+    # ================= 9. 直播间索引 =================
+    async def _index_rooms(self, uid: str, docs: list):
+        """把入场与直播弹幕中出现的直播间写入反向索引（在线程池中执行）"""
+        if not docs:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self._room_index.observe, uid, docs)
+        except Exception as e:
+            logger.warning(f"[AICU] 写入直播间索引失败: {e}")
+
+    def _format_room_report(self, report: dict, limit: int) -> str:
+        anchor = f"（{report['anchor']}）" if report["anchor"] else ""
+        lines = [f"🏠 直播间 {report['room_id']}{anchor}", f"👥 已知观众 {report['viewer_count']} 人"]
+        for uid, first, last in report["viewers"][:limit]:
+            lines.append(f"- UID {uid}：{fmt_time(first)} ~ {fmt_time(last)}")
+        if report["co_visited"]:
+            lines.append("")
+            lines.append("🔗 这些观众还常去的直播间（共同观众数）")
+            for room_id, other_anchor, shared in report["co_visited"][:limit]:
+                lines.append(f"- {room_id} {other_anchor or '未知主播'}：{shared} 人")
+        return "\n".join(lines)
+
+    # ================= 10. 活跃度汇总 =================
+    async def _index_rollups(self, uid: str, docs: list):
+        """把一次抓取到的各来源记录计入活跃度汇总（在线程池中执行）"""
+        if not docs:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self._rollups.add, uid, docs)
+        except Exception as e:
+            logger.warning(f"[AICU] 写入活跃度汇总失败: {e}")
+
+    async def _rollup_snapshot(self, uid: str) -> dict | None:
+        """读取热力图与时间线所需的分桶数据，读取失败时返回 None，模板退回按本页记录统计的分布"""
+        days = self.config.get("rollup_timeline_days", self.DEFAULT_ROLLUP_TIMELINE_DAYS)
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(None, self._rollups.snapshot, uid, days)
+        except Exception as e:
+            logger.warning(f"[AICU] 读取活跃度汇总失败: {e}")
+            return None
 
+    # ================= 11. 双用户对比 =================
+    async def _fetch_compare_side(self, uid: str, probe: asyncio.Future = None) -> dict:
+        """获取对比中一方的全部来源并汇总为足迹；与批量查询一样走共享缓存，重复对比同一用户不会重复请求"""
+        ttl = self._cache_ttl()
+        danmaku_size = self.config.get("max_danmaku_count", self.DEFAULT_DANMAKU_PAGE_SIZE)
+        results, missing = await self._gather_sources(
+            {
+                "reply": self._fetch_reply_data(
+                    uid, self.config.get("max_reply_count", self.DEFAULT_REPLY_PAGE_SIZE), cache_ttl=ttl
+                ),
+                "danmaku": self._fetch_danmaku_data(uid, danmaku_size, cache_ttl=ttl),
+                "live": self._fetch_live_danmaku_data(uid, danmaku_size, cache_ttl=ttl),
+                "entry": self._fetch_entry_data(
+                    uid, page_size=self.config.get("dd_page_size", self.DEFAULT_ENTRY_PAGE_SIZE), cache_ttl=ttl
+                ),
+            },
+            self._identity_sources(uid, probe),
+        )
+        reply_docs = docs_from_replies(results["reply"])
+        danmaku_docs = docs_from_danmaku(results["danmaku"])
+        live_docs = docs_from_live_danmaku(results["live"])
+        entry_docs = docs_from_entry(results["entry"])
+        await self._index_search_docs(uid, reply_docs + danmaku_docs + live_docs)
+        await self._index_rooms(uid, live_docs + entry_docs)
+        docs = reply_docs + danmaku_docs + live_docs + entry_docs
+        await self._index_rollups(uid, docs)
+
+        profile, device_name, _ = self._parse_identity(results, uid, missing)
+        # 足迹统计涉及上千条文档时放到线程中，避免阻塞事件循环
+        summary = await asyncio.to_thread(footprint, docs, None if "mark" in missing else results.get("mark"))
         return {
-            "list": formatted_entries,
-            "total": total,
-            "has_more": has_more,
-            "page_num": page_num,
-            "page_size": page_size,
-            "stats": {
-                "room_count": room_count,
-                "anchor_count": anchor_count,
-                "total_duration": total_duration,
-                "avg_duration": avg_duration,
-                "most_active_anchor": most_active_anchor
-            }
+            "uid": uid,
+            "ok": any(results.get(name) is not None for name in ("profile", "reply", "danmaku", "live", "entry")),
+            "profile": profile,
+            "device_name": device_name,
+            "footprint": summary,
+            "missing": list(missing),
         }
 
-    # ================= 6. 图片渲染 =================
-    async def _render_image(self, render_data, template_name: str = "template.html"):
-        """渲染图片"""
-        template_path = self.plugin_dir / template_name
-        if not template_path.exists():
-            raise FileNotFoundError(f"找不到 {template_name} 文件")
+    def _build_compare_data(self, side_a: dict, side_b: dict) -> dict:
+        top_k = self.config.get("compare_top_count", self.DEFAULT_COMPARE_TOP_COUNT)
+        overlap = compare_footprints(side_a["footprint"], side_b["footprint"], top_k)
+        missing = sorted({
+            f"{side['profile']['name']} 的{self.SOURCE_NAMES.get(name, name)}"
+            for side in (side_a, side_b) for name in side["missing"]
+        })
+        users = [
+            {
+                "uid": side["uid"],
+                "profile": side["profile"],
+                "device_name": side["device_name"],
+                "record_count": side["footprint"]["record_count"],
+                "room_count": len(side["footprint"]["rooms"]),
+                "video_count": len(side["footprint"]["videos"]),
+                "hour_hist": side["footprint"]["hour_hist"],
+            }
+            for side in (side_a, side_b)
+        ]
+        return {
+            "uid": f"{side_a['uid']}_{side_b['uid']}",
+            "users": users,
+            **overlap,
+            "missing_sources": missing,
+            "generate_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            "search_type": "双用户对比",
+        }
 
-        with open(template_path, "r", encoding="utf-8") as f:
-            template_str = f.read()
+    # ================= 12. 运行指标 =================
+    def _format_metrics_report(self) -> str:
+        """汇总各接口状态码、分阶段耗时分位数与缓存命中率"""
+        metrics = self._metrics
+
+        def ms(values):
+            return "/".join(f"{v * 1000:.0f}" for v in values)
+
+        uptime = int(time.time() - metrics.started_at)
+        cache_total = self._cache.hits + self._cache.misses
+        cache_ratio = f"{self._cache.hits / cache_total:.1%}" if cache_total else "N/A"
+        lines = [
+            "📊 AICU 运行状态",
+            f"⏱️ 运行时长：{uptime // 3600}h {(uptime % 3600) // 60}m",
+            f"🗃️ 共享缓存：命中 {self._cache.hits} / 未命中 {self._cache.misses}（命中率 {cache_ratio}）"
+            f"，其中 {self._cache.stale_hits} 次先返回旧值并后台刷新",
+            f"🔎 关键词搜索：本地索引 {metrics.counter('search_source', '', 'local')} 次 / "
+            f"远程查询 {metrics.counter('search_source', '', 'remote')} 次",
+        ]
+
+        rows = metrics.stage_rows()
+        request_rows = [row for row in rows if row[0] == "request"]
+        if request_rows:
+            lines.append("")
+            lines.append("🌐 上游接口（次数 | 成功率 | p50/p95/p99 ms | 状态码）")
+            for _, endpoint, count, quantiles in request_rows:
+                statuses = metrics.counter_values("request_status", endpoint)
+                total = sum(statuses.values())
+                success = f"{statuses.get('200', 0) / total:.0%}" if total else "N/A"
+                codes = " ".join(f"{code}×{n}" for code, n in sorted(statuses.items()))
+                lines.append(f"- {endpoint}：{count} | {success} | {ms(quantiles)} | {codes}")
+
+        stage_rows = [row for row in rows if row[0] != "request"]
+        if stage_rows:
+            lines.append("")
+            lines.append("🧩 处理阶段（次数 | p50/p95/p99 ms）")
+            for stage, label, count, quantiles in stage_rows:
+                name = f"{stage} {label}" if label else stage
+                errors = metrics.counter(f"{stage}_result", label, "error")
+                suffix = f" | 失败 {errors}" if errors else ""
+                lines.append(f"- {name}：{count} | {ms(quantiles)}{suffix}")
+
+        names = self._router.observed_names()
+        if names:
+            lines.append("")
+            lines.append("⏳ 当前超时 / 对冲延迟")
+            for name in names:
+                lines.append(f"- {name}：{self._endpoint_timeout(name):.1f}s / {self._hedge_delay(name):.2f}s")
+
+        missed = [
+            f"{label} {metrics.counter('deadline_missed', name)}"
+            for name, label in self.SOURCE_NAMES.items() if metrics.counter("deadline_missed", name)
+        ]
+        if missed:
+            lines.append("")
+            lines.append(f"⌛ 未在指令截止时间内返回：{'，'.join(missed)}")
+
+        throttled_user, throttled_group = metrics.counter("throttled", "user"), metrics.counter("throttled", "group")
+        if throttled_user or throttled_group:
+            lines.append("")
+            lines.append(
+                f"🚦 限流：发送者 {throttled_user} 次，会话 {throttled_group} 次 | "
+                f"排队中：请求 {self._fetch_scheduler.waiting}，渲染 {self._render_scheduler.waiting}"
+            )
 
-        template = jinja2.Template(template_str)
-        html_content = template.render(**render_data)
+        rendered = metrics.counter_values("render_worker")
+        fallback = metrics.counter("render_worker_fallback")
+        if rendered or fallback:
+            lines.append("")
+            workers = "，".join(f"{name} {n}" for name, n in sorted(rendered.items())) or "无"
+            lines.append(f"🖨️ 渲染进程：{workers} | 回退到插件进程 {fallback} 次")
+
+        if len(self._cookie_pool.leases) > 1:
+            pool = self._cookie_pool.summary()
+            results = metrics.counter_values("cookie_result")
+            lines.append("")
+            lines.append(
+                f"🔑 Cookie 池：可用 {pool['active']} / 冷却 {pool['cooling']} / 已失效 {pool['rejected']} | "
+                f"限流 {results.get('throttled', 0)} 次，鉴权失败 {results.get('rejected', 0)} 次"
+            )
+            lines.append("- 各账号请求数：" + "，".join(f"{label} {n}" for label, n in pool["requests"].items()))
 
-        file_name = f"aicu_{render_data['uid']}_{int(time.time())}.png"
-        file_path = self.output_dir / file_name
+        pages = metrics.counter_values("template_page")
+        if pages:
+            lines.append(
+                f"📄 常驻页面：复用 {pages.get('reused', 0)} 次，新建 {pages.get('created', 0)} 次，"
+                f"回退 {pages.get('fallback', 0)} 次 | 空闲 {self._template_pages.idle_count} 个"
+            )
 
+        if not rows:
+            lines.append("")
+            lines.append("暂无请求记录")
+        return "\n".join(lines)
+
+    # ================= 13. 图片渲染 =================
+    def _get_template(self, template_name: str):
+        """加载并缓存编译后的模板，格式化过滤器在此注册"""
+        template = self._templates.get(template_name)
+        if template is None:
+            template_path = self.plugin_dir / template_name
+            if not template_path.exists():
+                raise FileNotFoundError(f"找不到 {template_name} 文件")
+
+            with open(template_path, "r", encoding="utf-8") as f:
+                template_str = f.read()
+
+            if self._jinja_env is None:
+                jinja2 = _lazy_import("jinja2", self._metrics)
+                self._jinja_env = jinja2.Environment()
+                self._jinja_env.filters.update(TEMPLATE_FILTERS)
+            template = self._jinja_env.from_string(template_str)
+            self._templates[template_name] = template
+        return template
+
+    async def _render_in_worker(self, html: str, viewport: dict, timeout: int, template_name: str, file_path: Path) -> bool:
+        """交给独立渲染进程截图；所有渲染进程都不可用时返回 False，由调用方在插件进程内渲染"""
         try:
-            browser = await self._get_browser()
-            # 入场信息需要更大的高度
-            if template_name == "template_entry.html":
-                viewport = {'width': 750, 'height': 2000}
-            else:
-                viewport = {'width': 600, 'height': 1000}  # 增加高度以适应AI分析
+            with self._metrics.span("worker_render", template_name):
+                png, worker = await self._render_pool.render(html, viewport, timeout)
+        except RenderJobError:
+            raise
+        except Exception as e:
+            logger.warning(f"[AICU] 渲染进程不可用，改为在插件进程内渲染: {e}")
+            self._metrics.inc("render_worker_fallback")
+            return False
+        self._metrics.inc("render_worker", "", worker)
+        await asyncio.to_thread(file_path.write_bytes, png)
+        return True
 
-            # 获取超时配置
-            timeout = self.config.get("browser_timeout", 30) * 1000  # 转换为毫秒
+    async def _render_image(self, render_data, template_name: str = "template.html"):
+        """渲染图片"""
+        template = self._get_template(template_name)
+        with self._metrics.span("template_render", template_name):
+            html_content = template.render(**render_data)
 
-            page = await browser.new_page(viewport=viewport, device_scale_factor=2)
+        # 截止时间后的补发图片常与首张图片落在同一秒，文件名加随机后缀，避免覆盖尚未发送的图片
+        file_name = f"aicu_{render_data['uid']}_{int(time.time())}_{uuid.uuid4().hex[:8]}.png"
+        file_path = self.output_dir / file_name
 
+        # 入场信息需要更大的高度
+        if template_name == "template_entry.html":
+            viewport = {'width': 750, 'height': 2000}
+        elif template_name in ("template_all.html", "template_batch.html", "template_compare.html"):
+            viewport = {'width': 1000, 'height': 1000}
+        else:
+            viewport = {'width': 600, 'height': 1000}  # 增加高度以适应AI分析
+
+        # 获取超时配置
+        timeout = self.config.get("browser_timeout", 30) * 1000  # 转换为毫秒
+
+        # 浏览器截图是最重的共享资源，按会话轮流分配并发槽位
+        async with self._fair_slot(self._render_scheduler, "render"):
+            if self._render_pool.enabled and await self._render_in_worker(
+                html_content, viewport, timeout, template_name, file_path
+            ):
+                return str(file_path)
             try:
-                await page.set_content(html_content, wait_until='networkidle', timeout=timeout)
+                browser = await self._get_browser()
+                if self.config.get("persistent_pages", self.DEFAULT_PERSISTENT_PAGES) > 0:
+                    try:
+                        with self._metrics.span("inject_render", template_name):
+                            reused = await self._template_pages.render(
+                                browser, template_name, html_content, viewport, timeout, str(file_path)
+                            )
+                        self._metrics.inc("template_page", "", "reused" if reused else "created")
+                        return str(file_path)
+                    except Exception as e:
+                        logger.warning(f"[AICU] 常驻页面渲染失败，改为重新加载页面: {e}")
+                        self._metrics.inc("template_page", "", "fallback")
+
+                page = await browser.new_page(
+                    **page_options(viewport, self.config.get("browser_profile", self.DEFAULT_BROWSER_PROFILE))
+                )
+
                 try:
-                    await page.locator(".container").screenshot(path=str(file_path))
-                except Exception as e:
-                    logger.warning(f"局部截图失败，尝试全页截图: {e}")
-                    await page.screenshot(path=str(file_path), full_page=True)
-            finally:
-                await page.close()
-        except Exception as e:
-            logger.error(f"渲染过程发生严重错误: {e}")
-            raise e
+                    with self._metrics.span("set_content", template_name):
+                        await page.set_content(html_content, wait_until='networkidle', timeout=timeout)
+                    with self._metrics.span("screenshot", template_name):
+                        try:
+                            await page.locator(".container").screenshot(path=str(file_path))
+                        except Exception as e:
+                            logger.warning(f"局部截图失败，尝试全页截图: {e}")
+                            await page.screenshot(path=str(file_path), full_page=True)
+                finally:
+                    await page.close()
+            except Exception as e:
+                logger.error(f"渲染过程发生严重错误: {e}")
+                raise e
 
         return str(file_path)
 
-    # ================= 7. 指令入口 =================
+    # ================= 14. 指令入口 =================
     @filter.command("评论")
     async def analyze_uid(self, event: AstrMessageEvent, uid: str):
         """查询 AICU 用户画像 - 支持多种UID格式"""
@@ -1171,48 +1941,70 @@ class AicuAnalysisPlugin(Star):
         # result 现在是提取后的纯数字UID
         extracted_uid = result
 
+        notice = self._throttle(event)
+        if notice:
+            yield event.plain_result(notice)
+            return
+
+        notice, probe = await self._precheck_uid(extracted_uid, "reply")
+        if notice:
+            yield event.plain_result(notice)
+            return
+
         yield event.plain_result(f"🔍 正在获取 UID: {extracted_uid} 的评论数据...")
 
         try:
             # 使用 max_reply_count 配置，如果没有则使用默认值
             page_size = self.config.get("max_reply_count", self.DEFAULT_REPLY_PAGE_SIZE)
-            bili_raw, mark_raw, reply_raw = await self._fetch_all_data(extracted_uid, page_size)
+            results, missing = await self._gather_sources(
+                {"reply": self._fetch_reply_data(extracted_uid, page_size, cache_ttl=self._cache_ttl())},
+                self._identity_sources(extracted_uid, probe),
+            )
+            reply_raw = results["reply"]
 
-            if not bili_raw and not reply_raw:
+            if not results["profile"] and not reply_raw:
                 yield event.plain_result(f"❌ 数据获取失败。请检查配置中的 Cookie 是否正确。")
                 return
 
-            profile = self._parse_profile(bili_raw, extracted_uid)
-            device_name, history_names = self._parse_device(mark_raw)
-
-            # 确保 history_names 是列表且可切片
-            if not history_names:
-                history_names = []
-            elif not isinstance(history_names, list):
-                history_names = []
+            display_count = self.config.get("display_count", self.DEFAULT_DISPLAY_COUNT)
+            reply_data = await self._parse("reply", reply_raw, display_limit=display_count)
+            reply_docs = docs_from_replies(reply_raw)
+            await self._index_search_docs(extracted_uid, reply_docs)
+            await self._index_rollups(extracted_uid, reply_docs)
 
-            reply_data = self._parse_replies(reply_raw)
+            if reply_raw and reply_raw.get("code") == 0 and reply_data["count"] == 0:
+                notice = f"🔍 未找到 UID: {extracted_uid} 的评论记录"
+                self._remember_empty("reply", extracted_uid, notice)
+                yield event.plain_result(notice)
+                return
 
             # 生成AI分析
             ai_analysis = None
             if self.config.get("enable_ai_analysis", False) and reply_data["list"]:
                 ai_analysis = await self._generate_ai_analysis(reply_data["list"])
 
-            render_data = {
-                "uid": extracted_uid,
-                "profile": profile,
-                "device_name": device_name,
-                "history_names": history_names[:10],
-                "total_count": reply_data["count"],
-                "avg_length": reply_data["stats"]["avg_length"],
-                "active_hour": reply_data["stats"]["active_hour"],
-                "replies": reply_data["list"],
-                "ai_analysis": ai_analysis,
-                "enable_ai_analysis": self.config.get("enable_ai_analysis", False),
-                "generate_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
+            def build(results, missing, followup):
+                profile, device_name, history_names = self._parse_identity(results, extracted_uid, missing)
+                return {
+                    "uid": extracted_uid,
+                    "profile": profile,
+                    "device_name": device_name,
+                    "history_names": history_names[:10],
+                    "total_count": reply_data["count"],
+                    "avg_length": reply_data["stats"]["avg_length"],
+                    "active_hour": reply_data["stats"]["active_hour"],
+                    "replies": reply_data["list"],
+                    "ai_analysis": ai_analysis,
+                    "enable_ai_analysis": self.config.get("enable_ai_analysis", False),
+                    "generate_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    **self._distribution_fields(reply_data["stats"]),
+                    **self._pending_fields(missing, followup)
+                }
 
-            img_path = await self._render_image(render_data)
+            followup = self._schedule_followup(
+                event.unified_msg_origin, missing, results, build, "template.html"
+            )
+            img_path = await self._render_image(build(results, missing, followup))
             yield event.image_result(img_path)
 
         except Exception as e:
@@ -1236,55 +2028,67 @@ class AicuAnalysisPlugin(Star):
         # 使用 enable_video_info 配置
         enable_video_info = self.config.get("enable_video_info", True)
 
+        notice = self._throttle(event)
+        if notice:
+            yield event.plain_result(notice)
+            return
+
+        notice, probe = await self._precheck_uid(extracted_uid, "danmaku")
+        if notice:
+            yield event.plain_result(notice)
+            return
+
         yield event.plain_result(f"🔍 正在查询 UID: {extracted_uid} 的弹幕记录...")
 
         try:
-            danmaku_raw = await self._fetch_danmaku_data(extracted_uid, page_size)
+            # 弹幕与个人信息、设备标记并发获取，辅助数据最多等到指令截止时间
+            results, missing = await self._gather_sources(
+                {"danmaku": self._fetch_danmaku_data(extracted_uid, page_size, cache_ttl=self._cache_ttl())},
+                self._identity_sources(extracted_uid, probe),
+            )
+            danmaku_raw = results["danmaku"]
 
             if not danmaku_raw:
                 yield event.plain_result(f"❌ 弹幕数据获取失败。请检查配置中的 Cookie 是否正确。")
                 return
 
-            danmaku_data = self._parse_danmaku(danmaku_raw, enable_video_info)
+            display_count = self.config.get("display_count", self.DEFAULT_DISPLAY_COUNT)
+            danmaku_data = await self._parse("danmaku", danmaku_raw, display_limit=display_count)
+            danmaku_docs = docs_from_danmaku(danmaku_raw)
+            await self._index_search_docs(extracted_uid, danmaku_docs)
+            await self._index_rollups(extracted_uid, danmaku_docs)
 
             if danmaku_data["total_count"] == 0:
-                yield event.plain_result(f"🔍 未找到 UID: {extracted_uid} 的弹幕记录")
+                notice = f"🔍 未找到 UID: {extracted_uid} 的弹幕记录"
+                self._remember_empty("danmaku", extracted_uid, notice)
+                yield event.plain_result(notice)
                 return
 
-            # 获取用户基本信息
-            bili_raw, mark_raw, _ = await asyncio.gather(
-                self._get_bili_user_profile(extracted_uid),
-                self._make_request(self.AICU_MARK_API_URL, {'uid': extracted_uid}),
-                asyncio.sleep(0)
-            )
-
-            profile = self._parse_profile(bili_raw, extracted_uid)
-            device_name, history_names = self._parse_device(mark_raw)
-
-            # 确保 history_names 是列表且可切片
-            if not history_names:
-                history_names = []
-            elif not isinstance(history_names, list):
-                history_names = []
-
-            render_data = {
-                "uid": extracted_uid,
-                "profile": profile,
-                "device_name": device_name,
-                "history_names": history_names[:5],
-                "danmaku_list": danmaku_data["list"],
-                "total_count": danmaku_data["total_count"],
-                "fetched_count": danmaku_data["fetched_count"],
-                "avg_length": danmaku_data["stats"]["avg_length"],
-                "active_hour": danmaku_data["stats"]["active_hour"],
-                "video_count": danmaku_data["stats"]["video_count"],
-                "most_active_video": danmaku_data["stats"]["most_active_video"],
-                "generate_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                "search_type": "弹幕"
-            }
+            def build(results, missing, followup):
+                profile, device_name, history_names = self._parse_identity(results, extracted_uid, missing)
+                return {
+                    "uid": extracted_uid,
+                    "profile": profile,
+                    "device_name": device_name,
+                    "history_names": history_names[:5],
+                    "danmaku_list": danmaku_data["list"],
+                    "total_count": danmaku_data["total_count"],
+                    "fetched_count": danmaku_data["fetched_count"],
+                    "avg_length": danmaku_data["stats"]["avg_length"],
+                    "active_hour": danmaku_data["stats"]["active_hour"],
+                    "video_count": danmaku_data["stats"]["video_count"],
+                    "most_active_video": danmaku_data["stats"]["most_active_video"],
+                    "generate_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    "search_type": "弹幕",
+                    **self._distribution_fields(danmaku_data["stats"]),
+                    **self._pending_fields(missing, followup)
+                }
 
             # 使用弹幕专用模板
-            img_path = await self._render_image(render_data, "template_danmaku.html")
+            followup = self._schedule_followup(
+                event.unified_msg_origin, missing, results, build, "template_danmaku.html"
+            )
+            img_path = await self._render_image(build(results, missing, followup), "template_danmaku.html")
             yield event.image_result(img_path)
 
         except Exception as e:
@@ -1306,57 +2110,69 @@ class AicuAnalysisPlugin(Star):
         # 使用 max_danmaku_count 配置
         page_size = self.config.get("max_danmaku_count", self.DEFAULT_DANMAKU_PAGE_SIZE)
 
+        notice = self._throttle(event)
+        if notice:
+            yield event.plain_result(notice)
+            return
+
+        notice, probe = await self._precheck_uid(extracted_uid, "live")
+        if notice:
+            yield event.plain_result(notice)
+            return
+
         yield event.plain_result(f"🔍 正在查询 UID: {extracted_uid} 的直播弹幕记录...")
 
         try:
-            live_danmaku_raw = await self._fetch_live_danmaku_data(extracted_uid, page_size)
+            # 直播弹幕与个人信息、设备标记并发获取，辅助数据最多等到指令截止时间
+            results, missing = await self._gather_sources(
+                {"live": self._fetch_live_danmaku_data(extracted_uid, page_size, cache_ttl=self._cache_ttl())},
+                self._identity_sources(extracted_uid, probe),
+            )
+            live_danmaku_raw = results["live"]
 
             if not live_danmaku_raw:
                 yield event.plain_result(f"❌ 直播弹幕数据获取失败。请检查配置中的 Cookie 是否正确。")
                 return
 
-            live_data = self._parse_live_danmaku(live_danmaku_raw)
+            live_data = await self._parse("live", live_danmaku_raw)
+            live_docs = docs_from_live_danmaku(live_danmaku_raw)
+            await self._index_search_docs(extracted_uid, live_docs)
+            await self._index_rooms(extracted_uid, live_docs)
+            await self._index_rollups(extracted_uid, live_docs)
 
             if live_data["total_count"] == 0:
-                yield event.plain_result(f"🔍 未找到 UID: {extracted_uid} 的直播弹幕记录")
+                notice = f"🔍 未找到 UID: {extracted_uid} 的直播弹幕记录"
+                self._remember_empty("live", extracted_uid, notice)
+                yield event.plain_result(notice)
                 return
 
-            # 获取用户基本信息
-            bili_raw, mark_raw, _ = await asyncio.gather(
-                self._get_bili_user_profile(extracted_uid),
-                self._make_request(self.AICU_MARK_API_URL, {'uid': extracted_uid}),
-                asyncio.sleep(0)
-            )
-
-            profile = self._parse_profile(bili_raw, extracted_uid)
-            device_name, history_names = self._parse_device(mark_raw)
-
-            # 确保 history_names 是列表且可切片
-            if not history_names:
-                history_names = []
-            elif not isinstance(history_names, list):
-                history_names = []
-
-            render_data = {
-                "uid": extracted_uid,
-                "profile": profile,
-                "device_name": device_name,
-                "history_names": history_names[:5],
-                "live_list": live_data["list"],
-                "total_count": live_data["total_count"],
-                "fetched_count": live_data["fetched_count"],
-                "avg_length": live_data["stats"]["avg_length"],
-                "active_hour": live_data["stats"]["active_hour"],
-                "room_count": live_data["stats"]["room_count"],
-                "anchor_count": live_data["stats"]["anchor_count"],
-                "most_active_room": live_data["stats"]["most_active_room"],
-                "most_active_anchor": live_data["stats"]["most_active_anchor"],
-                "generate_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                "search_type": "直播弹幕"
-            }
+            def build(results, missing, followup):
+                profile, device_name, history_names = self._parse_identity(results, extracted_uid, missing)
+                return {
+                    "uid": extracted_uid,
+                    "profile": profile,
+                    "device_name": device_name,
+                    "history_names": history_names[:5],
+                    "live_list": live_data["list"],
+                    "total_count": live_data["total_count"],
+                    "fetched_count": live_data["fetched_count"],
+                    "avg_length": live_data["stats"]["avg_length"],
+                    "active_hour": live_data["stats"]["active_hour"],
+                    "room_count": live_data["stats"]["room_count"],
+                    "anchor_count": live_data["stats"]["anchor_count"],
+                    "most_active_room": live_data["stats"]["most_active_room"],
+                    "most_active_anchor": live_data["stats"]["most_active_anchor"],
+                    "generate_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    "search_type": "直播弹幕",
+                    **self._distribution_fields(live_data["stats"]),
+                    **self._pending_fields(missing, followup)
+                }
 
             # 使用直播弹幕专用模板
-            img_path = await self._render_image(render_data, "template_live.html")
+            followup = self._schedule_followup(
+                event.unified_msg_origin, missing, results, build, "template_live.html"
+            )
+            img_path = await self._render_image(build(results, missing, followup), "template_live.html")
             yield event.image_result(img_path)
 
         except Exception as e:
@@ -1378,69 +2194,477 @@ class AicuAnalysisPlugin(Star):
         # 使用 dd_page_size 配置
         page_size = self.config.get("dd_page_size", self.DEFAULT_ENTRY_PAGE_SIZE)
 
+        notice = self._throttle(event)
+        if notice:
+            yield event.plain_result(notice)
+            return
+
+        notice, probe = await self._precheck_uid(extracted_uid, "entry")
+        if notice:
+            yield event.plain_result(notice)
+            return
+
         yield event.plain_result(f"🔍 正在查询 UID: {extracted_uid} 的入场记录...")
 
         try:
-            # 并发获取所有数据
-            tasks = [
-                self._fetch_entry_data(extracted_uid, page_size=page_size),
-                self._get_bili_user_profile(extracted_uid),
-                self._make_request(self.AICU_MARK_API_URL, {'uid': extracted_uid}),
-                self._fetch_medal_data(extracted_uid),
-                self._fetch_guard_data(extracted_uid)
-            ]
-
-            entry_raw, bili_raw, mark_raw, medal_raw, guard_raw = await asyncio.gather(*tasks)
+            # 并发获取所有数据：入场记录为主数据，其余为辅助数据，最多等到指令截止时间
+            results, missing = await self._gather_sources(
+                {"entry": self._fetch_entry_data(extracted_uid, page_size=page_size, cache_ttl=self._cache_ttl())},
+                {
+                    **self._identity_sources(extracted_uid, probe),
+                    "medal": self._fetch_medal_data(extracted_uid),
+                    "guard": self._fetch_guard_data(extracted_uid),
+                },
+            )
+            entry_raw = results["entry"]
 
             if not entry_raw:
                 yield event.plain_result(f"❌ 入场信息获取失败。请检查网络连接或API是否可用。")
                 return
 
-            entry_data = self._parse_entry(entry_raw)
+            entry_data = await self._parse("entry", entry_raw)
+            entry_docs = docs_from_entry(entry_raw)
+            await self._index_rooms(extracted_uid, entry_docs)
+            await self._index_rollups(extracted_uid, entry_docs)
 
             if entry_data["total"] == 0:
-                yield event.plain_result(f"🔍 未找到 UID: {extracted_uid} 的入场记录")
+                notice = f"🔍 未找到 UID: {extracted_uid} 的入场记录"
+                self._remember_empty("entry", extracted_uid, notice)
+                yield event.plain_result(notice)
                 return
 
-            profile = self._parse_profile(bili_raw, extracted_uid)
-            device_name, history_names = self._parse_device(mark_raw)
-            medals = self._parse_medal_data(medal_raw)
-            guards = self._parse_guard_data(guard_raw)
+            def build(results, missing, followup):
+                profile, device_name, history_names = self._parse_identity(results, extracted_uid, missing)
+                medals = self._parse_medal_data(results["medal"])
+                guards = self._parse_guard_data(results["guard"])
+                return {
+                    "uid": extracted_uid,
+                    "profile": profile,
+                    "device_name": device_name,
+                    "history_names": history_names[:5],
+                    "medals": medals[:10],  # 最多显示10个粉丝牌
+                    "guards": guards[:5],   # 最多显示5个大航海
+                    "entry_list": entry_data["list"],
+                    "total_count": entry_data["total"],
+                    "fetched_count": len(entry_data["list"]),
+                    "has_more": entry_data["has_more"],
+                    "page_num": entry_data["page_num"] + 1,  # 转换为1-based
+                    "page_size": entry_data["page_size"],
+                    "room_count": entry_data["stats"]["room_count"],
+                    "anchor_count": entry_data["stats"]["anchor_count"],
+                    "avg_duration": entry_data["stats"]["avg_duration"],
+                    "most_active_anchor": entry_data["stats"]["most_active_anchor"],
+                    "generate_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    "search_type": "入场记录",
+                    **self._distribution_fields(entry_data["stats"]),
+                    **self._pending_fields(missing, followup)
+                }
+
+            # 使用入场信息专用模板
+            followup = self._schedule_followup(
+                event.unified_msg_origin, missing, results, build, "template_entry.html"
+            )
+            img_path = await self._render_image(build(results, missing, followup), "template_entry.html")
+            yield event.image_result(img_path)
+
+        except Exception as e:
+            logger.error(f"入场记录查询失败: {e}", exc_info=True)
+            yield event.plain_result(f"❌ 入场记录查询错误，请查看后台日志。")
+
+    @filter.command("搜索")
+    async def search_keyword(self, event: AstrMessageEvent, uid: str, keyword: str = ""):
+        """在用户的评论与弹幕中搜索关键词 - 支持多种UID格式"""
+        # 验证并提取UID
+        valid, result = self._validate_uid(uid)
+        if not valid:
+            yield event.plain_result(result)
+            return
+
+        # result 现在是提取后的纯数字UID
+        extracted_uid = result
 
-            # 确保 history_names 是列表且可切片
-            if not history_names:
-                history_names = []
-            elif not isinstance(history_names, list):
-                history_names = []
+        # 指令参数按空格切分，只会拿到关键词的第一个词；从原始消息取 UID 之后的全部内容
+        parts = re.sub(r'^\s*/?搜索', '', event.message_str or "").split(None, 1)
+        if len(parts) > 1:
+            keyword = parts[1]
+        keyword = (keyword or "").strip()
+        if not keyword:
+            yield event.plain_result("❌ 请输入要搜索的关键词，例如：/搜索 123456789 关键词")
+            return
 
+        notice = self._throttle(event)
+        if notice:
+            yield event.plain_result(notice)
+            return
+
+        notice, probe = await self._precheck_uid(extracted_uid)
+        if notice:
+            yield event.plain_result(notice)
+            return
+
+        yield event.plain_result(f"🔍 正在搜索 UID: {extracted_uid} 的「{keyword}」相关记录...")
+
+        try:
+            start = time.perf_counter()
+            (hits, indexed_count, from_local), bili_raw = await asyncio.gather(
+                self._search_keyword(extracted_uid, keyword),
+                probe if probe is not None else self._get_bili_user_profile(extracted_uid),
+            )
+            elapsed_ms = round((time.perf_counter() - start) * 1000)
+
+            if not hits:
+                yield event.plain_result(
+                    f"🔍 未找到 UID: {extracted_uid} 包含「{keyword}」的记录（已索引 {indexed_count} 条）"
+                )
+                return
+
+            kind_counts = {name: 0 for name in KIND_NAMES.values()}
+            for doc in hits:
+                kind_counts[KIND_NAMES[doc["kind"]]] += 1
+
+            display_count = self.DEFAULT_SEARCH_DISPLAY_COUNT
             render_data = {
                 "uid": extracted_uid,
-                "profile": profile,
-                "device_name": device_name,
-                "history_names": history_names[:5],
-                "medals": medals[:10],  # 最多显示10个粉丝牌
-                "guards": guards[:5],   # 最多显示5个大航海
-                "entry_list": entry_data["list"],
-                "total_count": entry_data["total"],
-                "fetched_count": len(entry_data["list"]),
-                "has_more": entry_data["has_more"],
-                "page_num": entry_data["page_num"] + 1,  # 转换为1-based
-                "page_size": entry_data["page_size"],
-                "room_count": entry_data["stats"]["room_count"],
-                "anchor_count": entry_data["stats"]["anchor_count"],
-                "avg_duration": entry_data["stats"]["avg_duration"],
-                "most_active_anchor": entry_data["stats"]["most_active_anchor"],
+                "profile": self._parse_profile(bili_raw, extracted_uid),
+                "keyword": keyword,
+                "hits": hits[:display_count],
+                "kind_names": KIND_NAMES,
+                "kind_counts": kind_counts,
+                "total_count": len(hits),
+                "fetched_count": min(len(hits), display_count),
+                "indexed_count": indexed_count,
+                "from_local": from_local,
+                "elapsed_ms": elapsed_ms,
                 "generate_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                "search_type": "入场记录"
+                "search_type": "关键词搜索"
             }
 
-            # 使用入场信息专用模板
-            img_path = await self._render_image(render_data, "template_entry.html")
+            img_path = await self._render_image(render_data, "template_search.html")
             yield event.image_result(img_path)
 
         except Exception as e:
-            logger.error(f"入场记录查询失败: {e}", exc_info=True)
-            yield event.plain_result(f"❌ 入场记录查询错误，请查看后台日志。")
+            logger.error(f"关键词搜索失败: {e}", exc_info=True)
+            yield event.plain_result(f"❌ 关键词搜索错误，请查看后台日志。")
+
+    @filter.command("全部")
+    async def analyze_all(self, event: AstrMessageEvent, uid: str):
+        """一次查询用户的评论、弹幕、直播弹幕、入场、粉丝牌与大航海，生成综合报告"""
+        # 验证并提取UID
+        valid, result = self._validate_uid(uid)
+        if not valid:
+            yield event.plain_result(result)
+            return
+
+        # result 现在是提取后的纯数字UID
+        extracted_uid = result
+
+        reply_size = self.config.get("max_reply_count", self.DEFAULT_REPLY_PAGE_SIZE)
+        danmaku_size = self.config.get("max_danmaku_count", self.DEFAULT_DANMAKU_PAGE_SIZE)
+        entry_size = self.config.get("dd_page_size", self.DEFAULT_ENTRY_PAGE_SIZE)
+        section_count = self.DEFAULT_REPORT_SECTION_COUNT
+        ttl = self._cache_ttl()
+
+        notice = self._throttle(event)
+        if notice:
+            yield event.plain_result(notice)
+            return
+
+        notice, probe = await self._precheck_uid(extracted_uid, "all")
+        if notice:
+            yield event.plain_result(notice)
+            return
+
+        yield event.plain_result(f"🔍 正在生成 UID: {extracted_uid} 的综合报告...")
+
+        try:
+            # 一次并发拉取全部来源，个人信息与设备标记只请求一次；辅助数据最多等到指令截止时间
+            results, missing = await self._gather_sources(
+                {
+                    "reply": self._fetch_reply_data(extracted_uid, reply_size, cache_ttl=ttl),
+                    "danmaku": self._fetch_danmaku_data(extracted_uid, danmaku_size, cache_ttl=ttl),
+                    "live": self._fetch_live_danmaku_data(extracted_uid, danmaku_size, cache_ttl=ttl),
+                    "entry": self._fetch_entry_data(extracted_uid, page_size=entry_size, cache_ttl=ttl),
+                },
+                {
+                    **self._identity_sources(extracted_uid, probe),
+                    "medal": self._fetch_medal_data(extracted_uid),
+                    "guard": self._fetch_guard_data(extracted_uid),
+                },
+            )
+            reply_raw, danmaku_raw, live_raw, entry_raw = (
+                results["reply"], results["danmaku"], results["live"], results["entry"]
+            )
+
+            if not any((results["profile"], reply_raw, danmaku_raw, live_raw, entry_raw)):
+                yield event.plain_result(f"❌ 数据获取失败。请检查配置中的 Cookie 是否正确。")
+                return
+
+            reply_docs, danmaku_docs = docs_from_replies(reply_raw), docs_from_danmaku(danmaku_raw)
+            live_docs, entry_docs = docs_from_live_danmaku(live_raw), docs_from_entry(entry_raw)
+            await self._index_search_docs(extracted_uid, reply_docs + danmaku_docs + live_docs)
+            await self._index_rooms(extracted_uid, live_docs + entry_docs)
+            await self._index_rollups(extracted_uid, reply_docs + danmaku_docs + live_docs + entry_docs)
+            rollup = await self._rollup_snapshot(extracted_uid)
+
+            # 四个来源互不依赖，开启进程池时可并行占用多核
+            reply_data, danmaku_data, live_data, entry_data = await asyncio.gather(
+                self._parse("reply", reply_raw, display_limit=section_count),
+                self._parse("danmaku", danmaku_raw, display_limit=section_count),
+                self._parse("live", live_raw, display_limit=section_count),
+                self._parse("entry", entry_raw, display_limit=section_count),
+            )
+
+            merged = merge_histograms(
+                [reply_data["stats"], danmaku_data["stats"], live_data["stats"], entry_data["stats"]]
+            )
+
+            # 四个来源都成功返回且都没有记录时才按负结果缓存，部分来源失败不算
+            fetched = all(raw and raw.get("code") == 0 for raw in (reply_raw, danmaku_raw, live_raw)) and (
+                bool(entry_raw) and entry_raw.get("code") == 200
+            )
+            counts = (reply_data["count"], danmaku_data["total_count"], live_data["total_count"], entry_data["total"])
+            if fetched and not any(counts):
+                notice = f"🔍 未找到 UID: {extracted_uid} 的任何记录"
+                self._remember_empty("all", extracted_uid, notice)
+                yield event.plain_result(notice)
+                return
+
+            def build(results, missing, followup):
+                profile, device_name, history_names = self._parse_identity(results, extracted_uid, missing)
+                medals = self._parse_medal_data(results["medal"])
+                guards = self._parse_guard_data(results["guard"])
+                return {
+                    "uid": extracted_uid,
+                    "profile": profile,
+                    "device_name": device_name,
+                    "history_names": history_names[:5],
+                    "medals": medals[:10],
+                    "guards": guards[:5],
+                    "replies": reply_data,
+                    "danmaku": danmaku_data,
+                    "live": live_data,
+                    "entry": entry_data,
+                    "hour_hist": merged["hour_hist"],
+                    "weekday_hist": merged["weekday_hist"],
+                    "active_hour": merged["active_hour"],
+                    "active_weekday": merged["active_weekday"],
+                    "last_active": merged["last_ts"],
+                    "rollup": rollup,
+                    "generate_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    "search_type": "综合报告",
+                    **self._pending_fields(missing, followup)
+                }
+
+            followup = self._schedule_followup(
+                event.unified_msg_origin, missing, results, build, "template_all.html"
+            )
+            img_path = await self._render_image(build(results, missing, followup), "template_all.html")
+            yield event.image_result(img_path)
+
+        except Exception as e:
+            logger.error(f"综合报告生成失败: {e}", exc_info=True)
+            yield event.plain_result(f"❌ 综合报告生成错误，请查看后台日志。")
+
+    @filter.command("批量")
+    async def batch_query(self, event: AstrMessageEvent):
+        """批量查询多个UID的关键统计 - 空格/逗号分隔或空间链接，末尾加 csv 输出表格文件"""
+        text = re.sub(r'^\s*/?批量', '', event.message_str or "")
+        as_csv = bool(re.search(r'(^|\s)csv(\s|$)', text, re.IGNORECASE))
+        uids = self._extract_uid_list(text)
+
+        if not uids:
+            yield event.plain_result("❌ 请输入要查询的UID，例如：/批量 123456 789012 或 /批量 csv 123456,789012")
+            return
+
+        max_uids = self.config.get("batch_max_uids", self.DEFAULT_BATCH_MAX_UIDS)
+        if len(uids) > max_uids:
+            yield event.plain_result(f"⚠️ 单次最多查询 {max_uids} 个UID，已忽略后 {len(uids) - max_uids} 个")
+            uids = uids[:max_uids]
+
+        # 批量查询按UID数扣除令牌（最多扣满一个桶）
+        notice = self._throttle(event, cost=len(uids))
+        if notice:
+            yield event.plain_result(notice)
+            return
+
+        yield event.plain_result(f"🔍 正在批量查询 {len(uids)} 个UID...")
+
+        try:
+            start = time.perf_counter()
+            rows = await self._fetch_batch_rows(uids)
+            elapsed = round(time.perf_counter() - start, 1)
+
+            if as_csv:
+                file_path = self._write_batch_csv(rows)
+                yield event.chain_result([Comp.File(name=Path(file_path).name, file=file_path)])
+                return
+
+            render_data = {
+                "uid": "batch",
+                "rows": rows,
+                "total_count": len(rows),
+                "ok_count": sum(1 for row in rows if row["ok"]),
+                "elapsed": elapsed,
+                "generate_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                "search_type": "批量查询"
+            }
+
+            img_path = await self._render_image(render_data, "template_batch.html")
+            yield event.image_result(img_path)
+
+        except Exception as e:
+            logger.error(f"批量查询失败: {e}", exc_info=True)
+            yield event.plain_result(f"❌ 批量查询错误，请查看后台日志。")
+
+    @filter.command("监控")
+    async def manage_watchlist(self, event: AstrMessageEvent, action: str = "列表", uid: str = ""):
+        """管理当前会话的监控列表：/监控 添加|删除 <UID>，/监控 列表"""
+        self._start_watch_task()
+        origin = event.unified_msg_origin
+
+        if action in ("列表", "list"):
+            uids = self._watchlist.uids_of(origin)
+            if not uids:
+                yield event.plain_result("📋 当前会话没有监控任何UID，使用 /监控 添加 <UID> 添加")
+                return
+            interval = self.config.get("watch_interval", self.DEFAULT_WATCH_INTERVAL)
+            yield event.plain_result(
+                f"📋 当前会话监控中的UID（每 {interval} 分钟轮询）：\n" + "\n".join(uids)
+            )
+            return
+
+        if action not in ("添加", "add", "删除", "remove"):
+            yield event.plain_result("❌ 用法：/监控 添加 <UID> | /监控 删除 <UID> | /监控 列表")
+            return
+
+        valid, result = self._validate_uid(uid)
+        if not valid:
+            yield event.plain_result(result)
+            return
+        extracted_uid = result
+
+        if action in ("删除", "remove"):
+            if self._watchlist.remove(origin, extracted_uid):
+                yield event.plain_result(f"✅ 已取消监控 UID: {extracted_uid}")
+            else:
+                yield event.plain_result(f"❌ 当前会话没有监控 UID: {extracted_uid}")
+            return
+
+        notice = self._throttle(event)
+        if notice:
+            yield event.plain_result(notice)
+            return
+
+        notice, _ = await self._precheck_uid(extracted_uid)
+        if notice:
+            yield event.plain_result(notice)
+            return
+
+        max_uids = self.config.get("watch_max_per_group", self.DEFAULT_WATCH_MAX_PER_GROUP)
+        if len(self._watchlist.uids_of(origin)) >= max_uids:
+            yield event.plain_result(f"❌ 每个会话最多监控 {max_uids} 个UID，请先删除不需要的UID")
+            return
+
+        if not self._watchlist.add(origin, extracted_uid):
+            yield event.plain_result(f"ℹ️ UID: {extracted_uid} 已在监控列表中")
+            return
+
+        # 立即建立游标基线，之后的轮询只提醒新增记录
+        try:
+            if not self._watchlist.get_cursors(extracted_uid):
+                await self._poll_watch_uid(extracted_uid)
+        except Exception as e:
+            logger.warning(f"[AICU] 建立监控基线失败 UID:{extracted_uid}: {e}")
+
+        interval = self.config.get("watch_interval", self.DEFAULT_WATCH_INTERVAL)
+        yield event.plain_result(
+            f"✅ 已开始监控 UID: {extracted_uid}，每 {interval} 分钟检查一次新评论、弹幕和入场记录"
+        )
+
+    @filter.command("对比")
+    async def compare_users(self, event: AstrMessageEvent, uid_a: str, uid_b: str):
+        """对比两个用户的直播间、主播、视频、作息与设备重合情况 - /对比 <UID1> <UID2>"""
+        uids = []
+        for uid in (uid_a, uid_b):
+            valid, result = self._validate_uid(uid)
+            if not valid:
+                yield event.plain_result(result)
+                return
+            uids.append(result)
+        if uids[0] == uids[1]:
+            yield event.plain_result("❌ 请提供两个不同的UID")
+            return
+
+        notice = self._throttle(event, cost=2)
+        if notice:
+            yield event.plain_result(notice)
+            return
+
+        probes = []
+        for uid in uids:
+            notice, probe = await self._precheck_uid(uid)
+            if notice:
+                yield event.plain_result(notice)
+                return
+            probes.append(probe)
+
+        yield event.plain_result(f"🔍 正在对比 UID: {uids[0]} 与 UID: {uids[1]}...")
+
+        try:
+            # 两个用户的全部来源一次并发拉取
+            side_a, side_b = await asyncio.gather(
+                *(self._fetch_compare_side(uid, probe) for uid, probe in zip(uids, probes))
+            )
+            failed = [side["uid"] for side in (side_a, side_b) if not side["ok"]]
+            if failed:
+                yield event.plain_result(f"❌ UID: {'、'.join(failed)} 的数据获取失败。请检查配置中的 Cookie 是否正确。")
+                return
+
+            img_path = await self._render_image(self._build_compare_data(side_a, side_b), "template_compare.html")
+            yield event.image_result(img_path)
+
+        except Exception as e:
+            logger.error(f"双用户对比失败: {e}", exc_info=True)
+            yield event.plain_result(f"❌ 双用户对比生成错误，请查看后台日志。")
+
+    @filter.command("房间")
+    async def show_room(self, event: AstrMessageEvent, room: str = ""):
+        """查看直播间的已知观众与共同访问的直播间，只查本地索引，不请求上游"""
+        room = room.strip()
+        if not room:
+            yield event.plain_result("❌ 用法：/房间 <直播间号或主播名>")
+            return
+
+        loop = asyncio.get_running_loop()
+        matches = await loop.run_in_executor(None, self._room_index.find_rooms, room)
+        if not matches:
+            yield event.plain_result(
+                f"🔍 本地索引中没有直播间 {room} 的记录（索引来自 /入场、/直播弹幕、/全部、/批量 查询与监控轮询）"
+            )
+            return
+        if len(matches) > 1:
+            yield event.plain_result(
+                f"🔍 找到 {len(matches)} 个匹配的直播间，请用直播间号查询：\n"
+                + "\n".join(f"- {room_id} {anchor}" for room_id, anchor in matches[:20])
+            )
+            return
+
+        limit = self.config.get("room_report_count", self.DEFAULT_ROOM_REPORT_COUNT)
+        report = await loop.run_in_executor(None, self._room_index.room_report, matches[0][0], limit)
+        yield event.plain_result(self._format_room_report(report, limit))
+
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    @filter.command("aicu状态")
+    async def show_metrics(self, event: AstrMessageEvent):
+        """查看插件运行指标（管理员）"""
+        report = self._format_metrics_report()
+        if self._metrics.export_path:
+            try:
+                self._metrics.export()
+                report += f"\n\n📁 Prometheus 指标已写入：{self._metrics.export_path}"
+            except OSError as e:
+                logger.warning(f"[AICU] 写入 Prometheus 指标文件失败: {e}")
+        yield event.plain_result(report)
 
     @filter.command("b站帮助")
     async def show_help(self, event: AstrMessageEvent):
@@ -1470,6 +2694,41 @@ class AicuAnalysisPlugin(Star):
 📋 说明：查询用户的直播间入场记录、粉丝牌和大航海信息
 💡 示例：/入场 123456789
 
+5️⃣ 关键词搜索
+📝 命令：/搜索 <UID> <关键词>
+📋 说明：在用户的评论、视频弹幕和直播弹幕中搜索关键词，结果会缓存到本地索引
+💡 示例：/搜索 123456789 原神
+
+6️⃣ 综合报告
+📝 命令：/全部 <UID>
+📋 说明：一次查询评论、弹幕、直播弹幕、入场、粉丝牌和大航海，生成一张综合报告
+💡 示例：/全部 123456789
+
+7️⃣ 批量查询
+📝 命令：/批量 <UID1> <UID2> ...
+📋 说明：一次查询多个UID的关键统计并生成汇总表，支持逗号分隔和空间链接，加 csv 输出表格文件
+💡 示例：/批量 123456 789012 或 /批量 csv 123456,789012
+
+8️⃣ 监控列表
+📝 命令：/监控 添加|删除 <UID>，/监控 列表
+📋 说明：定时检查UID的新评论、弹幕和入场记录，有新动态时推送到当前会话
+💡 示例：/监控 添加 123456789
+
+9️⃣ 双用户对比
+📝 命令：/对比 <UID1> <UID2>
+📋 说明：一次查询两个用户，对比共同直播间、主播、视频、作息相似度、共同设备与历史昵称
+💡 示例：/对比 123456789 987654321
+
+🔟 直播间观众
+📝 命令：/房间 <直播间号或主播名>
+📋 说明：从本地索引列出查询过的用户中去过该直播间的人，以及他们还常去的直播间（不请求上游）
+💡 示例：/房间 21452505
+
+1️⃣1️⃣ 运行状态（管理员）
+📝 命令：/aicu状态
+📋 说明：查看各接口成功率与状态码、分阶段耗时 p50/p95/p99 和缓存命中率
+💡 示例：/aicu状态
+
 如有问题或建议，欢迎反馈！
 """
         yield event.plain_result(help_text.strip())
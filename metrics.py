@@ -0,0 +1,154 @@
+"""
+AICU 运行指标
+
+- 分阶段耗时：Cloudflare 过码、上游请求、JSON 解析、AI 分析、模板渲染、截图等
+- 每个阶段按标签（如接口名、模板名）保留最近若干次耗时的滚动窗口，按需计算 p50/p95/p99
+- 计数器：各接口的状态码、成功/失败次数等
+- 可选导出为 Prometheus 文本格式文件，供 node_exporter textfile collector 等采集
+"""
+import re
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable
+from urllib.parse import urlparse
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def endpoint_name(url: str) -> str:
+    """把请求 URL 归一化为接口名：去掉协议与查询串，路径中的数字替换为 {id}"""
+    parsed = urlparse(url)
+    return parsed.netloc + re.sub(r"/\d+", "/{id}", parsed.path)
+
+
+class RollingHistogram:
+    """保留最近 window 个样本的耗时窗口"""
+
+    __slots__ = ("samples", "count", "total")
+
+    def __init__(self, window: int):
+        self.samples: deque[float] = deque(maxlen=window)
+        self.count = 0    # 累计样本数（不受窗口限制）
+        self.total = 0.0  # 累计耗时（秒）
+
+    def observe(self, seconds: float):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+    def quantiles(self, qs=QUANTILES) -> list[float]:
+        if not self.samples:
+            return [0.0 for _ in qs]
+        ordered = sorted(self.samples)
+        last = len(ordered) - 1
+        return [ordered[min(last, int(round(q * last)))] for q in qs]
+
+
+class Metrics:
+    """进程内指标注册表"""
+
+    def __init__(self, window: int = 512, export_path: Path = None, export_interval: float = 60):
+        self.window = window
+        self.started_at = time.time()
+        self.histograms: dict[tuple[str, str], RollingHistogram] = {}
+        self.counters: dict[tuple[str, str, str], int] = {}
+        self.gauges: dict[str, Callable[[], float]] = {}  # 导出时才读取的瞬时值
+        self.export_path = Path(export_path) if export_path else None
+        self.export_interval = export_interval
+        self._last_export = 0.0
+
+    # ================= 记录 =================
+    def observe(self, stage: str, label: str, seconds: float):
+        key = (stage, label)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = RollingHistogram(self.window)
+        histogram.observe(seconds)
+        self._maybe_export()
+
+    def inc(self, name: str, label: str = "", value: str = "", amount: int = 1):
+        key = (name, label, str(value))
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def register_gauge(self, name: str, read: Callable[[], float]):
+        self.gauges[name] = read
+
+    @contextmanager
+    def span(self, stage: str, label: str = ""):
+        """统计一段代码的耗时，并按结果计入 stage_result 计数器"""
+        start = time.perf_counter()
+        result = "ok"
+        try:
+            yield
+        except BaseException:
+            result = "error"
+            raise
+        finally:
+            self.inc(f"{stage}_result", label, result)
+            self.observe(stage, label, time.perf_counter() - start)
+
+    def quantiles(self, stage: str, label: str = "") -> list[float]:
+        histogram = self.histograms.get((stage, label))
+        return histogram.quantiles() if histogram else [0.0 for _ in QUANTILES]
+
+    def counter(self, name: str, label: str = "", value: str = "") -> int:
+        return self.counters.get((name, label, str(value)), 0)
+
+    def counter_values(self, name: str, label: str = "") -> dict[str, int]:
+        """某个计数器在指定标签下各取值的计数，如某接口的各状态码"""
+        return {v: c for (n, l, v), c in self.counters.items() if n == name and l == label}
+
+    def stage_rows(self) -> list[tuple[str, str, int, list[float]]]:
+        """所有阶段的 (阶段, 标签, 累计次数, [p50, p95, p99])，按阶段与标签排序"""
+        return [
+            (stage, label, histogram.count, histogram.quantiles())
+            for (stage, label), histogram in sorted(self.histograms.items())
+        ]
+
+    # ================= 输出 =================
+    def to_prometheus(self) -> str:
+        lines = [
+            "# HELP aicu_stage_latency_seconds AICU plugin stage latency over a rolling window",
+            "# TYPE aicu_stage_latency_seconds summary",
+        ]
+        for (stage, label), histogram in sorted(self.histograms.items()):
+            labels = f'stage="{stage}",label="{label}"'
+            for q, value in zip(QUANTILES, histogram.quantiles()):
+                lines.append(f'aicu_stage_latency_seconds{{{labels},quantile="{q}"}} {value:.6f}')
+            lines.append(f"aicu_stage_latency_seconds_sum{{{labels}}} {histogram.total:.6f}")
+            lines.append(f"aicu_stage_latency_seconds_count{{{labels}}} {histogram.count}")
+
+        lines.append("# HELP aicu_events_total AICU plugin event counters")
+        lines.append("# TYPE aicu_events_total counter")
+        for (name, label, value), count in sorted(self.counters.items()):
+            lines.append(f'aicu_events_total{{name="{name}",label="{label}",value="{value}"}} {count}')
+
+        for name, read in sorted(self.gauges.items()):
+            lines.append(f"# TYPE aicu_{name} gauge")
+            lines.append(f"aicu_{name} {read()}")
+
+        lines.append("# TYPE aicu_uptime_seconds gauge")
+        lines.append(f"aicu_uptime_seconds {time.time() - self.started_at:.0f}")
+        return "\n".join(lines) + "\n"
+
+    def export(self):
+        """写出 Prometheus 文本文件（先写临时文件再替换，避免采集到半截内容）"""
+        if not self.export_path:
+            return
+        tmp_path = self.export_path.with_suffix(".tmp")
+        tmp_path.write_text(self.to_prometheus(), encoding="utf-8")
+        tmp_path.replace(self.export_path)
+
+    def _maybe_export(self):
+        if not self.export_path:
+            return
+        now = time.monotonic()
+        if now - self._last_export < self.export_interval:
+            return
+        self._last_export = now
+        try:
+            self.export()
+        except OSError:
+            pass
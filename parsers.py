@@ -0,0 +1,334 @@
+"""
+AICU 解析器
+
+评论 / 视频弹幕 / 直播弹幕 / 入场 四类响应的解析与统计，均为模块级纯函数：
+输入是接口返回的字典，输出是展示记录列表与统计结果，两者都可以 pickle，
+因此大结果可以派发到子进程执行（见 ParsePool），小结果直接在当前线程解析。
+"""
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+from .records import ReplyRecord, DanmakuRecord, LiveDanmakuRecord, EntryRecord
+from .stats import StatColumns, summarize, top_key
+
+LIVE_DISPLAY_COUNT = 50  # 直播弹幕默认最多展示条数
+DEFAULT_AVATAR_URL = "https://i0.hdslb.com/bfs/face/member/noface.jpg"
+
+
+# ================= 解析 =================
+def parse_replies(reply_raw, display_limit: int = None) -> dict:
+    """解析评论列表，只为前 display_limit 条构造展示记录"""
+    replies = []
+    if reply_raw and reply_raw.get('code') == 0:
+        data_block = reply_raw.get('data', {})
+        if 'replies' not in data_block and isinstance(data_block.get('data'), dict):
+            data_block = data_block['data']
+        replies = data_block.get('replies', []) or []
+
+    # 确保 replies 是列表
+    if not isinstance(replies, list):
+        replies = []
+
+    if display_limit is None:
+        display_limit = len(replies)
+
+    records = []
+    columns = StatColumns()
+
+    for r in replies:
+        ts = r.get('time', 0)
+        msg = r.get('message', '')
+        columns.add(ts, len(msg))
+        if len(records) < display_limit:
+            records.append(ReplyRecord(msg, ts, r.get('rank', 0)))
+
+    return {
+        "list": records,
+        "count": len(columns),
+        "stats": summarize(columns)
+    }
+
+
+def parse_danmaku(danmaku_raw, display_limit: int = None) -> dict:
+    """解析弹幕数据，只为前 display_limit 条构造展示记录"""
+    records = []
+    total_count = 0
+    columns = StatColumns("video")
+
+    if danmaku_raw and danmaku_raw.get('code') == 0:
+        data = danmaku_raw.get('data', {})
+        cursor = data.get('cursor', {})
+        total_count = cursor.get('all_count', 0)
+        items = data.get('videodmlist', [])
+        if display_limit is None:
+            display_limit = len(items)
+
+        for item in items:
+            ts = item.get('ctime', 0)
+            content = item.get('content', '')
+            oid = item.get('oid', '')  # 视频aid
+            columns.add(ts, len(content), oid)
+            if len(records) < display_limit:
+                # progress: 弹幕时间点(毫秒)
+                records.append(DanmakuRecord(content, ts, oid, item.get('progress', 0)))
+
+    summary = summarize(columns)
+    summary["most_active_video"] = top_key(summary, "video")
+    summary["video_count"] = summary["distinct"]["video"]
+
+    return {
+        "list": records,
+        "total_count": total_count,
+        "fetched_count": len(columns),
+        "stats": summary
+    }
+
+
+def parse_live_danmaku(live_danmaku_raw, display_limit: int = None) -> dict:
+    """解析直播弹幕数据，只为前 display_limit 条构造展示记录"""
+    if display_limit is None:
+        display_limit = LIVE_DISPLAY_COUNT
+
+    records = []
+    total_count = 0
+    columns = StatColumns("room", "anchor")
+
+    if live_danmaku_raw and live_danmaku_raw.get('code') == 0:
+        data = live_danmaku_raw.get('data', {})
+        cursor = data.get('cursor', {})
+        total_count = cursor.get('all_count', 0)
+        items = data.get('list', [])
+
+        for room_info in items:
+            room_data = room_info.get('roominfo', {})
+            danmaku_items = room_info.get('danmu', [])
+
+            room_id = room_data.get('roomid', '')
+            room_name = room_data.get('roomname', '')
+            anchor_name = room_data.get('upname', '')
+
+            for danmaku in danmaku_items:
+                ts = danmaku.get('ts', 0)
+                content = danmaku.get('text', '')
+                columns.add(ts, len(content), room_id, anchor_name)
+                if len(records) < display_limit:
+                    records.append(LiveDanmakuRecord(
+                        content, ts, room_id, room_name, anchor_name, danmaku.get('uname', '')
+                    ))
+
+    summary = summarize(columns)
+    summary.update({
+        "most_active_room": top_key(summary, "room"),
+        "most_active_anchor": top_key(summary, "anchor"),
+        "room_count": summary["distinct"]["room"],
+        "anchor_count": summary["distinct"]["anchor"]
+    })
+
+    return {
+        "list": records,
+        "total_count": total_count,
+        "fetched_count": len(columns),
+        "stats": summary
+    }
+
+
+def parse_entry(entry_raw, display_limit: int = None, default_avatar: str = DEFAULT_AVATAR_URL) -> dict:
+    """解析入场信息数据，只为前 display_limit 条构造展示记录"""
+    columns = StatColumns("room", "anchor")
+
+    if not entry_raw or entry_raw.get('code') != 200:
+        return {
+            "list": [],
+            "total": 0,
+            "has_more": False,
+            "page_num": 0,
+            "page_size": 0,
+            "stats": entry_summary(columns)
+        }
+
+    data = entry_raw.get('data', {})
+    total = data.get('total', 0)
+    page_num = data.get('pageNum', 0)
+    page_size = data.get('pageSize', 0)
+    has_more = data.get('hasMore', False)
+
+    raw_records = data.get('data', {}).get('records', [])
+    if display_limit is None:
+        display_limit = len(raw_records)
+
+    records = []
+
+    for record in raw_records:
+        channel = record.get('channel', {})
+        live = record.get('live', {})
+        danmakus = record.get('danmakus', [])
+
+        anchor_name = channel.get('uName', '未知主播')
+        room_id = channel.get('roomId', '')
+        start_date = live.get('startDate', 0)
+        stop_date = live.get('stopDate', 0)
+
+        # 入场时间取第一条弹幕的时间（毫秒）
+        entry_time = danmakus[0].get('sendDate', 0) if danmakus else 0
+
+        # 直播时长（分钟），用于均值统计
+        duration_minutes = 0
+        if start_date > 0 and stop_date > 0:
+            duration_minutes = (stop_date - start_date) // 1000 // 60
+        columns.add(entry_time / 1000, duration_minutes, room_id, anchor_name)
+
+        if len(records) >= display_limit:
+            continue
+
+        # 主播标签只取前3个
+        tags = channel.get('tags', [])
+        if not isinstance(tags, list):
+            tags = []
+
+        records.append(EntryRecord(
+            anchor_name=anchor_name,
+            anchor_avatar=channel.get('faceUrl', default_avatar),
+            room_id=room_id,
+            room_title=channel.get('title', ''),
+            live_title=live.get('title', ''),
+            parent_area=live.get('parentArea', ''),
+            area=live.get('area', ''),
+            entry_time=entry_time,
+            start_date=start_date,
+            stop_date=stop_date,
+            watch_count=live.get('watchCount', 0),
+            like_count=live.get('likeCount', 0),
+            total_income=live.get('totalIncome', 0),
+            danmakus_count=live.get('danmakusCount', 0),
+            channel_total_danmaku=channel.get('totalDanmakuCount', 0),
+            channel_total_income=channel.get('totalIncome', 0),
+            channel_total_live=channel.get('totalLiveCount', 0),
+            is_living=channel.get('isLiving', False),
+            tags=tags[:3]
+        ))
+
+    return {
+        "list": records,
+        "total": total,
+        "has_more": has_more,
+        "page_num": page_num,
+        "page_size": page_size,
+        "stats": entry_summary(columns)
+    }
+
+
+def entry_summary(columns: StatColumns) -> dict:
+    """入场记录统计：时长列为直播时长（分钟）"""
+    summary = summarize(columns)
+    summary.update({
+        "room_count": summary["distinct"]["room"],
+        "anchor_count": summary["distinct"]["anchor"],
+        "total_duration": summary["total_length"],
+        "avg_duration": summary["avg_length"],
+        "most_active_anchor": top_key(summary, "anchor", "N/A")
+    })
+    return summary
+
+
+# ================= 分页 =================
+async def fetch_guard_pages(fetch_page, max_pages: int) -> tuple[dict | None, list[int]]:
+    """
+    大航海分页：先取第一页得到总页数（data.info.page），其余页并发获取，列表合并到第一页的结果中。
+    最多取 max_pages 页；返回 (合并后的响应, 获取失败的页码)。
+    """
+    first = await fetch_page(1)
+    if not first or first.get('code') != 0:
+        return first, []
+
+    data = first.get('data') or {}
+    info = data.get('info') or {}
+    total_pages = min(int(info.get('page') or 1), max_pages)
+    if total_pages <= 1:
+        return first, []
+
+    pages = await asyncio.gather(*(fetch_page(page) for page in range(2, total_pages + 1)), return_exceptions=True)
+    merged = list(data.get('list') or [])
+    failed = []
+    for page, raw in enumerate(pages, start=2):
+        if isinstance(raw, Exception) or not raw or raw.get('code') != 0:
+            failed.append(page)
+            continue
+        merged.extend((raw.get('data') or {}).get('list') or [])
+    return {**first, "data": {**data, "list": merged}}, failed
+
+
+# 来源 -> 解析函数
+PARSERS = {
+    "reply": parse_replies,
+    "danmaku": parse_danmaku,
+    "live": parse_live_danmaku,
+    "entry": parse_entry,
+}
+
+
+def record_count(kind: str, raw) -> int:
+    """粗略估计响应中的记录数，用于决定在哪里解析"""
+    if not isinstance(raw, dict):
+        return 0
+    data = raw.get('data') or {}
+    if not isinstance(data, dict):
+        return 0
+    if kind == "reply":
+        if 'replies' not in data and isinstance(data.get('data'), dict):
+            data = data['data']
+        return len(data.get('replies') or [])
+    if kind == "danmaku":
+        return len(data.get('videodmlist') or [])
+    if kind == "live":
+        return sum(len(room.get('danmu') or []) for room in data.get('list') or [])
+    if kind == "entry":
+        return len((data.get('data') or {}).get('records') or [])
+    return 0
+
+
+# ================= 进程池 =================
+class ParsePool:
+    """
+    按记录数分派解析任务：
+    - 少于 threshold 条：在当前线程直接解析，避免序列化开销
+    - 达到 threshold 且 workers > 0：派发到进程池，多个来源可并行占用多核
+    - 达到 threshold 但未开启进程池：放到默认线程池，至少不长时间占住事件循环
+    """
+
+    def __init__(self, workers: int = 0, threshold: int = 2000):
+        self.workers = workers
+        self.threshold = threshold
+        self._executor: ProcessPoolExecutor | None = None
+
+    def placement(self, kind: str, raw) -> str:
+        if record_count(kind, raw) < self.threshold:
+            return "inline"
+        return "process" if self.workers > 0 else "thread"
+
+    async def run(self, kind: str, raw, **kwargs) -> dict:
+        job = partial(PARSERS[kind], raw, **kwargs)
+        placement = self.placement(kind, raw)
+        if placement == "inline":
+            return job()
+        loop = asyncio.get_running_loop()
+        if placement == "thread":
+            return await loop.run_in_executor(None, job)
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            return await loop.run_in_executor(self._executor, job)
+        except BrokenProcessPool:
+            # 子进程异常退出：关闭进程池，之后退回线程池
+            self.disable()
+            raise
+
+    def disable(self):
+        self.workers = 0
+        self.shutdown()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
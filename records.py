@@ -0,0 +1,199 @@
+"""
+AICU 记录类型与模板过滤器
+
+解析器只为需要展示的行构造紧凑的 slots 数据类，字段保留接口返回的原始数值；
+时间、数量、金额等的格式化全部交给 Jinja 过滤器，只在真正渲染的行上执行。
+"""
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from markupsafe import Markup, escape
+
+from .stats import WEEKDAY_NAMES
+
+GUARD_NAMES = {1: "总督", 2: "提督", 3: "舰长"}
+
+
+# ================= 记录类型 =================
+@dataclass(slots=True)
+class ReplyRecord:
+    """评论"""
+    message: str
+    timestamp: int
+    rank: int = 0
+
+
+@dataclass(slots=True)
+class DanmakuRecord:
+    """视频弹幕"""
+    content: str
+    timestamp: int
+    video_id: str
+    progress: int = 0  # 弹幕时间点(毫秒)
+
+
+@dataclass(slots=True)
+class LiveDanmakuRecord:
+    """直播弹幕"""
+    content: str
+    timestamp: int
+    room_id: str
+    room_name: str
+    anchor_name: str
+    username: str
+
+
+@dataclass(slots=True)
+class EntryRecord:
+    """入场记录，时间字段均为毫秒时间戳"""
+    anchor_name: str
+    anchor_avatar: str
+    room_id: str
+    room_title: str
+    live_title: str
+    parent_area: str
+    area: str
+    entry_time: int
+    start_date: int
+    stop_date: int
+    watch_count: int
+    like_count: int
+    total_income: float
+    danmakus_count: int
+    channel_total_danmaku: int
+    channel_total_income: float
+    channel_total_live: int
+    is_living: bool
+    tags: list = field(default_factory=list)
+
+    @property
+    def duration_minutes(self) -> int:
+        """直播时长（分钟）"""
+        if self.start_date > 0 and self.stop_date > 0:
+            return (self.stop_date - self.start_date) // 1000 // 60
+        return 0
+
+    @property
+    def watch_seconds(self) -> int:
+        """观看时长（秒），入场时间或下播时间未知时为 0"""
+        if self.entry_time > 0 and self.stop_date > 0:
+            return max((self.stop_date - self.entry_time) // 1000, 0)
+        return 0
+
+
+@dataclass(slots=True)
+class MedalRecord:
+    """粉丝牌，颜色保留接口返回的整数值"""
+    name: str
+    level: int
+    target_name: str
+    color_start: int
+    color_end: int
+    color_border: int
+    is_wearing: bool
+    guard_level: int
+    intimacy: int
+    next_intimacy: int
+    today_feed: int
+    day_limit: int
+
+
+@dataclass(slots=True)
+class GuardRecord:
+    """大航海"""
+    anchor_name: str
+    guard_level: int
+    medal_name: str
+    medal_level: int
+    color_start: int
+    color_end: int
+    color_border: int
+    accompany_days: int
+    rank: int
+
+    @property
+    def guard_name(self) -> str:
+        return GUARD_NAMES.get(self.guard_level, "舰长")
+
+
+# ================= 模板过滤器 =================
+def fmt_time(ts, fmt: str = '%Y-%m-%d %H:%M', ms: bool = False, default: str = "未知时间") -> str:
+    """时间戳格式化，ms=True 表示毫秒时间戳"""
+    if not ts or ts <= 0:
+        return default
+    return datetime.fromtimestamp(ts / 1000 if ms else ts).strftime(fmt)
+
+
+def fmt_weekday(ts, ms: bool = False, default: str = "未知") -> str:
+    if not ts or ts <= 0:
+        return default
+    return WEEKDAY_NAMES[datetime.fromtimestamp(ts / 1000 if ms else ts).weekday()]
+
+
+def fmt_count(value, use_k: bool = True) -> str:
+    """数量格式化：1.2w / 3.4k"""
+    value = value or 0
+    if value >= 10000:
+        return f"{value/10000:.1f}w"
+    if use_k and value >= 1000:
+        return f"{value/1000:.1f}k"
+    return str(value)
+
+
+def fmt_income(value, digits: int = 1) -> str:
+    value = value or 0
+    return f"¥{value:.{digits}f}" if value > 0 else "¥0"
+
+
+def fmt_progress(ms) -> str:
+    """弹幕时间点（毫秒）转换为 分:秒"""
+    seconds = (ms or 0) // 1000
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+def fmt_duration(seconds) -> str:
+    """秒数转换为 Xh Ym"""
+    if not seconds or seconds <= 0:
+        return "N/A"
+    return f"{seconds // 3600}h {(seconds % 3600) // 60}m"
+
+
+def truncate_text(text, length: int) -> str:
+    text = text or ""
+    return text[:length] + "..." if len(text) > length else text
+
+
+def hex_color(color_int) -> str:
+    """粉丝牌颜色整数转十六进制"""
+    if not color_int or color_int <= 0:
+        return "#cccccc"
+    return f"#{color_int:06x}"
+
+
+def highlight(text, keyword) -> Markup:
+    """转义文本并用 <mark> 标出关键词（不区分大小写）"""
+    text = text or ""
+    if not keyword:
+        return escape(text)
+    parts = []
+    last = 0
+    for match in re.finditer(re.escape(keyword), text, re.IGNORECASE):
+        parts.append(escape(text[last:match.start()]))
+        parts.append(Markup("<mark>%s</mark>") % match.group())
+        last = match.end()
+    parts.append(escape(text[last:]))
+    return Markup("").join(parts)
+
+
+TEMPLATE_FILTERS = {
+    "fmt_time": fmt_time,
+    "fmt_weekday": fmt_weekday,
+    "fmt_count": fmt_count,
+    "fmt_income": fmt_income,
+    "fmt_progress": fmt_progress,
+    "fmt_duration": fmt_duration,
+    "truncate_text": truncate_text,
+    "hex_color": hex_color,
+    "highlight": highlight,
+}
@@ -0,0 +1,398 @@
+"""
+AICU 独立渲染进程
+
+把 Chromium 放到插件进程之外：每个渲染进程自己持有一个浏览器，
+通过本地（或远程）TCP 连接接收渲染任务，返回 PNG 图片。
+浏览器的内存峰值与崩溃只影响渲染进程，插件会自动重启本机进程并把任务交给其他进程。
+
+协议：每条消息为 4 字节大端长度 + 内容。
+- 握手：连接后先发送 JSON {"token"}，响应 JSON {"ok", "error"}，令牌不符时断开连接
+- 请求：JSON {"html", "viewport", "timeout_ms", "scale"}
+- 响应：JSON {"ok", "error"}，ok 时紧跟一条 PNG 字节消息
+
+渲染进程会用关闭了沙箱的 Chromium 打开收到的任意 HTML，不能暴露给不可信的网络。
+单独运行时默认只监听本机回环地址；部署到其他主机时只监听内网地址，并设置共享令牌
+（插件配置 render_worker_token 填写同一个值）：
+    AICU_RENDER_TOKEN=<随机字符串> python render_worker.py --host 10.0.0.5 --port 8765 --pages 2
+监听非回环地址而未设置令牌时拒绝启动。本文件不依赖插件包内的其他模块。
+"""
+import argparse
+import asyncio
+import hmac
+import json
+import os
+import secrets
+import struct
+import sys
+import time
+
+_HEADER = struct.Struct(">I")
+MAX_FRAME = 64 * 1024 * 1024  # 单条消息上限，防止异常数据占满内存
+MAX_HANDSHAKE_FRAME = 4096  # 握手消息上限，未认证的连接不能让进程分配大块内存
+TOKEN_ENV = "AICU_RENDER_TOKEN"  # 通过环境变量传递令牌，避免出现在进程命令行中
+LOOPBACK_HOSTS = ("127.0.0.1", "::1", "localhost")
+
+BROWSER_ARGS = [
+    "--disable-blink-features=AutomationControlled",
+    "--disable-dev-shm-usage",
+    "--no-sandbox",
+    "--disable-setuid-sandbox",
+]
+
+# 精简配置：报表是静态卡片，不需要 GPU 与多个渲染进程。
+# 扩展、同步、后台网络等 Playwright 默认已关闭；这里不传 --disable-features，以免覆盖 Playwright 自带的列表
+LEAN_BROWSER_ARGS = BROWSER_ARGS + [
+    "--disable-gpu",
+    "--disable-software-rasterizer",
+    "--renderer-process-limit=2",    # 所有页面共用至多两个渲染进程
+    "--disk-cache-size=8388608",     # 磁盘缓存 8MB，只需容纳头像与背景图
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--mute-audio",
+]
+
+BROWSER_PROFILES = {"standard": BROWSER_ARGS, "lean": LEAN_BROWSER_ARGS}
+
+
+def launch_options(headless: bool = True, profile: str = "lean", executable_path: str = "") -> dict:
+    """chromium.launch 的参数；executable_path 可指向 chrome-headless-shell 等精简版浏览器"""
+    options = {"headless": headless, "args": list(BROWSER_PROFILES.get(profile, LEAN_BROWSER_ARGS))}
+    if executable_path:
+        options["executable_path"] = executable_path
+    return options
+
+
+def page_options(viewport: dict, profile: str = "lean", javascript: bool = False) -> dict:
+    """
+    渲染页面的参数：精简配置下一次性渲染页关闭 JavaScript（模板不含脚本）。
+    常驻页面靠 page.evaluate 注入 body，需传 javascript=True 保留脚本。
+    """
+    options = {"viewport": viewport, "device_scale_factor": 2}
+    if profile == "lean" and not javascript:
+        options["java_script_enabled"] = False
+    return options
+
+
+# ================= 消息编解码 =================
+async def read_frame(reader: asyncio.StreamReader, limit: int = MAX_FRAME) -> bytes:
+    size, = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    if size > limit:
+        raise ValueError(f"消息过大: {size} 字节")
+    return await reader.readexactly(size)
+
+
+def write_frame(writer: asyncio.StreamWriter, payload: bytes):
+    writer.write(_HEADER.pack(len(payload)) + payload)
+
+
+# ================= 渲染进程 =================
+class RenderServer:
+    """持有一个浏览器，并发渲染不超过 pages 个页面"""
+
+    def __init__(self, pages: int = 2, headless: bool = True, profile: str = "lean", executable_path: str = "",
+                 token: str = ""):
+        self.pages = asyncio.Semaphore(max(1, pages))
+        self.token = token
+        self.headless = headless
+        self.profile = profile
+        self.executable_path = executable_path
+        self._playwright = None
+        self._browser = None
+        self._lock = asyncio.Lock()
+
+    async def browser(self):
+        async with self._lock:
+            if self._browser is None or not self._browser.is_connected():
+                from playwright.async_api import async_playwright
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                try:
+                    self._browser = await self._playwright.chromium.launch(
+                        **launch_options(self.headless, self.profile, self.executable_path)
+                    )
+                except Exception:
+                    options = launch_options(self.headless, self.profile, self.executable_path)
+                    options["args"] = ["--no-sandbox"]
+                    self._browser = await self._playwright.chromium.launch(**options)
+            return self._browser
+
+    async def render(self, html: str, viewport: dict, timeout_ms: int, scale: float) -> bytes:
+        async with self.pages:
+            browser = await self.browser()
+            options = page_options(viewport, self.profile)
+            options["device_scale_factor"] = scale
+            page = await browser.new_page(**options)
+            try:
+                await page.set_content(html, wait_until="networkidle", timeout=timeout_ms)
+                try:
+                    return await page.locator(".container").screenshot()
+                except Exception:
+                    return await page.screenshot(full_page=True)
+            finally:
+                await page.close()
+
+    async def _authenticate(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        """读取握手消息并校验令牌；未设置令牌时（只监听回环地址）任何握手都通过"""
+        hello = json.loads(await asyncio.wait_for(read_frame(reader, MAX_HANDSHAKE_FRAME), timeout=10))
+        token = hello.get("token") if isinstance(hello, dict) else None
+        ok = not self.token or (isinstance(token, str) and hmac.compare_digest(token.encode(), self.token.encode()))
+        write_frame(writer, b'{"ok": true}' if ok else b'{"ok": false, "error": "token mismatch"}')
+        await writer.drain()
+        return ok
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            if not await self._authenticate(reader, writer):
+                return
+            while True:
+                try:
+                    job = json.loads(await read_frame(reader))
+                except asyncio.IncompleteReadError:
+                    break
+                try:
+                    png = await self.render(
+                        job["html"], job.get("viewport") or {"width": 600, "height": 1000},
+                        job.get("timeout_ms", 30000), job.get("scale", 2),
+                    )
+                except Exception as e:
+                    write_frame(writer, json.dumps({"ok": False, "error": str(e)}, ensure_ascii=False).encode())
+                else:
+                    write_frame(writer, b'{"ok": true}')
+                    write_frame(writer, png)
+                await writer.drain()
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            pass
+        finally:
+            writer.close()
+
+    async def close(self):
+        if self._browser:
+            await self._browser.close()
+        if self._playwright:
+            await self._playwright.stop()
+
+
+async def _wait_stdin_closed():
+    """插件进程退出时子进程的标准输入随之关闭"""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    while await reader.read(4096):
+        pass
+
+
+async def serve(host: str, port: int, pages: int, headless: bool, warmup: bool, watch_stdin: bool = False,
+                profile: str = "lean", executable_path: str = "", token: str = ""):
+    if host not in LOOPBACK_HOSTS and not token:
+        raise SystemExit(f"监听非回环地址 {host} 时必须通过环境变量 {TOKEN_ENV} 设置令牌")
+    render_server = RenderServer(pages, headless, profile, executable_path, token)
+    if warmup:
+        await render_server.browser()
+    server = await asyncio.start_server(render_server.handle, host, port)
+    bound_port = server.sockets[0].getsockname()[1]
+    # 插件从标准输出读取这一行得到实际端口（--port 0 时由系统分配）
+    print(f"READY {bound_port}", flush=True)
+    try:
+        async with server:
+            if not watch_stdin:
+                await server.serve_forever()
+                return
+            # 由插件启动时，插件进程退出（包括被强制结束）后随之退出，不留下孤儿浏览器
+            serving = asyncio.create_task(server.serve_forever())
+            await _wait_stdin_closed()
+            serving.cancel()
+    finally:
+        await render_server.close()
+
+
+# ================= 插件侧 =================
+class RenderJobError(RuntimeError):
+    """渲染进程正常返回了错误（如页面超时），不是进程故障"""
+
+
+class RenderWorker:
+    """一个渲染进程的地址、进行中任务数与（本机启动时的）子进程"""
+
+    def __init__(self, host: str, port: int = 0, process: asyncio.subprocess.Process = None, token: str = ""):
+        self.host = host
+        self.port = port
+        self.process = process
+        self.token = token
+        self.local = process is not None
+        self.drain_task: asyncio.Task | None = None  # 持续读取本机进程的标准输出，避免管道写满阻塞进程
+        self.active = 0
+        self.down_until = 0.0  # 远程进程失败后的冷却截止时间
+        self.broken = False    # 本机进程失败后标记，下次使用时重启
+
+    @property
+    def name(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    def alive(self) -> bool:
+        if self.local:
+            return not self.broken and self.process.returncode is None
+        return time.monotonic() >= self.down_until
+
+
+class RenderWorkerPool:
+    """
+    渲染进程池：本机按需启动 local_count 个进程，另可接入 remote 中的远程进程；
+    每个任务交给进行中任务最少的可用进程，进程故障时换下一个进程重试。
+    """
+
+    def __init__(self, local_count: int = 0, remote: list[str] = None, pages: int = 2,
+                 headless: bool = True, cooldown: float = 30, attempts: int = 2,
+                 profile: str = "lean", executable_path: str = "", token: str = ""):
+        self.local_count = max(0, local_count)
+        self.profile = profile
+        self.executable_path = executable_path
+        self.attempts = max(1, attempts)  # 单个任务最多尝试的进程数，避免一个会让浏览器崩溃的页面拖垮所有进程
+        self.pages = pages
+        self.headless = headless
+        self.cooldown = cooldown
+        self.workers: list[RenderWorker] = []
+        for address in remote or []:
+            host, _, port = address.rpartition(":")
+            self.workers.append(RenderWorker(host or "127.0.0.1", int(port), token=token))
+        self._local_token = secrets.token_hex(16)  # 本机进程每次启动插件时随机生成
+        self._spawn_retry_at = 0.0  # 启动失败后的重试时间，避免每次渲染都等待启动超时
+        self._lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.local_count > 0 or bool(self.workers)
+
+    async def _spawn(self) -> RenderWorker:
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.abspath(__file__),
+            "--host", "127.0.0.1", "--port", "0", "--pages", str(self.pages),
+            "--watch-stdin", "--profile", self.profile,
+            *([] if self.headless else ["--headed"]),
+            *(["--executable", self.executable_path] if self.executable_path else []),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            env={**os.environ, TOKEN_ENV: self._local_token},
+        )
+        try:
+            line = await asyncio.wait_for(process.stdout.readline(), timeout=30)
+            if not line.startswith(b"READY "):
+                raise RuntimeError(f"渲染进程启动失败: {line!r}")
+            worker = RenderWorker("127.0.0.1", int(line.split()[1]), process, self._local_token)
+        except BaseException:
+            if process.returncode is None:
+                process.kill()
+            raise
+        worker.drain_task = asyncio.create_task(self._drain(process.stdout))
+        return worker
+
+    @staticmethod
+    async def _drain(stream: asyncio.StreamReader):
+        """丢弃 READY 之后的输出（浏览器日志等）"""
+        while await stream.read(65536):
+            pass
+
+    @staticmethod
+    def _discard(worker: RenderWorker):
+        if worker.process.returncode is None:
+            worker.process.kill()
+        if worker.drain_task:
+            worker.drain_task.cancel()
+
+    async def _ensure_local(self):
+        """补齐本机进程：首次使用时启动，已退出或出错的进程在此重启；启动失败后冷却一段时间再试"""
+        async with self._lock:
+            for worker in [w for w in self.workers if w.local and not w.alive()]:
+                self._discard(worker)
+                self.workers.remove(worker)
+            missing = self.local_count - sum(1 for worker in self.workers if worker.local)
+            if missing <= 0 or time.monotonic() < self._spawn_retry_at:
+                return
+            try:
+                for _ in range(missing):
+                    self.workers.append(await self._spawn())
+            except Exception:
+                self._spawn_retry_at = time.monotonic() + self.cooldown
+                if not any(worker.alive() for worker in self.workers):
+                    raise
+
+    def _candidates(self) -> list[RenderWorker]:
+        alive = [worker for worker in self.workers if worker.alive()]
+        return sorted(alive, key=lambda worker: worker.active)
+
+    async def render(self, html: str, viewport: dict, timeout_ms: int, scale: float = 2) -> tuple[bytes, str]:
+        """返回 (PNG 字节, 渲染进程名)；所有进程都失败时抛出最后一个错误"""
+        await self._ensure_local()
+        job = json.dumps(
+            {"html": html, "viewport": viewport, "timeout_ms": timeout_ms, "scale": scale}, ensure_ascii=False
+        ).encode()
+        last_error: Exception = RuntimeError("没有可用的渲染进程")
+        for worker in self._candidates()[:self.attempts]:
+            worker.active += 1
+            try:
+                return await self._send(worker, job, timeout_ms / 1000 + 10), worker.name
+            except RenderJobError:
+                raise  # 页面本身渲染失败，换进程也无济于事
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError) as e:
+                # 连接失败或进程崩溃：本机进程下次使用时重启，远程进程冷却一段时间
+                if worker.local:
+                    worker.broken = True
+                else:
+                    worker.down_until = time.monotonic() + self.cooldown
+                last_error = e
+            finally:
+                worker.active -= 1
+        raise last_error
+
+    async def _send(self, worker: RenderWorker, job: bytes, timeout: float) -> bytes:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(worker.host, worker.port), timeout=5)
+        try:
+            write_frame(writer, json.dumps({"token": worker.token}).encode())
+            await writer.drain()
+            hello = json.loads(await asyncio.wait_for(read_frame(reader), timeout=10))
+            if not hello.get("ok"):
+                # 令牌错误按进程故障处理：该进程冷却，任务交给其他进程
+                raise PermissionError(f"渲染进程 {worker.name} 拒绝连接: {hello.get('error')}")
+            write_frame(writer, job)
+            await writer.drain()
+            status = json.loads(await asyncio.wait_for(read_frame(reader), timeout=timeout))
+            if not status.get("ok"):
+                raise RenderJobError(status.get("error", "渲染失败"))
+            return await asyncio.wait_for(read_frame(reader), timeout=timeout)
+        finally:
+            writer.close()
+
+    async def close(self):
+        for worker in self.workers:
+            if worker.local and worker.process.returncode is None:
+                worker.process.terminate()
+                try:
+                    await asyncio.wait_for(worker.process.wait(), timeout=5)
+                except asyncio.TimeoutError:
+                    worker.process.kill()
+            if worker.drain_task:
+                worker.drain_task.cancel()
+        self.workers = [worker for worker in self.workers if not worker.local]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AICU 独立渲染进程")
+    parser.add_argument("--host", default="127.0.0.1", help=f"监听地址，非回环地址须设置环境变量 {TOKEN_ENV}")
+    parser.add_argument("--port", type=int, default=0, help="监听端口，0 为自动分配")
+    parser.add_argument("--pages", type=int, default=2, help="同时渲染的页面数")
+    parser.add_argument("--headed", action="store_true", help="以有界面模式运行浏览器")
+    parser.add_argument("--warmup", action="store_true", help="启动时就打开浏览器")
+    parser.add_argument("--watch-stdin", action="store_true", help="标准输入关闭时退出（由插件启动时使用）")
+    parser.add_argument("--profile", choices=list(BROWSER_PROFILES), default="lean", help="浏览器启动配置")
+    parser.add_argument("--executable", default="", help="浏览器可执行文件，如 chrome-headless-shell")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(
+            args.host, args.port, args.pages, not args.headed, args.warmup, args.watch_stdin,
+            args.profile, args.executable, os.environ.get(TOKEN_ENV, ""),
+        ))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
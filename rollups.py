@@ -0,0 +1,166 @@
+"""
+AICU 活跃度预聚合
+
+单次查询只拿到最新一页记录，活跃时段、星期分布都只能按这一页现算。
+RollupStore 为每个 UID 维护按时间分桶的累计计数，查询与监控轮询抓到记录时增量写入：
+- 星期 × 小时（7×24）计数
+- 按日计数（本地日期）
+- 按直播间累计的观看时长（入场到该场下播，分钟）与入场次数
+渲染热力图和长时间线只读取这些桶，不再回扫原始记录。
+
+同一批记录可能被多次抓到（缓存、轮询重叠、重复查询），每个来源按记录键（与本地关键词索引相同）
+记住已计入的记录，重复出现的直接跳过。已计入的键超过上限时淘汰时间最早的，并把水位线抬到被淘汰的时间，
+不晚于水位线的记录视为已计数。
+按 UID 持久化为 JSON，内存中用 LRU 保留最近使用的汇总，线程安全，可在线程池中调用。
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from pathlib import Path
+
+MAX_KEYS_PER_KIND = 5000  # 每个来源最多记住的已计入记录键，超过时淘汰最早的记录并抬高水位线
+
+
+def _prune(seen: dict):
+    """已计入的键超过上限时，按时间淘汰最早的记录（同一时间的一并淘汰），水位线抬到被淘汰的时间"""
+    keys = seen["keys"]
+    if len(keys) <= MAX_KEYS_PER_KIND:
+        return
+    cut = sorted(keys.values(), reverse=True)[MAX_KEYS_PER_KIND]
+    seen["floor"] = max(seen["floor"], cut)
+    seen["keys"] = {key: ts for key, ts in keys.items() if ts > cut}
+
+
+class UserRollup:
+    """单个 UID 的分桶计数"""
+
+    __slots__ = ("uid", "heat", "daily", "rooms", "seen")
+
+    def __init__(self, uid: str, stored: dict = None):
+        stored = stored or {}
+        self.uid = uid
+        self.heat: list[list[int]] = stored.get("heat") or [[0] * 24 for _ in range(7)]
+        self.daily: dict[str, int] = stored.get("daily", {})
+        self.rooms: dict[str, list] = stored.get("rooms", {})  # 直播间号 -> [观看分钟, 入场次数, 主播名]
+        # 来源 -> {"floor": 水位线, "keys": {记录键: 时间}}
+        self.seen: dict[str, dict] = stored.get("seen", {})
+        if "seen" not in stored:
+            # 旧版本按时间区间记录，无法还原记录键，最晚的区间终点作为水位线
+            for kind, spans in stored.get("spans", {}).items():
+                self.seen[kind] = {"floor": max((high for _, high in spans), default=0), "keys": {}}
+
+    def to_dict(self) -> dict:
+        return {"uid": self.uid, "heat": self.heat, "daily": self.daily, "rooms": self.rooms, "seen": self.seen}
+
+    def add(self, docs: list[dict]) -> int:
+        added, touched = 0, set()
+        for doc in docs:
+            ts = int(doc["ts"] or 0)
+            if ts <= 0:
+                continue
+            seen = self.seen.setdefault(doc["kind"], {"floor": 0, "keys": {}})
+            if ts <= seen["floor"] or doc["key"] in seen["keys"]:
+                continue
+            seen["keys"][doc["key"]] = ts
+            touched.add(doc["kind"])
+            self._count(doc, ts)
+            added += 1
+        for kind in touched:
+            _prune(self.seen[kind])
+        return added
+
+    def _count(self, doc: dict, ts: int):
+        local = time.localtime(ts)
+        self.heat[local.tm_wday][local.tm_hour] += 1
+        day_key = time.strftime("%Y-%m-%d", local)
+        self.daily[day_key] = self.daily.get(day_key, 0) + 1
+        if doc["kind"] == "entry":
+            meta = doc["meta"]
+            room_id = str(meta.get("room_id") or "")
+            if room_id:
+                room = self.rooms.setdefault(room_id, [0, 0, ""])
+                room[0] += max(int(meta.get("minutes") or 0), 0)
+                room[1] += 1
+                room[2] = meta.get("anchor_name") or room[2]
+
+    def snapshot(self, days: int, top_rooms: int) -> dict:
+        """热力图、最近 days 天的日计数与观看时长最长的直播间，耗时只与桶数有关"""
+        total = sum(self.daily.values())
+        today = date.today()
+        start = today - timedelta(days=max(days, 1) - 1)
+        timeline = [self.daily.get((start + timedelta(days=i)).isoformat(), 0) for i in range((today - start).days + 1)]
+        peak_weekday, peak_hour = max(
+            ((w, h) for w in range(7) for h in range(24)), key=lambda wh: self.heat[wh[0]][wh[1]]
+        )
+        rooms = sorted(self.rooms.items(), key=lambda item: (item[1][0], item[1][1]), reverse=True)[:top_rooms]
+        return {
+            "total": total,
+            "heat": self.heat,
+            "heat_peak": max(max(row) for row in self.heat),
+            "peak_weekday": peak_weekday,
+            "peak_hour": peak_hour,
+            "timeline": timeline,
+            "timeline_peak": max(timeline) if timeline else 0,
+            "timeline_start": start.isoformat(),
+            "timeline_end": today.isoformat(),
+            "active_days": len(self.daily),
+            "first_day": min(self.daily) if self.daily else "",
+            "rooms": [(room_id, anchor, minutes, visits) for room_id, (minutes, visits, anchor) in rooms],
+        }
+
+
+class RollupStore:
+    """按 UID 持久化的活跃度汇总，线程安全，可在线程池中调用"""
+
+    def __init__(self, root: Path, max_cached_users: int = 64):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_cached_users = max_cached_users
+        self._cache: OrderedDict[str, UserRollup] = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _path(self, uid: str) -> Path:
+        return self.root / f"{uid}.json"
+
+    def _get(self, uid: str) -> UserRollup:
+        rollup = self._cache.get(uid)
+        if rollup is not None:
+            self._cache.move_to_end(uid)
+            return rollup
+
+        stored = None
+        path = self._path(uid)
+        if path.exists():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    stored = json.load(f)
+            except (OSError, ValueError):
+                stored = None
+
+        rollup = UserRollup(uid, stored)
+        self._cache[uid] = rollup
+        while len(self._cache) > self.max_cached_users:
+            self._cache.popitem(last=False)
+        return rollup
+
+    def _save(self, rollup: UserRollup):
+        path = self._path(rollup.uid)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(rollup.to_dict(), f, ensure_ascii=False)
+        tmp_path.replace(path)
+
+    def add(self, uid: str, docs: list[dict]) -> int:
+        """计入一次抓取得到的文档（docs_from_* 的输出，可混合多个来源），返回新计入的条数"""
+        with self._lock:
+            rollup = self._get(uid)
+            added = rollup.add(docs)
+            if added:
+                self._save(rollup)
+            return added
+
+    def snapshot(self, uid: str, days: int = 180, top_rooms: int = 5) -> dict:
+        with self._lock:
+            return self._get(uid).snapshot(days, top_rooms)
@@ -0,0 +1,176 @@
+"""
+AICU 直播间反向索引
+
+入场记录与直播弹幕里都带有直播间号和主播名，单次查询只按 UID 展示，渲染完就丢弃了。
+RoomIndex 把每次查询与监控轮询见到的 (UID, 直播间) 记录下来：
+- 直播间 -> {UID: [最早出现时间, 最后出现时间]}，另记主播名
+- UID -> 去过的直播间（加载时由上面重建，只在内存中）
+据此可以不请求上游，直接回答「这个直播间有哪些已知观众」「这些观众还常去哪些直播间」。
+直播间数与每个直播间的观众数都有上限，超过时淘汰最久没有观众出现的。
+持久化为 JSON，两次写盘至少间隔 save_interval 秒，卸载时调用 flush 写入剩余改动；线程安全，可在线程池中调用。
+"""
+import json
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+MAX_ROOMS = 5000  # 默认最多保留的直播间数
+SAVE_INTERVAL = 30  # 两次写盘的最小间隔（秒）
+
+
+class RoomIndex:
+    """直播间 -> 观众的反向索引"""
+
+    def __init__(
+        self, path: Path, max_viewers_per_room: int = 500, max_rooms: int = MAX_ROOMS,
+        save_interval: float = SAVE_INTERVAL
+    ):
+        self.path = Path(path)
+        self.max_viewers_per_room = max_viewers_per_room
+        self.max_rooms = max(max_rooms, 1)
+        self.save_interval = save_interval
+        self._lock = threading.RLock()
+        # 直播间号 -> {"anchor": 主播名, "last": 观众最后出现时间, "viewers": {uid: [first, last]}}
+        self._rooms: dict[str, dict] = {}
+        self._user_rooms: dict[str, set[str]] = {}  # uid -> 直播间号
+        self._dirty = False
+        self._saved_at = float("-inf")
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._rooms = json.load(f).get("rooms", {})
+        except (OSError, ValueError):
+            self._rooms = {}
+        for room_id, room in self._rooms.items():
+            room.setdefault("last", max((last for _, last in room["viewers"].values()), default=0))
+            for uid in room["viewers"]:
+                self._user_rooms.setdefault(uid, set()).add(room_id)
+        self._trim_rooms()
+
+    def _save(self):
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"rooms": self._rooms}, f, ensure_ascii=False)
+        tmp_path.replace(self.path)
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def flush(self):
+        """写入尚未保存的改动"""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def observe(self, uid: str, docs: list[dict]) -> int:
+        """
+        记录 UID 在各直播间出现过；docs 为 docs_from_entry / docs_from_live_danmaku 的输出，
+        meta 中带 room_id 与 anchor_name。返回新出现的 (UID, 直播间) 组合数。
+        """
+        spans: dict[str, list] = {}  # 直播间号 -> [最早, 最晚, 主播名]
+        for doc in docs:
+            room_id = str(doc["meta"].get("room_id") or "")
+            if not room_id:
+                continue
+            ts = doc["ts"] or 0
+            span = spans.setdefault(room_id, [ts, ts, ""])
+            span[0], span[1] = min(span[0], ts), max(span[1], ts)
+            span[2] = doc["meta"].get("anchor_name") or span[2]
+        if not spans:
+            return 0
+
+        joined, changed = [], False
+        with self._lock:
+            for room_id, (first, last, anchor) in spans.items():
+                room = self._rooms.setdefault(room_id, {"anchor": "", "last": last, "viewers": {}})
+                room["last"] = max(room["last"], last)
+                if anchor and anchor != room["anchor"]:
+                    room["anchor"] = anchor
+                    changed = True
+                seen = room["viewers"].get(uid)
+                if seen is None:
+                    room["viewers"][uid] = [first, last]
+                    self._user_rooms.setdefault(uid, set()).add(room_id)
+                    joined.append(room_id)
+                    self._trim(room_id, room)
+                elif first < seen[0] or last > seen[1]:
+                    seen[0], seen[1] = min(seen[0], first), max(seen[1], last)
+                    changed = True
+            self._trim_rooms()
+            # 记录过旧时刚写入就会被淘汰，只统计仍保留在索引中的组合
+            added = sum(1 for room_id in joined if uid in self._rooms.get(room_id, {}).get("viewers", ()))
+            if joined or changed:
+                self._dirty = True
+            if self._dirty and time.monotonic() - self._saved_at >= self.save_interval:
+                self._save()
+        return added
+
+    def _trim(self, room_id: str, room: dict):
+        """观众数超过上限时淘汰最久未出现的"""
+        viewers = room["viewers"]
+        if len(viewers) <= self.max_viewers_per_room:
+            return
+        oldest = sorted(viewers, key=lambda uid: viewers[uid][1])[:len(viewers) - self.max_viewers_per_room]
+        for uid in oldest:
+            del viewers[uid]
+            self._forget(uid, room_id)
+
+    def _trim_rooms(self):
+        """直播间数超过上限时淘汰观众最后出现时间最早的直播间"""
+        excess = len(self._rooms) - self.max_rooms
+        if excess <= 0:
+            return
+        for room_id in sorted(self._rooms, key=lambda rid: self._rooms[rid]["last"])[:excess]:
+            for uid in self._rooms.pop(room_id)["viewers"]:
+                self._forget(uid, room_id)
+
+    def _forget(self, uid: str, room_id: str):
+        rooms = self._user_rooms.get(uid)
+        if rooms is not None:
+            rooms.discard(room_id)
+            if not rooms:
+                del self._user_rooms[uid]
+
+    def find_rooms(self, query: str) -> list[tuple[str, str]]:
+        """按直播间号精确匹配，或按主播名（不区分大小写的子串）匹配，返回 [(直播间号, 主播名)]"""
+        with self._lock:
+            if query in self._rooms:
+                return [(query, self._rooms[query]["anchor"])]
+            needle = query.lower()
+            return [(room_id, room["anchor"]) for room_id, room in self._rooms.items() if needle in room["anchor"].lower()]
+
+    def room_report(self, room_id: str, limit: int = 20) -> dict | None:
+        """
+        直播间的已知观众（按最后出现时间倒序）与共同访问最多的其他直播间。
+        共同访问数 = 同时去过两个直播间的已知观众数。
+        """
+        with self._lock:
+            room = self._rooms.get(room_id)
+            if room is None:
+                return None
+            viewers = sorted(room["viewers"].items(), key=lambda item: item[1][1], reverse=True)
+            co_visits = Counter()
+            for uid in room["viewers"]:
+                co_visits.update(self._user_rooms.get(uid, ()))
+            del co_visits[room_id]
+            return {
+                "room_id": room_id,
+                "anchor": room["anchor"],
+                "viewer_count": len(viewers),
+                "viewers": [(uid, first, last) for uid, (first, last) in viewers[:limit]],
+                "co_visited": [
+                    (other, self._rooms[other]["anchor"], shared) for other, shared in co_visits.most_common(limit)
+                ],
+            }
+
+    def rooms_of(self, uid: str) -> set[str]:
+        with self._lock:
+            return set(self._user_rooms.get(uid, ()))
+
+    @property
+    def room_count(self) -> int:
+        return len(self._rooms)
@@ -0,0 +1,265 @@
+"""
+AICU 本地关键词索引
+
+为每个 UID 维护一份倒排索引，覆盖所有查询过的评论、视频弹幕和直播弹幕。
+- 分词：中日韩文字按字符二元组（bigram），字母数字同样切二元组，另外保留单字用于单字查询
+- 候选集取所有词元倒排表的交集，再用子串匹配去掉二元组拼接造成的误命中
+- 文档按 UID 持久化为 JSON，每个 UID 只保留时间最新的 max_docs 条，内存中用 LRU 保留最近使用的索引
+"""
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+_CJK_RANGES = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_TOKEN_RUN_RE = re.compile(rf"[{_CJK_RANGES}]+|[0-9a-z]+")
+
+KIND_NAMES = {"reply": "评论", "danmaku": "视频弹幕", "live": "直播弹幕"}
+MAX_DOCS_PER_USER = 5000  # 每个 UID 默认最多保留的文档数，超过时淘汰时间最早的文档
+
+
+def _runs(text: str) -> list[str]:
+    return _TOKEN_RUN_RE.findall((text or "").lower())
+
+
+def index_tokens(text: str) -> set[str]:
+    """文档分词：单字 + 二元组"""
+    tokens = set()
+    for run in _runs(text):
+        tokens.update(run)
+        tokens.update(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def query_tokens(text: str) -> set[str]:
+    """查询分词：每段连续文字切二元组，单字段落退化为单字"""
+    tokens = set()
+    for run in _runs(text):
+        if len(run) == 1:
+            tokens.add(run)
+        else:
+            tokens.update(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+# ================= 从接口原始数据中提取文档 =================
+def docs_from_replies(reply_raw) -> list[dict]:
+    docs = []
+    if not reply_raw or reply_raw.get('code') != 0:
+        return docs
+    data_block = reply_raw.get('data', {}) or {}
+    if 'replies' not in data_block and isinstance(data_block.get('data'), dict):
+        data_block = data_block['data']
+    for r in data_block.get('replies', []) or []:
+        ts = r.get('time', 0)
+        msg = r.get('message', '')
+        docs.append({
+            "kind": "reply",
+            "key": str(r.get('rpid') or f"{ts}:{msg[:32]}"),
+            "text": msg,
+            "ts": ts,
+            "meta": {},
+        })
+    return docs
+
+
+def docs_from_danmaku(danmaku_raw) -> list[dict]:
+    docs = []
+    if not danmaku_raw or danmaku_raw.get('code') != 0:
+        return docs
+    for item in (danmaku_raw.get('data', {}) or {}).get('videodmlist', []) or []:
+        ts = item.get('ctime', 0)
+        content = item.get('content', '')
+        docs.append({
+            "kind": "danmaku",
+            "key": str(item.get('id') or f"{item.get('oid', '')}:{ts}:{content[:32]}"),
+            "text": content,
+            "ts": ts,
+            "meta": {"video_id": item.get('oid', '')},
+        })
+    return docs
+
+
+def docs_from_live_danmaku(live_raw) -> list[dict]:
+    docs = []
+    if not live_raw or live_raw.get('code') != 0:
+        return docs
+    for room_info in (live_raw.get('data', {}) or {}).get('list', []) or []:
+        room_data = room_info.get('roominfo', {})
+        room_id = room_data.get('roomid', '')
+        meta = {
+            "room_id": room_id,
+            "room_name": room_data.get('roomname', ''),
+            "anchor_name": room_data.get('upname', ''),
+        }
+        for danmaku in room_info.get('danmu', []) or []:
+            ts = danmaku.get('ts', 0)
+            text = danmaku.get('text', '')
+            docs.append({
+                "kind": "live",
+                "key": f"{room_id}:{ts}:{text[:32]}",
+                "text": text,
+                "ts": ts,
+                "meta": meta,
+            })
+    return docs
+
+
+def docs_from_entry(entry_raw) -> list[dict]:
+    """入场记录转为同样的文档结构，ts 为秒级入场时间；不进关键词索引，供直播间索引、活跃度汇总与足迹统计使用"""
+    docs = []
+    if not entry_raw or entry_raw.get('code') != 200:
+        return docs
+    records = ((entry_raw.get('data', {}) or {}).get('data', {}) or {}).get('records', []) or []
+    for record in records:
+        channel = record.get('channel', {})
+        danmakus = record.get('danmakus', [])
+        entry_time = danmakus[0].get('sendDate', 0) if danmakus else 0
+        live = record.get('live', {}) or {}
+        stop_date = live.get('stopDate', 0)
+        docs.append({
+            "kind": "entry",
+            "key": f"{channel.get('roomId', '')}:{entry_time}",
+            "text": live.get('title', ''),
+            "ts": entry_time // 1000,
+            "meta": {
+                "room_id": channel.get('roomId', ''),
+                "anchor_name": channel.get('uName', ''),
+                # 观看时长（分钟）：入场到下播，与 EntryRecord.watch_seconds 口径一致
+                "minutes": max(stop_date - entry_time, 0) // 1000 // 60 if entry_time > 0 and stop_date > 0 else 0,
+            },
+        })
+    return docs
+
+
+# ================= 索引 =================
+class UserIndex:
+    """单个 UID 的文档与倒排表"""
+
+    __slots__ = ("uid", "docs", "keys", "postings", "searched")
+
+    def __init__(self, uid: str, docs: list = None, searched: dict = None):
+        self.uid = uid
+        self.docs: list[dict] = []
+        self.keys: set = set()
+        self.postings: dict[str, list[int]] = {}
+        self.searched: dict[str, float] = searched or {}  # 关键词 -> 上次远程查询时间
+        for doc in docs or []:
+            self.add(doc)
+
+    def add(self, doc: dict) -> bool:
+        doc_key = (doc["kind"], doc["key"])
+        if doc_key in self.keys:
+            return False
+        self.keys.add(doc_key)
+        doc_id = len(self.docs)
+        self.docs.append(doc)
+        for token in index_tokens(doc["text"]):
+            self.postings.setdefault(token, []).append(doc_id)
+        return True
+
+    def trim(self, max_docs: int) -> set:
+        """只保留时间最新的 max_docs 条文档并重建倒排表，返回被淘汰文档的键"""
+        if len(self.docs) <= max_docs:
+            return set()
+        newest = sorted(range(len(self.docs)), key=lambda i: self.docs[i]["ts"] or 0, reverse=True)
+        docs = [self.docs[i] for i in sorted(newest[:max_docs])]
+        evicted = {(self.docs[i]["kind"], self.docs[i]["key"]) for i in newest[max_docs:]}
+        self.docs, self.keys, self.postings = [], set(), {}
+        for doc in docs:
+            self.add(doc)
+        return evicted
+
+    def search(self, keyword: str) -> list[dict]:
+        needle = keyword.lower()
+        tokens = query_tokens(keyword)
+        if tokens:
+            # 从最短的倒排表开始求交集
+            lists = sorted((self.postings.get(t, []) for t in tokens), key=len)
+            candidates = set(lists[0])
+            for posting in lists[1:]:
+                if not candidates:
+                    break
+                candidates.intersection_update(posting)
+            docs = (self.docs[i] for i in candidates)
+        else:
+            # 纯符号关键词无法分词，退化为全量扫描
+            docs = iter(self.docs)
+        hits = [doc for doc in docs if needle in (doc["text"] or "").lower()]
+        hits.sort(key=lambda d: d["ts"] or 0, reverse=True)
+        return hits
+
+
+class SearchIndex:
+    """按 UID 持久化的关键词索引，线程安全，可在线程池中调用"""
+
+    def __init__(self, root: Path, max_cached_users: int = 64, max_docs: int = MAX_DOCS_PER_USER):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_cached_users = max_cached_users
+        self.max_docs = max(max_docs, 1)
+        self._cache: OrderedDict[str, UserIndex] = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _path(self, uid: str) -> Path:
+        return self.root / f"{uid}.json"
+
+    def _get(self, uid: str) -> UserIndex:
+        index = self._cache.get(uid)
+        if index is not None:
+            self._cache.move_to_end(uid)
+            return index
+
+        path = self._path(uid)
+        docs, searched = [], {}
+        if path.exists():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    stored = json.load(f)
+                docs = stored.get("docs", [])
+                searched = stored.get("searched", {})
+            except (OSError, ValueError):
+                docs, searched = [], {}
+
+        index = UserIndex(uid, docs, searched)
+        index.trim(self.max_docs)
+        self._cache[uid] = index
+        while len(self._cache) > self.max_cached_users:
+            self._cache.popitem(last=False)
+        return index
+
+    def _save(self, index: UserIndex):
+        path = self._path(index.uid)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"uid": index.uid, "docs": index.docs, "searched": index.searched}, f, ensure_ascii=False)
+        tmp_path.replace(path)
+
+    def add(self, uid: str, docs: list[dict], keyword: str = None) -> int:
+        """
+        写入文档，返回新增数量；keyword 非空时同时记录该关键词已远程查询过。
+        超过 max_docs 时淘汰时间最早的文档，写入后随即被淘汰的旧文档不计入新增，也不触发保存
+        """
+        with self._lock:
+            index = self._get(uid)
+            new_keys = [(doc["kind"], doc["key"]) for doc in docs if index.add(doc)]
+            evicted = index.trim(self.max_docs)
+            added = sum(1 for key in new_keys if key not in evicted)
+            if keyword:
+                index.searched[keyword.lower()] = time.time()
+            if added or keyword:
+                self._save(index)
+            return added
+
+    def recently_searched(self, uid: str, keyword: str, ttl: float) -> bool:
+        with self._lock:
+            searched_at = self._get(uid).searched.get(keyword.lower(), 0)
+            return time.time() - searched_at < ttl
+
+    def search(self, uid: str, keyword: str) -> tuple[list[dict], int]:
+        """返回 (命中文档, 该 UID 已索引文档数)"""
+        with self._lock:
+            index = self._get(uid)
+            return index.search(keyword), len(index.docs)
@@ -0,0 +1,232 @@
+"""
+AICU 统计引擎
+
+评论 / 视频弹幕 / 直播弹幕 / 入场 四个解析器共用的统计逻辑。
+解析阶段只向 StatColumns 追加时间戳、长度、房间号等原始值（紧凑的列式数组），
+再由 summarize() 一次性批量计算：
+- 24 小时 / 星期分布（每条记录按其所在时刻的本地时区换算，夏令时前后各自正确）
+- 长度均值与分位数
+- Top-K（房间、主播、视频等）
+- 活跃天数与最长连续活跃天数
+
+安装了 NumPy 时走向量化路径，否则退化为纯 Python 实现，两者结果一致。
+NumPy 在第一次统计时才导入，不计入插件加载耗时。
+"""
+import time
+from array import array
+from collections import Counter
+
+_numpy = None  # None 为尚未尝试导入，False 为未安装
+
+
+def _np():
+    """NumPy 为可选依赖：首次调用时导入并缓存模块，未安装时返回 None"""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy = numpy
+    return _numpy or None
+
+WEEKDAY_NAMES = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
+
+# 1970-01-01 是周四（周一 = 0）
+_EPOCH_WEEKDAY = 3
+
+
+class StatColumns:
+    """列式统计缓冲区：每条记录只追加几个数值，不构造中间对象"""
+
+    __slots__ = ("timestamps", "lengths", "key_names", "keys")
+
+    def __init__(self, *key_names: str):
+        self.timestamps = array("d")  # 秒级时间戳，<=0 表示未知
+        self.lengths = array("q")     # 文本长度 / 时长等数值
+        self.key_names = key_names
+        self.keys: tuple[list, ...] = tuple([] for _ in key_names)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def add(self, ts, length: int = 0, *keys):
+        """追加一条记录，keys 的顺序与构造时的 key_names 一致"""
+        self.timestamps.append(ts or 0)
+        self.lengths.append(length or 0)
+        for column, value in zip(self.keys, keys):
+            column.append(value)
+
+    def key_column(self, name: str) -> list:
+        return self.keys[self.key_names.index(name)]
+
+
+# 时区偏移只在整刻钟处变化（夏令时切换、时区调整），同一刻钟内的记录共用一次换算
+_OFFSET_STEP = 900
+
+
+def _utc_offset(ts: int) -> int:
+    """该时刻本地时区相对 UTC 的偏移（秒）；夏令时前后不同，需按每条记录的时间换算"""
+    return time.localtime(ts).tm_gmtoff
+
+
+def _empty_summary(columns: StatColumns) -> dict:
+    return {
+        "count": 0,
+        "active_hour": "N/A",
+        "active_weekday": "N/A",
+        "hour_hist": [0] * 24,
+        "weekday_hist": [0] * 7,
+        "avg_length": 0,
+        "total_length": 0,
+        "length_percentiles": {"p50": 0, "p90": 0, "p99": 0},
+        "active_days": 0,
+        "max_streak": 0,
+        "first_ts": 0,
+        "last_ts": 0,
+        "top": {name: [] for name in columns.key_names},
+        "distinct": {name: 0 for name in columns.key_names},
+    }
+
+
+def _longest_run(sorted_days) -> int:
+    """已排序去重的日序号中，最长的连续天数"""
+    best = run = 0
+    prev = None
+    for day in sorted_days:
+        run = run + 1 if prev is not None and day == prev + 1 else 1
+        best = max(best, run)
+        prev = day
+    return best
+
+
+def _percentile(sorted_values, q: float) -> float:
+    """线性插值分位数，与 numpy.percentile 默认行为一致"""
+    if not sorted_values:
+        return 0
+    pos = (len(sorted_values) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def _time_stats_numpy(timestamps):
+    np = _np()
+    raw = np.frombuffer(timestamps, dtype=np.float64)
+    raw = raw[raw > 0].astype(np.int64)
+    if raw.size == 0:
+        return None
+    # 按刻钟去重后逐个查询本地偏移，再映射回每条记录
+    quarters, inverse = np.unique(raw // _OFFSET_STEP, return_inverse=True)
+    offsets = np.fromiter((_utc_offset(int(q) * _OFFSET_STEP) for q in quarters), dtype=np.int64, count=quarters.size)
+    ts = raw + offsets[inverse.reshape(-1)]
+    days = ts // 86400
+    hour_hist = np.bincount((ts // 3600) % 24, minlength=24)
+    weekday_hist = np.bincount((days + _EPOCH_WEEKDAY) % 7, minlength=7)
+    unique_days = np.unique(days)
+    if unique_days.size > 1:
+        breaks = np.flatnonzero(np.diff(unique_days) != 1)
+        bounds = np.concatenate(([-1], breaks, [unique_days.size - 1]))
+        max_streak = int(np.diff(bounds).max())
+    else:
+        max_streak = int(unique_days.size)
+    return (
+        hour_hist.tolist(), weekday_hist.tolist(), int(unique_days.size), max_streak,
+        int(raw.min()), int(raw.max()),
+    )
+
+
+def _time_stats_python(timestamps):
+    hour_hist = [0] * 24
+    weekday_hist = [0] * 7
+    days = set()
+    offsets: dict[int, int] = {}  # 刻钟 -> 本地偏移
+    first = last = None
+    for raw in timestamps:
+        if raw <= 0:
+            continue
+        ts = int(raw)
+        quarter = ts // _OFFSET_STEP
+        offset = offsets.get(quarter)
+        if offset is None:
+            offset = offsets[quarter] = _utc_offset(quarter * _OFFSET_STEP)
+        local = ts + offset
+        day = local // 86400
+        hour_hist[(local // 3600) % 24] += 1
+        weekday_hist[(day + _EPOCH_WEEKDAY) % 7] += 1
+        days.add(day)
+        first = ts if first is None else min(first, ts)
+        last = ts if last is None else max(last, ts)
+    if first is None:
+        return None
+    return hour_hist, weekday_hist, len(days), _longest_run(sorted(days)), first, last
+
+
+def _length_stats(lengths):
+    np = _np()
+    if np is not None:
+        values = np.frombuffer(lengths, dtype=np.int64)
+        p50, p90, p99 = np.percentile(values, [50, 90, 99]).tolist()
+        return float(values.mean()), int(values.sum()), p50, p90, p99
+    values = sorted(lengths)
+    total = sum(values)
+    return (
+        total / len(values), total,
+        _percentile(values, 50), _percentile(values, 90), _percentile(values, 99),
+    )
+
+
+def summarize(columns: StatColumns, top_k: int = 5) -> dict:
+    """对列式缓冲区做一次性批量统计"""
+    if not len(columns):
+        return _empty_summary(columns)
+
+    summary = _empty_summary(columns)
+    summary["count"] = len(columns)
+
+    time_stats = (_time_stats_numpy if _np() is not None else _time_stats_python)(columns.timestamps)
+    if time_stats:
+        hour_hist, weekday_hist, active_days, max_streak, first_ts, last_ts = time_stats
+        summary.update({
+            "hour_hist": hour_hist,
+            "weekday_hist": weekday_hist,
+            # 与旧实现一致，活跃时段输出两位小时字符串，如 "08"
+            "active_hour": f"{hour_hist.index(max(hour_hist)):02d}",
+            "active_weekday": WEEKDAY_NAMES[weekday_hist.index(max(weekday_hist))],
+            "active_days": active_days,
+            "max_streak": max_streak,
+            "first_ts": first_ts,
+            "last_ts": last_ts,
+        })
+
+    avg, total, p50, p90, p99 = _length_stats(columns.lengths)
+    summary["avg_length"] = round(avg, 1)
+    summary["total_length"] = total
+    summary["length_percentiles"] = {"p50": round(p50, 1), "p90": round(p90, 1), "p99": round(p99, 1)}
+
+    for name, column in zip(columns.key_names, columns.keys):
+        counts = Counter(column)
+        summary["top"][name] = counts.most_common(top_k)
+        summary["distinct"][name] = len(counts)
+
+    return summary
+
+
+def top_key(summary: dict, name: str, default=None):
+    """取某一维度出现次数最多的键"""
+    top = summary["top"].get(name) or []
+    return top[0][0] if top else default
+
+
+def merge_histograms(summaries: list[dict]) -> dict:
+    """合并多个来源的小时/星期分布（如评论 + 弹幕 + 入场）"""
+    hour_hist = [sum(counts) for counts in zip(*(s["hour_hist"] for s in summaries))] or [0] * 24
+    weekday_hist = [sum(counts) for counts in zip(*(s["weekday_hist"] for s in summaries))] or [0] * 7
+    active = any(hour_hist)
+    return {
+        "hour_hist": hour_hist,
+        "weekday_hist": weekday_hist,
+        "active_hour": f"{hour_hist.index(max(hour_hist)):02d}" if active else "N/A",
+        "active_weekday": WEEKDAY_NAMES[weekday_hist.index(max(weekday_hist))] if active else "N/A",
+        "last_ts": max((s["last_ts"] for s in summaries), default=0),
+    }
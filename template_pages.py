@@ -0,0 +1,108 @@
+"""
+AICU 常驻模板页面
+
+模板的 <head>（全部内联 CSS）不含任何数据，每次 set_content 都让 Chromium 重新解析样式、
+重新加载背景图与字体。TemplatePages 为每个模板保留若干已加载 <head> 的常驻页面，
+渲染时只把 Jinja 输出的 <body> 片段通过 page.evaluate 注入，等图片加载后截图：
+样式解析、字体与背景图只在页面创建时处理一次。
+
+模板仍由插件用 Jinja 在服务端渲染（格式化过滤器、记录类都在 Python 侧），
+页面内的注入脚本只负责替换 DOM 并等待图片，因此常驻页面始终开启 JavaScript，
+其余页面参数与一次性渲染页相同（见 render_worker.page_options）。
+"""
+import asyncio
+import hashlib
+
+from .render_worker import page_options
+
+# 替换 body 内容并等待新图片加载完成；头像加载失败时 onerror 会换成默认头像，再等一轮
+INJECT_SCRIPT = """
+async (body) => {
+    document.body.innerHTML = body;
+    for (let round = 0; round < 3; round++) {
+        const pending = Array.from(document.images).filter(img => !img.complete);
+        if (!pending.length) break;
+        await Promise.all(pending.map(img => new Promise(resolve => {
+            img.addEventListener('load', resolve, {once: true});
+            img.addEventListener('error', resolve, {once: true});
+        })));
+    }
+    await document.fonts.ready;
+}
+"""
+
+
+def split_document(html: str) -> tuple[str, str]:
+    """拆成 (body 之前的外壳, body 内容)；没有 body 标签时返回 ("", html)"""
+    start = html.find("<body>")
+    end = html.rfind("</body>")
+    if start < 0 or end < start:
+        return "", html
+    return html[:start], html[start + len("<body>"):end]
+
+
+class TemplatePages:
+    """按 (模板, 外壳内容) 缓存常驻页面，每个键最多保留 max_idle 个空闲页面"""
+
+    def __init__(self, max_idle: int = 1, profile: str = "lean"):
+        self.max_idle = max(1, max_idle)
+        self.profile = profile
+        self._idle: dict[tuple[str, str], list] = {}
+
+    async def _new_page(self, browser, head: str, viewport: dict, timeout_ms: int):
+        page = await browser.new_page(**page_options(viewport, self.profile, javascript=True))
+        try:
+            await page.set_content(f"{head}<body></body></html>", wait_until="networkidle", timeout=timeout_ms)
+        except Exception:
+            await page.close()
+            raise
+        return page
+
+    async def render(self, browser, template_name: str, html: str, viewport: dict, timeout_ms: int,
+                     path: str) -> bool:
+        """
+        在常驻页面中截图，返回是否复用了已有页面。
+        页面出错时直接关闭，不放回空闲列表。
+        """
+        head, body = split_document(html)
+        if not head:
+            raise ValueError(f"{template_name} 缺少 <body> 标签，无法注入")
+        key = (template_name, hashlib.blake2b(head.encode(), digest_size=8).hexdigest())
+        idle = self._idle.get(key)
+        reused = bool(idle)
+        page = idle.pop() if idle else await self._new_page(browser, head, viewport, timeout_ms)
+
+        try:
+            await asyncio.wait_for(page.evaluate(INJECT_SCRIPT, body), timeout=timeout_ms / 1000)
+            try:
+                await page.locator(".container").screenshot(path=path)
+            except Exception:
+                await page.screenshot(path=path, full_page=True)
+        except BaseException:
+            await self._close_page(page)
+            raise
+
+        idle = self._idle.setdefault(key, [])
+        if len(idle) < self.max_idle:
+            idle.append(page)
+        else:
+            await self._close_page(page)
+        return reused
+
+    @staticmethod
+    async def _close_page(page):
+        try:
+            await page.close()
+        except Exception:
+            pass
+
+    async def clear(self):
+        """关闭全部常驻页面（浏览器关闭或重启前调用）"""
+        idle, self._idle = self._idle, {}
+        for pages in idle.values():
+            for page in pages:
+                await self._close_page(page)
+
+    @property
+    def idle_count(self) -> int:
+        return sum(len(pages) for pages in self._idle.values())
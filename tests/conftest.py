@@ -0,0 +1,14 @@
+"""
+插件目录本身就是包（模块之间用相对导入），测试时把它注册为 aicu 包，
+只导入被测的纯 Python 模块，不需要安装 AstrBot、curl_cffi 与 Playwright。
+"""
+import sys
+import types
+from pathlib import Path
+
+PLUGIN_DIR = Path(__file__).resolve().parent.parent
+
+if "aicu" not in sys.modules:
+    package = types.ModuleType("aicu")
+    package.__path__ = [str(PLUGIN_DIR)]
+    sys.modules["aicu"] = package
@@ -0,0 +1,173 @@
+import asyncio
+import types
+
+import pytest
+
+from aicu import cache
+from aicu.cache import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    # 只替换 cache 模块看到的时钟，事件循环仍用真实时间
+    monkeypatch.setattr(cache, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def counting_fetch(result="v", delay=0.0):
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return result
+
+    return fetch, calls
+
+
+def test_entries_expire_after_ttl(clock):
+    ttl_cache = TTLCache()
+    ttl_cache.set("k", "v", ttl=10)
+    assert ttl_cache.get("k") == (True, "v")
+    clock[0] += 10
+    assert ttl_cache.get("k") == (False, None)
+
+
+def test_non_positive_ttl_is_not_stored(clock):
+    ttl_cache = TTLCache()
+    ttl_cache.set("k", "v", ttl=0)
+    assert ttl_cache.get("k") == (False, None)
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    ttl_cache = TTLCache(maxsize=2)
+    ttl_cache.set("a", 1, ttl=10)
+    ttl_cache.set("b", 2, ttl=10)
+    ttl_cache.get("a")
+    ttl_cache.set("c", 3, ttl=10)
+    assert ttl_cache.get("b") == (False, None)
+    assert ttl_cache.get("a") == (True, 1)
+
+
+def test_concurrent_fetches_are_coalesced(clock):
+    ttl_cache = TTLCache()
+    fetch, calls = counting_fetch(delay=0.01)
+
+    async def main():
+        return await asyncio.gather(*(ttl_cache.get_or_fetch("k", 10, fetch) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["v"] * 5
+    assert len(calls) == 1
+    assert (ttl_cache.hits, ttl_cache.misses) == (4, 1)
+
+
+def test_none_results_are_not_cached(clock):
+    ttl_cache = TTLCache()
+    fetch, calls = counting_fetch(result=None)
+
+    async def main():
+        await ttl_cache.get_or_fetch("k", 10, fetch)
+        await ttl_cache.get_or_fetch("k", 10, fetch)
+
+    asyncio.run(main())
+    assert len(calls) == 2
+
+
+def test_callable_ttl_sees_the_result(clock):
+    ttl_cache = TTLCache()
+    fetch, _ = counting_fetch(result={"code": -404})
+
+    async def main():
+        await ttl_cache.get_or_fetch("k", lambda value: 5 if value["code"] else 60, fetch)
+
+    asyncio.run(main())
+    clock[0] += 5
+    assert ttl_cache.get("k") == (False, None)
+
+
+def test_fetch_errors_reach_every_waiter_and_are_not_cached(clock):
+    ttl_cache = TTLCache()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def main():
+        results = await asyncio.gather(
+            *(ttl_cache.get_or_fetch("k", 10, fail) for _ in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert ttl_cache.get("k") == (False, None)
+
+    asyncio.run(main())
+
+
+def test_stale_entry_is_served_while_one_refresh_runs(clock):
+    ttl_cache = TTLCache()
+    ttl_cache.set("k", "old", ttl=10, stale=60)
+    clock[0] += 10
+    assert ttl_cache.get("k") == (False, None)
+    fetch, calls = counting_fetch(result="new", delay=0.01)
+
+    async def main():
+        first = await ttl_cache.get_or_fetch("k", 10, fetch, stale=60)
+        second = await ttl_cache.get_or_fetch("k", 10, fetch, stale=60)
+        await asyncio.gather(*ttl_cache._refreshing.values())
+        return first, second
+
+    assert asyncio.run(main()) == ("old", "old")
+    assert len(calls) == 1
+    assert ttl_cache.stale_hits == 2
+    assert ttl_cache.get("k") == (True, "new")
+
+
+def test_failed_refresh_keeps_the_stale_value(clock):
+    ttl_cache = TTLCache()
+    ttl_cache.set("k", "old", ttl=10, stale=60)
+    clock[0] += 10
+
+    async def fail():
+        raise RuntimeError("boom")
+
+    async def main():
+        assert await ttl_cache.get_or_fetch("k", 10, fail, stale=60) == "old"
+        await asyncio.gather(*ttl_cache._refreshing.values())
+        return await ttl_cache.get_or_fetch("k", 10, fail, stale=60)
+
+    assert asyncio.run(main()) == "old"
+
+
+def test_fetch_blocks_once_the_stale_window_has_passed(clock):
+    ttl_cache = TTLCache()
+    ttl_cache.set("k", "old", ttl=10, stale=60)
+    clock[0] += 70
+    fetch, calls = counting_fetch(result="new")
+    assert asyncio.run(ttl_cache.get_or_fetch("k", 10, fetch, stale=60)) == "new"
+    assert len(calls) == 1
+
+
+def test_callable_stale_window(clock):
+    ttl_cache = TTLCache()
+    fetch, _ = counting_fetch(result={"code": -404})
+    asyncio.run(ttl_cache.get_or_fetch("k", 10, fetch, stale=lambda value: 0 if value["code"] else 60))
+    clock[0] += 10
+    assert ttl_cache._lookup("k") == (None, None)
+
+
+def test_cancel_refreshes(clock):
+    ttl_cache = TTLCache()
+    ttl_cache.set("k", "old", ttl=10, stale=60)
+    clock[0] += 10
+    fetch, _ = counting_fetch(result="new", delay=10)
+
+    async def main():
+        await ttl_cache.get_or_fetch("k", 10, fetch, stale=60)
+        tasks = list(ttl_cache._refreshing.values())
+        ttl_cache.cancel_refreshes()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return tasks
+
+    tasks = asyncio.run(main())
+    assert tasks and all(task.cancelled() for task in tasks)
+    assert not ttl_cache._refreshing
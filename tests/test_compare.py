@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+from aicu.compare import compare_footprints, cosine, footprint, jaccard
+
+
+@pytest.fixture(autouse=True)
+def utc(monkeypatch):
+    monkeypatch.setenv("TZ", "UTC")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def live(ts, room_id, anchor):
+    return {"kind": "live", "key": f"{room_id}:{ts}", "text": "", "ts": ts,
+            "meta": {"room_id": room_id, "anchor_name": anchor}}
+
+
+def danmaku(ts, video_id):
+    return {"kind": "danmaku", "key": f"{video_id}:{ts}", "text": "", "ts": ts, "meta": {"video_id": video_id}}
+
+
+def mark(devices=(), names=()):
+    return {"code": 0, "data": {"device": [{"name": name} for name in devices], "hname": list(names)}}
+
+
+def test_footprint_counts_rooms_anchors_videos_and_hours():
+    docs = [live(3600, 1, "甲"), live(3600 * 2, 1, "甲"), live(3600 * 2, 2, ""), danmaku(3600 * 25, "BV1")]
+    result = footprint(docs, mark(["iPhone"], ["旧名"]))
+    assert result["rooms"] == {"1": 2, "2": 1}
+    assert result["anchors"] == {"甲": 2}
+    assert result["videos"] == {"BV1": 1}
+    assert result["room_anchor"] == {"1": "甲"}
+    assert result["record_count"] == 4
+    assert result["hour_hist"][1] == 2 and result["hour_hist"][2] == 2
+    assert result["devices"] == {"iPhone"}
+    assert result["history_names"] == {"旧名"}
+
+
+def test_footprint_tolerates_missing_or_malformed_marks():
+    assert footprint([], None)["devices"] == set()
+    assert footprint([], {"code": 0, "data": []})["history_names"] == set()
+    assert footprint([], {"code": -1})["devices"] == set()
+
+
+def test_jaccard_and_cosine_edge_cases():
+    assert jaccard(set(), set()) == 0.0
+    assert jaccard({1, 2}, {2, 3}) == pytest.approx(1 / 3)
+    assert cosine([0, 0], [1, 1]) == 0.0
+    assert cosine([1, 2], [2, 4]) == pytest.approx(1.0)
+
+
+def test_compare_ranks_shared_items_by_the_smaller_count():
+    a = footprint(
+        [live(3600, 1, "甲")] * 5 + [live(3600, 2, "乙")] * 2 + [danmaku(3600, "BV1")],
+        mark(["iPhone", "PC"], ["小明"]),
+    )
+    b = footprint(
+        [live(3600, 1, "甲")] + [live(3600, 2, "乙")] * 3 + [live(3600, 3, "丙")],
+        mark(["PC"], ["小明", "小红"]),
+    )
+    result = compare_footprints(a, b, top_k=5)
+    assert result["rooms"] == [("2", "乙", 2, 3), ("1", "甲", 5, 1)]
+    assert result["anchors"] == [("乙", 2, 3), ("甲", 5, 1)]
+    assert result["videos"] == []
+    assert result["shared_counts"] == {"rooms": 2, "anchors": 2, "videos": 0}
+    assert result["similarity"]["rooms"] == pytest.approx(2 / 3)
+    assert result["similarity"]["hours"] == pytest.approx(1.0)
+    assert result["devices"] == ["PC"]
+    assert result["history_names"] == ["小明"]
+
+
+def test_top_k_limits_shared_lists():
+    a = footprint([live(3600, room, "") for room in range(1, 11)])
+    b = footprint([live(3600, room, "") for room in range(1, 11)])
+    result = compare_footprints(a, b, top_k=3)
+    assert len(result["rooms"]) == 3
+    assert result["shared_counts"]["rooms"] == 10
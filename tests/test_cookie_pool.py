@@ -0,0 +1,107 @@
+import pytest
+
+from aicu import cookie_pool
+from aicu.cookie_pool import CookiePool
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cookie_pool.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_deduplicates_and_labels_by_index():
+    pool = CookiePool(["a=1", " a=1 ", "", "b=2"])
+    assert [lease.label for lease in pool.leases] == ["#1", "#2"]
+    assert [lease.cookie for lease in pool.leases] == ["a=1", "b=2"]
+
+
+def test_empty_pool_is_falsy():
+    pool = CookiePool(["", ""])
+    assert not pool
+    assert pool.acquire() is None
+
+
+def test_acquire_rotates_least_recently_used(clock):
+    pool = CookiePool(["a", "b", "c"])
+    labels = []
+    for _ in range(6):
+        labels.append(pool.acquire().label)
+        clock[0] += 1
+    assert labels == ["#1", "#2", "#3", "#1", "#2", "#3"]
+
+
+@pytest.mark.parametrize("status, data, verdict", [
+    (200, {"code": 0}, "ok"),
+    (429, None, "throttled"),
+    (412, None, "throttled"),
+    (200, {"code": -412}, "throttled"),
+    (403, None, "challenged"),
+    (401, None, "rejected"),
+    (200, {"code": -101}, "rejected"),
+    (500, None, "error"),
+    (None, None, "error"),
+])
+def test_classify(status, data, verdict):
+    assert CookiePool.classify(status, data) == verdict
+
+
+def test_throttled_cookie_cools_down_with_backoff(clock):
+    pool = CookiePool(["a", "b"], cooldown=10, max_cooldown=25)
+    lease = pool.acquire()
+    pool.report(lease, 429, None)
+    assert lease.down_until == 1010
+    pool.report(lease, 429, None)
+    assert lease.down_until == 1020
+    pool.report(lease, 429, None)
+    assert lease.down_until == 1025  # 封顶 max_cooldown
+    assert pool.healthy_count() == 1
+    clock[0] += 1
+    assert pool.acquire().label == "#2"
+
+    pool.report(lease, 200, {"code": 0})
+    assert lease.strikes == 0
+
+
+def test_cloudflare_challenge_leaves_the_account_alone(clock):
+    pool = CookiePool(["a", "b"], cooldown=10)
+    lease = pool.acquire()
+    assert pool.report(lease, 403, None) == "challenged"
+    assert (lease.down_until, lease.strikes, lease.throttled) == (0, 0, 0)
+    assert pool.healthy_count() == 2
+
+
+def test_all_cooling_picks_earliest_recovery(clock):
+    pool = CookiePool(["a", "b"], cooldown=10)
+    first, second = pool.acquire(), pool.acquire()
+    pool.report(first, 429, None)
+    pool.report(first, 429, None)  # 冷却 20 秒
+    pool.report(second, 429, None)  # 冷却 10 秒
+    assert pool.acquire() is second
+
+
+def test_rejected_cookie_cools_down_and_comes_back(clock):
+    pool = CookiePool(["a", "b"], auth_cooldown=600)
+    lease = pool.acquire()
+    assert pool.report(lease, 200, {"code": -101}) == "rejected"
+    assert pool.summary()["rejected"] == 1
+    assert pool.acquire().label == "#2"
+    assert pool.acquire().label == "#2"
+
+    clock[0] += 600
+    assert pool.healthy_count() == 2
+    assert pool.acquire() is lease
+    pool.report(lease, 200, {"code": 0})
+    assert not lease.rejected
+    assert pool.summary()["rejected"] == 0
+
+
+def test_last_rejected_cookie_is_still_used(clock):
+    pool = CookiePool(["a"], auth_cooldown=600)
+    lease = pool.acquire()
+    pool.report(lease, 401, None)
+    assert pool
+    assert pool.healthy_count() == 0
+    # 所有账号都暂停时仍取最早恢复的一个重新校验，不退化为不带 Cookie
+    assert pool.acquire() is lease
@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+
+from aicu.endpoints import EndpointRouter
+from aicu.metrics import Metrics
+
+A, B = "http://a/{uid}", "http://b/{uid}"
+
+
+def fake_upstream(latencies: dict, results: dict = None):
+    """按地址模拟延迟；记录发出的请求与被取消的请求"""
+    calls, cancelled = [], []
+
+    async def fetch(url, timeout):
+        calls.append(url)
+        try:
+            await asyncio.sleep(latencies[url])
+        except asyncio.CancelledError:
+            cancelled.append(url)
+            raise
+        return (results or {}).get(url, {"from": url})
+
+    return fetch, calls, cancelled
+
+
+def router_with_samples(name: str, seconds: float, count: int, **kwargs) -> EndpointRouter:
+    router = EndpointRouter(metrics=Metrics(), **kwargs)
+    for _ in range(count):
+        router.observe(name, seconds)
+    return router
+
+
+def hedges(router: EndpointRouter, name: str) -> dict:
+    return {value: n for (stage, label, value), n in router.metrics.counters.items() if stage == "hedge" and label == name}
+
+
+def test_hedge_fires_for_a_slow_primary_and_cancels_the_loser():
+    router = EndpointRouter(metrics=Metrics())
+    fetch, calls, cancelled = fake_upstream({"http://a/1": 1.0, "http://b/1": 0.01})
+
+    async def main():
+        return await router.call("reply", [A, B], fetch, timeout=5, hedge_delay=0.02, url_args={"uid": 1})
+
+    assert asyncio.run(main()) == {"from": "http://b/1"}
+    assert calls == ["http://a/1", "http://b/1"]
+    assert cancelled == ["http://a/1"]
+    assert hedges(router, "reply") == {"fired": 1, "backup_won": 1}
+    # 被取消的主请求既不计入延迟，也不算失败
+    assert router.latency(A) is None and not router.cooling(A)
+
+
+def test_fast_primary_does_not_hedge():
+    router = EndpointRouter(metrics=Metrics())
+    fetch, calls, _ = fake_upstream({"http://a/1": 0.0, "http://b/1": 0.0})
+
+    async def main():
+        return await router.call("reply", [A, B], fetch, timeout=5, hedge_delay=0.2, url_args={"uid": 1})
+
+    assert asyncio.run(main()) == {"from": "http://a/1"}
+    assert calls == ["http://a/1"]
+    assert hedges(router, "reply") == {}
+
+
+def test_cooling_backup_is_not_hedged():
+    router = EndpointRouter(metrics=Metrics())
+    router.record(B, 0.1, ok=False)
+    fetch, calls, _ = fake_upstream({"http://a/1": 0.05, "http://b/1": 0.0})
+
+    async def main():
+        # 冷却中的 B 排在后面，主请求仍是 A
+        return await router.call("reply", [B, A], fetch, timeout=5, hedge_delay=0.01, url_args={"uid": 1})
+
+    assert asyncio.run(main()) == {"from": "http://a/1"}
+    assert calls == ["http://a/1"]
+    assert hedges(router, "reply") == {"skipped_cooling": 1}
+
+
+def test_failed_primary_falls_through_to_the_mirror():
+    router = EndpointRouter(metrics=Metrics())
+    fetch, calls, _ = fake_upstream({"http://a/1": 0.0, "http://b/1": 0.0}, {"http://a/1": None})
+
+    async def main():
+        return await router.call("reply", [A, B], fetch, timeout=5, url_args={"uid": 1})
+
+    assert asyncio.run(main()) == {"from": "http://b/1"}
+    assert calls == ["http://a/1", "http://b/1"]
+    assert router.cooling(A)
+    assert router.order([A, B]) == [B, A]
+
+
+def test_hedge_delay_uses_p95_only_after_min_samples():
+    router = router_with_samples("reply", 0.5, 19, min_samples=20)
+    assert router.hedge_delay("reply", default=1.5) == 1.5
+    router.observe("reply", 0.5)
+    assert router.hedge_delay("reply", default=1.5) == pytest.approx(0.5)
+    # 极快的接口不会把对冲延迟压到 0
+    assert router_with_samples("card", 0.001, 20).hedge_delay("card", default=1.5) == 0.05
+
+
+def test_p95_hedge_delay_triggers_the_backup():
+    # 历史成功耗时都在 20ms 左右，这次主请求卡住，p95 之后即发出对冲请求
+    router = router_with_samples("reply", 0.02, 20)
+    fetch, calls, cancelled = fake_upstream({"http://a/1": 1.0, "http://b/1": 0.0})
+
+    async def main():
+        delay = router.hedge_delay("reply", default=10)
+        return await router.call("reply", [A, B], fetch, timeout=5, hedge_delay=delay, url_args={"uid": 1})
+
+    assert asyncio.run(main()) == {"from": "http://b/1"}
+    assert cancelled == ["http://a/1"]
+
+
+def test_below_min_samples_the_default_delay_keeps_the_hedge_back():
+    router = router_with_samples("reply", 0.02, 5)
+    fetch, calls, _ = fake_upstream({"http://a/1": 0.1, "http://b/1": 0.0})
+
+    async def main():
+        delay = router.hedge_delay("reply", default=1.0)
+        return await router.call("reply", [A, B], fetch, timeout=5, hedge_delay=delay, url_args={"uid": 1})
+
+    assert asyncio.run(main()) == {"from": "http://a/1"}
+    assert calls == ["http://a/1"]
+    assert hedges(router, "reply") == {}
+
+
+def test_adaptive_timeout_follows_p99_within_bounds():
+    assert router_with_samples("reply", 1.0, 5).adaptive_timeout("reply", ceiling=10, factor=3, floor=2) == 10
+    assert router_with_samples("reply", 1.0, 20).adaptive_timeout("reply", ceiling=10, factor=3, floor=2) == 3
+    assert router_with_samples("reply", 0.1, 20).adaptive_timeout("reply", ceiling=10, factor=3, floor=2) == 2
+    assert router_with_samples("reply", 5.0, 20).adaptive_timeout("reply", ceiling=10, factor=3, floor=2) == 10
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from aicu.jsonstream import STREAM_ARRAYS, ArrayStreamDecoder, project_live_room
+
+
+def decode(payload: bytes, key: str, project=None, chunk_size: int = None) -> dict:
+    decoder = ArrayStreamDecoder(key, project)
+    chunk_size = chunk_size or len(payload)
+    for i in range(0, len(payload), chunk_size):
+        decoder.feed(payload[i:i + chunk_size])
+    return decoder.close()
+
+
+REPLY_RESPONSE = {
+    "code": 0,
+    "data": {
+        "cursor": {"all_count": 3, "is_end": True},
+        "replies": [
+            {"rpid": 1, "message": "第一条，带\"引号\"和 ]", "time": 100, "rank": 1, "dyn": {"x": [1, 2]}},
+            {"rpid": 2, "message": "emoji 😀", "time": 200, "rank": 2},
+            {"rpid": 3, "message": "", "time": 300, "rank": 3},
+        ],
+        "after": "tail",
+    },
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, None])
+def test_matches_json_loads_for_any_chunking(chunk_size):
+    payload = json.dumps(REPLY_RESPONSE, ensure_ascii=False).encode("utf-8")
+    assert decode(payload, "replies", chunk_size=chunk_size) == REPLY_RESPONSE
+
+
+def test_projection_keeps_only_listed_fields():
+    key, project = STREAM_ARRAYS["reply"]
+    payload = json.dumps(REPLY_RESPONSE).encode("utf-8")
+    result = decode(payload, key, project, chunk_size=5)
+    assert result["data"]["replies"][0] == {"rpid": 1, "message": "第一条，带\"引号\"和 ]", "time": 100, "rank": 1}
+    assert result["data"]["cursor"] == REPLY_RESPONSE["data"]["cursor"]
+
+
+def test_live_rooms_are_projected_with_their_danmaku():
+    room = {"roominfo": {"roomid": 7, "roomname": "r", "upname": "u", "cover": "x"},
+            "danmu": [{"ts": 1, "text": "hi", "uname": "a", "medal": {}}]}
+    assert project_live_room(room) == {
+        "roominfo": {"roomid": 7, "roomname": "r", "upname": "u"},
+        "danmu": [{"ts": 1, "text": "hi", "uname": "a"}],
+    }
+
+
+def test_empty_array():
+    payload = b'{"code": 0, "data": {"videodmlist": []}}'
+    assert decode(payload, "videodmlist", chunk_size=3) == {"code": 0, "data": {"videodmlist": []}}
+
+
+def test_response_without_the_array_is_parsed_normally():
+    payload = ('{"code": -1, "message": "' + "很长的错误信息" * 40 + '"}').encode("utf-8")
+    assert decode(payload, "replies", chunk_size=10)["code"] == -1
+
+
+def test_truncated_array_raises():
+    payload = json.dumps(REPLY_RESPONSE).encode("utf-8")[:-40]
+    with pytest.raises(ValueError):
+        decode(payload, "replies", chunk_size=16)
+
+
+def test_text_chunks_are_accepted():
+    decoder = ArrayStreamDecoder("list")
+    for part in ('{"data": {"li', 'st": [{"a"', ': 1}, {"b": 2}', "]}}"):
+        decoder.feed(part)
+    assert decoder.close() == {"data": {"list": [{"a": 1}, {"b": 2}]}}
+
+
+def test_large_item_split_into_small_chunks_is_decoded_once():
+    big = {"rpid": 9, "message": "长评论 [{\\\"}] " * 2000, "time": 1, "rank": 1, "nested": [{"a": [1, {"b": "]"}]}] * 50}
+    response = {"code": 0, "data": {"replies": [big, {"rpid": 10}]}}
+    payload = json.dumps(response, ensure_ascii=False).encode("utf-8")
+
+    decoder = ArrayStreamDecoder("replies")
+    calls = []
+    raw_decode = decoder._decoder.raw_decode
+    decoder._decoder.raw_decode = lambda s, idx=0: calls.append(len(s)) or raw_decode(s, idx)
+    for i in range(0, len(payload), 7):
+        decoder.feed(payload[i:i + 7])
+    assert decoder.close() == response
+    # 每个元素收全后只解析一次，不会随分块反复重试
+    assert len(calls) == 2
+
+
+def test_scalar_and_string_elements():
+    payload = b'{"data": {"list": [1, -2.5e3 , "a,\\"]\\\\", true, null, [1, [2]], {}]}}'
+    for chunk_size in (1, 2, 5, None):
+        assert decode(payload, "list", chunk_size=chunk_size) == json.loads(payload)
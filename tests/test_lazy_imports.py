@@ -0,0 +1,23 @@
+import subprocess
+import sys
+
+from conftest import PLUGIN_DIR
+
+# 在新进程中导入，避免其他测试已经导入过 NumPy
+PROBE = f"""
+import sys, types
+package = types.ModuleType("aicu")
+package.__path__ = [{str(PLUGIN_DIR)!r}]
+sys.modules["aicu"] = package
+import aicu.stats, aicu.compare, aicu.parsers
+assert "numpy" not in sys.modules, "numpy imported at module load"
+from aicu.stats import StatColumns, summarize
+columns = StatColumns()
+columns.add(1700000000, 3)
+assert summarize(columns)["count"] == 1
+"""
+
+
+def test_stats_modules_do_not_import_numpy_eagerly():
+    result = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,119 @@
+import asyncio
+from concurrent.futures import Executor, Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from aicu.parsers import ParsePool, fetch_guard_pages, parse_replies, record_count
+
+
+def replies(n):
+    return {"code": 0, "data": {"replies": [{"message": f"第{i}条", "time": 1000 + i, "rank": 0} for i in range(n)]}}
+
+
+def live(*room_sizes):
+    rooms = [{"roominfo": {"roomid": i}, "danmu": [{"ts": 1, "text": "x"}] * size} for i, size in enumerate(room_sizes)]
+    return {"code": 0, "data": {"list": rooms}}
+
+
+def test_record_count_per_source():
+    assert record_count("reply", replies(3)) == 3
+    # 部分接口把列表多包了一层 data
+    assert record_count("reply", {"code": 0, "data": {"data": {"replies": [{}] * 2}}}) == 2
+    assert record_count("danmaku", {"data": {"videodmlist": [{}] * 4}}) == 4
+    assert record_count("entry", {"data": {"data": {"records": [{}] * 5}}}) == 5
+    # 直播弹幕按弹幕条数计，而不是直播间数
+    assert record_count("live", live(3, 0, 7)) == 10
+    assert record_count("live", None) == 0
+    assert record_count("reply", {"data": []}) == 0
+
+
+def test_placement_thresholds():
+    pool = ParsePool(workers=0, threshold=5)
+    assert pool.placement("reply", replies(4)) == "inline"
+    assert pool.placement("reply", replies(5)) == "thread"
+    assert pool.placement("live", live(2, 3)) == "thread"
+    pool.workers = 2
+    assert pool.placement("reply", replies(5)) == "process"
+    assert pool.placement("reply", replies(4)) == "inline"
+
+
+class BrokenExecutor(Executor):
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_exception(BrokenProcessPool("worker died"))
+        return future
+
+
+def test_broken_process_pool_falls_back_to_threads():
+    pool = ParsePool(workers=2, threshold=1)
+    pool._executor = BrokenExecutor()
+    raw = replies(3)
+
+    async def main():
+        with pytest.raises(BrokenProcessPool):
+            await pool.run("reply", raw)
+        assert pool.workers == 0 and pool._executor is None
+        assert pool.placement("reply", raw) == "thread"
+        return await pool.run("reply", raw)
+
+    result = asyncio.run(main())
+    assert result["count"] == 3
+
+
+def test_process_results_match_inline_parsing():
+    pool = ParsePool(workers=1, threshold=1)
+    raw = replies(20)
+
+    async def main():
+        try:
+            return await pool.run("reply", raw, display_limit=5)
+        finally:
+            pool.shutdown()
+
+    result = asyncio.run(main())
+    expected = parse_replies(raw, 5)
+    assert result["list"] == expected["list"]
+    assert result["stats"] == expected["stats"]
+
+
+def guard_upstream(pages: int, fail=()):
+    requested = []
+
+    async def fetch_page(page):
+        requested.append(page)
+        if page in fail:
+            raise ConnectionError("boom")
+        return {"code": 0, "data": {"info": {"page": pages}, "list": [f"p{page}"]}}
+
+    return fetch_page, requested
+
+
+def test_guard_pages_stop_at_the_last_page():
+    fetch_page, requested = guard_upstream(3)
+    merged, failed = asyncio.run(fetch_guard_pages(fetch_page, max_pages=10))
+    assert sorted(requested) == [1, 2, 3]
+    assert merged["data"]["list"] == ["p1", "p2", "p3"]
+    assert failed == []
+
+
+def test_single_guard_page_is_not_refetched():
+    fetch_page, requested = guard_upstream(1)
+    merged, _ = asyncio.run(fetch_guard_pages(fetch_page, max_pages=10))
+    assert requested == [1]
+    assert merged["data"]["list"] == ["p1"]
+
+
+def test_guard_pages_respect_max_pages_and_report_failures():
+    fetch_page, requested = guard_upstream(50, fail={3})
+    merged, failed = asyncio.run(fetch_guard_pages(fetch_page, max_pages=4))
+    assert sorted(requested) == [1, 2, 3, 4]
+    assert merged["data"]["list"] == ["p1", "p2", "p4"]
+    assert failed == [3]
+
+
+def test_failed_first_guard_page_is_returned_as_is():
+    async def fetch_page(page):
+        return {"code": -1}
+
+    assert asyncio.run(fetch_guard_pages(fetch_page, max_pages=4)) == ({"code": -1}, [])
@@ -0,0 +1,152 @@
+import asyncio
+import json
+
+import pytest
+
+from aicu.render_worker import (
+    BROWSER_ARGS, LEAN_BROWSER_ARGS, RenderServer, launch_options, page_options, read_frame, write_frame,
+)
+from aicu.template_pages import TemplatePages
+
+VIEWPORT = {"width": 600, "height": 1000}
+
+
+def test_lean_profile_disables_javascript_only_for_one_off_pages():
+    assert page_options(VIEWPORT, "lean")["java_script_enabled"] is False
+    assert "java_script_enabled" not in page_options(VIEWPORT, "lean", javascript=True)
+    assert "java_script_enabled" not in page_options(VIEWPORT, "standard")
+
+
+def test_launch_options_pick_the_profile_args():
+    assert launch_options(profile="standard")["args"] == BROWSER_ARGS
+    assert launch_options(profile="lean")["args"] == LEAN_BROWSER_ARGS
+    assert "executable_path" not in launch_options()
+    assert launch_options(executable_path="/opt/shell")["executable_path"] == "/opt/shell"
+
+
+class FakePage:
+    def __init__(self, options):
+        self.options = options
+
+    async def set_content(self, html, **kwargs):
+        pass
+
+    async def evaluate(self, script, body):
+        pass
+
+    def locator(self, selector):
+        return self
+
+    async def screenshot(self, **kwargs):
+        pass
+
+    async def close(self):
+        pass
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.pages = []
+
+    async def new_page(self, **options):
+        page = FakePage(options)
+        self.pages.append(page)
+        return page
+
+
+def test_persistent_pages_use_the_profile_but_keep_javascript():
+    browser = FakeBrowser()
+    pages = TemplatePages(profile="lean")
+    html = "<html><head></head><body><div class='container'></div></body></html>"
+
+    async def main():
+        first = await pages.render(browser, "t.html", html, VIEWPORT, 1000, "/tmp/x.png")
+        second = await pages.render(browser, "t.html", html, VIEWPORT, 1000, "/tmp/x.png")
+        return first, second
+
+    assert asyncio.run(main()) == (False, True)
+    assert [page.options for page in browser.pages] == [page_options(VIEWPORT, "lean", javascript=True)]
+
+
+class EchoServer(RenderServer):
+    """不启动浏览器，把 html 原样作为截图返回"""
+
+    async def render(self, html, viewport, timeout_ms, scale):
+        if html == "boom":
+            raise RuntimeError("渲染失败")
+        return html.encode()
+
+
+async def connect(server: RenderServer, token: str):
+    """启动回环监听并完成握手，返回 (握手响应, reader, writer, 监听器)"""
+    listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    write_frame(writer, json.dumps({"token": token}).encode())
+    await writer.drain()
+    return json.loads(await read_frame(reader)), reader, writer, listener
+
+
+class FrameSink:
+    def __init__(self):
+        self.data = b""
+
+    def write(self, data: bytes):
+        self.data += data
+
+
+def test_frames_round_trip_through_a_stream():
+    async def main():
+        reader = asyncio.StreamReader()
+        for payload in (b"", b"x", "中文".encode() * 1000):
+            transport = FrameSink()
+            write_frame(transport, payload)
+            reader.feed_data(transport.data)
+            assert await read_frame(reader) == payload
+
+    asyncio.run(main())
+
+
+def test_oversized_frame_is_rejected_before_reading_the_body():
+    async def main():
+        reader = asyncio.StreamReader()
+        sink = FrameSink()
+        write_frame(sink, b"x" * 100)
+        reader.feed_data(sink.data[:4])
+        with pytest.raises(ValueError):
+            await read_frame(reader, limit=10)
+
+    asyncio.run(main())
+
+
+def test_render_jobs_round_trip_after_the_handshake():
+    async def main():
+        hello, reader, writer, listener = await connect(EchoServer(token="secret"), "secret")
+        assert hello == {"ok": True}
+        for html in ("<p>一</p>", "boom", "<p>二</p>"):
+            write_frame(writer, json.dumps({"html": html}).encode())
+        await writer.drain()
+        results = []
+        for _ in range(3):
+            status = json.loads(await read_frame(reader))
+            results.append(await read_frame(reader) if status["ok"] else status["error"])
+        writer.close()
+        listener.close()
+        return results
+
+    assert asyncio.run(main()) == ["<p>一</p>".encode(), "渲染失败", "<p>二</p>".encode()]
+
+
+def test_wrong_token_is_rejected_and_disconnected():
+    async def main():
+        hello, reader, writer, listener = await connect(EchoServer(token="secret"), "guess")
+        # 被拒绝后服务端直接断开，之后的任务不会被执行
+        write_frame(writer, json.dumps({"html": "x"}).encode())
+        closed = await reader.read() == b""
+        writer.close()
+        listener.close()
+        return hello, closed
+
+    hello, closed = asyncio.run(main())
+    assert hello == {"ok": False, "error": "token mismatch"}
+    assert closed
@@ -0,0 +1,94 @@
+import json
+import time
+
+import pytest
+
+from aicu import rollups
+from aicu.rollups import RollupStore, UserRollup
+
+
+def doc(key, ts, kind="reply", **meta):
+    return {"kind": kind, "key": str(key), "text": "", "ts": ts, "meta": meta}
+
+
+@pytest.fixture(autouse=True)
+def utc(monkeypatch):
+    monkeypatch.setenv("TZ", "UTC")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_counts_buckets_and_rooms():
+    rollup = UserRollup("1")
+    # 1970-01-05 是星期一
+    monday_10h = 4 * 86400 + 10 * 3600
+    assert rollup.add([
+        doc(1, monday_10h),
+        doc(2, monday_10h + 60, kind="entry", room_id=7, anchor_name="主播", minutes=30),
+        doc(3, 0),
+    ]) == 2
+    assert rollup.heat[0][10] == 2
+    assert rollup.daily == {"1970-01-05": 2}
+    assert rollup.rooms == {"7": [30, 1, "主播"]}
+
+
+def test_refetched_records_are_counted_once():
+    rollup = UserRollup("1")
+    assert rollup.add([doc(1, 100), doc(2, 200)]) == 2
+    assert rollup.add([doc(2, 200), doc(3, 300)]) == 1
+    assert sum(rollup.daily.values()) == 3
+
+
+def test_distinct_records_sharing_a_timestamp_are_all_counted():
+    rollup = UserRollup("1")
+    assert rollup.add([doc(1, 100), doc(2, 200)]) == 2
+    assert rollup.add([doc(3, 200), doc(4, 100)]) == 2
+
+
+def test_same_key_in_different_kinds_is_counted_per_kind():
+    rollup = UserRollup("1")
+    assert rollup.add([doc(1, 100), doc(1, 100, kind="danmaku")]) == 2
+
+
+def test_gap_records_are_counted_after_many_batches():
+    rollup = UserRollup("1")
+    for batch in range(100):
+        base = 10_000 + batch * 1_000
+        rollup.add([doc(f"{batch}a", base), doc(f"{batch}b", base + 10)])
+    # 早先两批之间的空隙里抓到的记录仍然计入
+    assert rollup.add([doc("gap", 10_500)]) == 1
+
+
+def test_keys_beyond_cap_raise_the_floor(monkeypatch):
+    monkeypatch.setattr(rollups, "MAX_KEYS_PER_KIND", 3)
+    rollup = UserRollup("1")
+    assert rollup.add([doc(i, 100 + i) for i in range(5)]) == 5
+    seen = rollup.seen["reply"]
+    assert seen["floor"] == 101
+    assert sorted(seen["keys"]) == ["2", "3", "4"]
+    assert rollup.add([doc(0, 100), doc(9, 101), doc(4, 104), doc(5, 105)]) == 1
+
+
+def test_legacy_spans_become_a_floor():
+    rollup = UserRollup("1", {"spans": {"reply": [[10, 20], [50, 90]]}})
+    assert rollup.seen == {"reply": {"floor": 90, "keys": {}}}
+    assert rollup.add([doc(1, 60), doc(2, 91)]) == 1
+    assert "spans" not in rollup.to_dict()
+
+
+def test_store_persists_and_skips_saving_duplicates(tmp_path):
+    store = RollupStore(tmp_path)
+    assert store.add("1", [doc(1, 86400)]) == 1
+    path = tmp_path / "1.json"
+    mtime = path.stat().st_mtime_ns
+    assert store.add("1", [doc(1, 86400)]) == 0
+    assert path.stat().st_mtime_ns == mtime
+
+    reloaded = RollupStore(tmp_path)
+    assert reloaded.add("1", [doc(1, 86400)]) == 0
+    assert json.loads(path.read_text(encoding="utf-8"))["daily"] == {"1970-01-02": 1}
+    snapshot = reloaded.snapshot("1", days=7)
+    assert snapshot["total"] == 1
+    assert len(snapshot["timeline"]) == 7
@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+from aicu import room_index
+from aicu.room_index import RoomIndex
+
+
+def visit(room_id, ts, anchor="主播"):
+    return {"kind": "entry", "key": f"{room_id}:{ts}", "text": "", "ts": ts,
+            "meta": {"room_id": room_id, "anchor_name": anchor}}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(room_index.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_observe_counts_new_pairs_and_merges_spans(tmp_path):
+    index = RoomIndex(tmp_path / "rooms.json", save_interval=0)
+    assert index.observe("1", [visit("10", 100), visit("10", 300), visit("20", 200, "B")]) == 2
+    assert index.observe("1", [visit("10", 50)]) == 0
+    report = index.room_report("10")
+    assert report["viewers"] == [("1", 50, 300)]
+    assert index.rooms_of("1") == {"10", "20"}
+    assert index.find_rooms("b") == [("20", "B")]
+
+
+def test_co_visits_count_shared_viewers(tmp_path):
+    index = RoomIndex(tmp_path / "rooms.json", save_interval=0)
+    index.observe("1", [visit("10", 1), visit("20", 1, "B")])
+    index.observe("2", [visit("10", 2), visit("20", 2, "B")])
+    index.observe("3", [visit("10", 3), visit("30", 3, "C")])
+    report = index.room_report("10")
+    assert report["viewer_count"] == 3
+    assert report["co_visited"][0] == ("20", "B", 2)
+
+
+def test_viewer_evicted_on_insert_is_not_counted(tmp_path):
+    index = RoomIndex(tmp_path / "rooms.json", max_viewers_per_room=2, save_interval=0)
+    index.observe("1", [visit("10", 100)])
+    index.observe("2", [visit("10", 200)])
+    # 比现有观众都旧的记录写入后立即被淘汰
+    assert index.observe("3", [visit("10", 50)]) == 0
+    assert index.rooms_of("3") == set()
+    assert index.observe("4", [visit("10", 300)]) == 1
+    assert [uid for uid, _, _ in index.room_report("10")["viewers"]] == ["4", "2"]
+    assert index.rooms_of("1") == set()
+
+
+def test_room_count_is_capped(tmp_path):
+    index = RoomIndex(tmp_path / "rooms.json", max_rooms=2, save_interval=0)
+    index.observe("1", [visit("10", 100)])
+    index.observe("1", [visit("20", 200)])
+    assert index.observe("2", [visit("30", 300), visit("20", 250)]) == 2
+    assert index.room_count == 2
+    assert index.room_report("10") is None
+    assert index.rooms_of("1") == {"20"}
+    # 比所有直播间都旧的新直播间写入后立即被淘汰
+    assert index.observe("3", [visit("40", 10)]) == 0
+    assert index.room_report("40") is None
+
+
+def test_saves_are_debounced_until_flush(tmp_path, clock):
+    path = tmp_path / "rooms.json"
+    index = RoomIndex(path, save_interval=30)
+    index.observe("1", [visit("10", 100)])
+    assert path.exists()
+    index.observe("2", [visit("10", 200)])
+    assert "2" not in json.loads(path.read_text(encoding="utf-8"))["rooms"]["10"]["viewers"]
+
+    clock[0] += 30
+    index.observe("3", [visit("10", 300)])
+    assert set(json.loads(path.read_text(encoding="utf-8"))["rooms"]["10"]["viewers"]) == {"1", "2", "3"}
+
+    index.observe("4", [visit("10", 400)])
+    index.flush()
+    reloaded = RoomIndex(path)
+    assert [uid for uid, _, _ in reloaded.room_report("10")["viewers"]] == ["4", "3", "2", "1"]
+
+
+def test_legacy_file_without_room_last_is_loaded(tmp_path):
+    path = tmp_path / "rooms.json"
+    rooms = {str(i): {"anchor": "", "viewers": {"1": [i, i]}} for i in range(1, 4)}
+    path.write_text(json.dumps({"rooms": rooms}), encoding="utf-8")
+    index = RoomIndex(path, max_rooms=2)
+    assert index.room_count == 2
+    assert index.rooms_of("1") == {"2", "3"}
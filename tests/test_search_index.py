@@ -0,0 +1,102 @@
+import json
+
+from aicu.search_index import SearchIndex, docs_from_entry, index_tokens, query_tokens
+
+
+def doc(key, text, ts, kind="reply"):
+    return {"kind": kind, "key": str(key), "text": text, "ts": ts, "meta": {}}
+
+
+def test_tokens_cover_single_characters_and_bigrams():
+    assert index_tokens("好耶ab") == {"好", "耶", "好耶", "a", "b", "ab"}
+    assert query_tokens("好耶") == {"好耶"}
+    assert query_tokens("好") == {"好"}
+
+
+def test_search_filters_bigram_false_positives(tmp_path):
+    index = SearchIndex(tmp_path)
+    index.add("1", [doc(1, "今天好耶", 10), doc(2, "好的耶", 20), doc(3, "好耶好耶", 30)])
+    hits, indexed = index.search("1", "好耶")
+    assert [hit["key"] for hit in hits] == ["3", "1"]
+    assert indexed == 3
+
+
+def test_duplicate_docs_are_not_counted_or_saved(tmp_path):
+    index = SearchIndex(tmp_path)
+    assert index.add("1", [doc(1, "a", 10)]) == 1
+    path = tmp_path / "1.json"
+    mtime = path.stat().st_mtime_ns
+    assert index.add("1", [doc(1, "a", 10)]) == 0
+    assert path.stat().st_mtime_ns == mtime
+
+
+def test_evicts_oldest_docs_beyond_cap(tmp_path):
+    index = SearchIndex(tmp_path, max_docs=3)
+    assert index.add("1", [doc(i, f"词{i}", i * 10) for i in range(5)]) == 3
+    hits, indexed = index.search("1", "词")
+    assert indexed == 3
+    assert [hit["key"] for hit in hits] == ["4", "3", "2"]
+    # 倒排表随淘汰重建，被淘汰的文档不会再命中
+    assert index.search("1", "词0")[0] == []
+    assert index.search("1", "词3")[0][0]["key"] == "3"
+
+
+def test_refetched_old_docs_are_not_counted_or_saved(tmp_path):
+    index = SearchIndex(tmp_path, max_docs=2)
+    index.add("1", [doc(1, "a", 10), doc(2, "b", 20), doc(3, "c", 30)])
+    path = tmp_path / "1.json"
+    mtime = path.stat().st_mtime_ns
+    assert index.add("1", [doc(1, "a", 10)]) == 0
+    assert path.stat().st_mtime_ns == mtime
+    assert index.add("1", [doc(4, "d", 40)]) == 1
+    assert [hit["key"] for hit in index.search("1", "d")[0]] == ["4"]
+
+
+def test_stored_index_over_cap_is_trimmed_on_load(tmp_path):
+    stored = {"uid": "1", "docs": [doc(i, "x", i) for i in range(10)], "searched": {}}
+    (tmp_path / "1.json").write_text(json.dumps(stored), encoding="utf-8")
+    index = SearchIndex(tmp_path, max_docs=4)
+    hits, indexed = index.search("1", "x")
+    assert indexed == 4
+    assert [hit["key"] for hit in hits] == ["9", "8", "7", "6"]
+
+
+def test_reload_from_disk_and_remember_keywords(tmp_path):
+    SearchIndex(tmp_path).add("1", [doc(1, "hello", 10)], keyword="Hello")
+    index = SearchIndex(tmp_path)
+    assert index.recently_searched("1", "HELLO", ttl=60)
+    assert not index.recently_searched("1", "other", ttl=60)
+    assert index.search("1", "hell")[0][0]["key"] == "1"
+
+
+def entry_response(*records):
+    return {"code": 200, "data": {"data": {"records": list(records)}}}
+
+
+def entry_record(room_id, entry_ms, start_ms, stop_ms):
+    return {
+        "channel": {"roomId": room_id, "uName": "主播"},
+        "danmakus": [{"sendDate": entry_ms}] if entry_ms else [],
+        "live": {"title": "标题", "startDate": start_ms, "stopDate": stop_ms},
+    }
+
+
+def test_entry_minutes_count_from_entry_to_stream_end():
+    hour = 3600 * 1000
+    docs = docs_from_entry(entry_response(
+        # 开播 3 小时后入场、看到 1 小时后下播；下播前 5 分钟才入场
+        entry_record(1, 3 * hour, 1, 4 * hour),
+        entry_record(2, 4 * hour - 5 * 60 * 1000, 1, 4 * hour),
+        # 下播时间未知、入场时间晚于下播（数据异常）、入场时间未知
+        entry_record(3, hour, 1, 0),
+        entry_record(4, 2 * hour, 1, hour),
+        entry_record(5, 0, 1, hour),
+    ))
+    assert [d["meta"]["minutes"] for d in docs] == [60, 5, 0, 0, 0]
+    assert docs[0]["ts"] == 3 * 3600
+    assert docs[0]["key"] == f"1:{3 * hour}"
+
+
+def test_entry_docs_require_a_successful_response():
+    assert docs_from_entry(None) == []
+    assert docs_from_entry({"code": 0}) == []
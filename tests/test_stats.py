@@ -0,0 +1,111 @@
+import random
+import time
+from datetime import datetime
+
+import pytest
+
+from aicu import stats
+from aicu.stats import StatColumns, merge_histograms, summarize, top_key
+
+
+@pytest.fixture(params=["numpy", "python"])
+def engine(request, monkeypatch):
+    """分别走 NumPy 向量化路径与纯 Python 路径"""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        monkeypatch.setattr(stats, "_numpy", None)
+    else:
+        monkeypatch.setattr(stats, "_numpy", False)
+    return request.param
+
+
+@pytest.fixture
+def new_york(monkeypatch):
+    if not hasattr(time, "tzset"):
+        pytest.skip("time.tzset 不可用")
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def _columns(timestamps, lengths=None, rooms=None):
+    columns = StatColumns("room")
+    for i, ts in enumerate(timestamps):
+        columns.add(ts, (lengths or [0] * len(timestamps))[i], (rooms or [""] * len(timestamps))[i])
+    return columns
+
+
+def test_empty_summary(engine):
+    summary = summarize(StatColumns("room"))
+    assert summary["count"] == 0
+    assert summary["active_hour"] == "N/A"
+    assert summary["top"] == {"room": []}
+
+
+def test_histograms_match_datetime(engine):
+    rng = random.Random(7)
+    timestamps = [rng.randint(1_600_000_000, 1_700_000_000) for _ in range(500)]
+    summary = summarize(_columns(timestamps + [0]))
+
+    expected_hours = [0] * 24
+    expected_weekdays = [0] * 7
+    for ts in timestamps:
+        local = datetime.fromtimestamp(ts)
+        expected_hours[local.hour] += 1
+        expected_weekdays[local.weekday()] += 1
+    assert summary["hour_hist"] == expected_hours
+    assert summary["weekday_hist"] == expected_weekdays
+    assert summary["first_ts"] == min(timestamps)
+    assert summary["last_ts"] == max(timestamps)
+
+
+def test_dst_transition_uses_each_timestamps_offset(engine, new_york):
+    # 2024-03-10 美东进入夏令时：切换前后的正午分别是 UTC-5 与 UTC-4
+    before = int(datetime(2024, 3, 9, 12).timestamp())
+    after = int(datetime(2024, 3, 11, 12).timestamp())
+    summary = summarize(_columns([before, after]))
+    assert summary["hour_hist"][12] == 2
+    assert summary["active_days"] == 2
+
+
+def test_numpy_and_python_paths_agree(monkeypatch):
+    pytest.importorskip("numpy")
+    rng = random.Random(11)
+    timestamps = [rng.randint(1_650_000_000, 1_660_000_000) for _ in range(300)]
+    lengths = [rng.randint(0, 200) for _ in timestamps]
+    rooms = [rng.choice("abcde") for _ in timestamps]
+
+    monkeypatch.setattr(stats, "_numpy", None)
+    vectorized = summarize(_columns(timestamps, lengths, rooms))
+    monkeypatch.setattr(stats, "_numpy", False)
+    pure = summarize(_columns(timestamps, lengths, rooms))
+
+    for key in ("hour_hist", "weekday_hist", "active_days", "max_streak", "first_ts", "last_ts", "top"):
+        assert vectorized[key] == pure[key]
+    for key, value in pure["length_percentiles"].items():
+        assert vectorized["length_percentiles"][key] == pytest.approx(value)
+    assert vectorized["avg_length"] == pytest.approx(pure["avg_length"])
+
+
+def test_streak_and_top_keys(engine):
+    day = 86400
+    base = int(datetime(2024, 5, 1, 12).timestamp())
+    summary = summarize(_columns(
+        [base, base + day, base + 2 * day, base + 5 * day],
+        rooms=["a", "a", "b", "a"],
+    ))
+    assert summary["active_days"] == 4
+    assert summary["max_streak"] == 3
+    assert top_key(summary, "room") == "a"
+    assert summary["distinct"]["room"] == 2
+
+
+def test_merge_histograms():
+    first = {"hour_hist": [1] + [0] * 23, "weekday_hist": [0] * 6 + [2], "last_ts": 5}
+    second = {"hour_hist": [0, 3] + [0] * 22, "weekday_hist": [1] + [0] * 6, "last_ts": 9}
+    merged = merge_histograms([first, second])
+    assert merged["active_hour"] == "01"
+    assert merged["active_weekday"] == "周日"
+    assert merged["last_ts"] == 9
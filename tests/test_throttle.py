@@ -0,0 +1,144 @@
+import asyncio
+import types
+
+import pytest
+
+from aicu import throttle
+from aicu.throttle import FairScheduler, RateLimiter, TokenBucket, current_group
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    # 只替换 throttle 模块看到的时钟，事件循环仍用真实时间
+    monkeypatch.setattr(throttle, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_bucket_allows_a_burst_then_refills(clock):
+    bucket = TokenBucket(rate=0.5, capacity=2)
+    for _ in range(2):
+        assert bucket.retry_after() == 0
+        bucket.take()
+    assert bucket.retry_after() == pytest.approx(2)
+    assert bucket.retry_after(cost=2) == pytest.approx(4)
+    clock[0] += 2
+    assert bucket.retry_after() == 0
+    clock[0] += 100
+    bucket.retry_after()
+    assert bucket.tokens == 2
+
+
+def test_zero_rate_never_refills(clock):
+    bucket = TokenBucket(rate=0, capacity=1)
+    bucket.take()
+    assert bucket.retry_after() == float("inf")
+
+
+def test_limiter_keeps_buckets_per_key_and_evicts_idle_keys(clock):
+    limiter = RateLimiter(per_minute=6, burst=1, maxsize=2)
+    limiter.bucket("a").take()
+    assert limiter.bucket("a").retry_after() == pytest.approx(10)
+    assert limiter.bucket("b").retry_after() == 0
+    limiter.bucket("c")
+    # a 最久未用被淘汰，重新创建时是满桶
+    assert limiter.bucket("a").retry_after() == 0
+
+
+def run_scheduled(scheduler: FairScheduler, jobs: list[tuple[str, str]]) -> list[str]:
+    order = []
+
+    async def job(group, name, gate):
+        async with scheduler.slot(group):
+            order.append(name)
+            await gate.wait()
+
+    async def main():
+        gate = asyncio.Event()
+        tasks = [asyncio.create_task(job(group, name, gate)) for group, name in jobs]
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(*tasks)
+        assert scheduler.active == 0 and scheduler.waiting == 0
+
+    asyncio.run(main())
+    return order
+
+
+def test_waiting_groups_take_turns():
+    jobs = [("a", "a1"), ("a", "a2"), ("a", "a3"), ("a", "a4"), ("b", "b1"), ("c", "c1"), ("b", "b2")]
+    order = run_scheduled(FairScheduler(1), jobs)
+    # a1 直接拿到槽位，之后 a、b、c 三个会话轮流
+    assert order == ["a1", "a2", "b1", "c1", "a3", "b2", "a4"]
+
+
+def test_concurrency_limit_is_respected():
+    scheduler = FairScheduler(2)
+    peak = [0]
+
+    async def job():
+        async with scheduler.slot("g"):
+            peak[0] = max(peak[0], scheduler.active)
+            await asyncio.sleep(0.001)
+
+    async def main():
+        await asyncio.gather(*(job() for _ in range(6)))
+
+    asyncio.run(main())
+    assert peak[0] == 2
+    assert scheduler.active == 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    scheduler = FairScheduler(1)
+
+    async def main():
+        await scheduler.acquire("a")
+        waiter = asyncio.create_task(scheduler.acquire("b"))
+        await asyncio.sleep(0)
+        assert scheduler.waiting == 1
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert scheduler.waiting == 0
+        scheduler.release()
+        assert scheduler.active == 0
+
+    asyncio.run(main())
+
+
+def test_slot_granted_to_a_cancelled_waiter_is_passed_on():
+    scheduler = FairScheduler(1)
+
+    async def main():
+        await scheduler.acquire("a")
+        first = asyncio.create_task(scheduler.acquire("b"))
+        second = asyncio.create_task(scheduler.acquire("c"))
+        await asyncio.sleep(0)
+        scheduler.release()   # 槽位交给 first，但 first 还没来得及运行就被取消
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        await asyncio.wait_for(second, timeout=1)
+        assert scheduler.active == 1
+        scheduler.release()
+
+    asyncio.run(main())
+
+
+def test_slot_uses_the_current_group_by_default():
+    scheduler = FairScheduler(1)
+
+    async def hold():
+        async with scheduler.slot():
+            pass
+
+    async def main():
+        await scheduler.acquire("x")
+        current_group.set("群1")
+        task = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        queued = list(scheduler._queues)
+        scheduler.release()
+        await task
+        return queued
+
+    assert asyncio.run(main()) == ["群1"]
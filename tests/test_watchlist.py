@@ -0,0 +1,57 @@
+from aicu.watchlist import Watchlist, advance_cursors
+
+
+def doc(ts, kind="reply"):
+    return {"kind": kind, "key": str(ts), "text": "", "ts": ts, "meta": {}}
+
+
+OK = {"code": 0}
+
+
+def test_first_poll_only_records_a_baseline():
+    cursors = {}
+    deltas = advance_cursors(cursors, {"reply": (OK, [doc(100), doc(300)]), "danmaku": (OK, [])})
+    assert deltas == {}
+    assert cursors == {"reply": 300, "danmaku": 0}
+
+
+def test_new_records_after_the_baseline_are_reported_newest_first():
+    cursors = {"reply": 300, "danmaku": 0}
+    deltas = advance_cursors(cursors, {"reply": (OK, [doc(200), doc(400), doc(500)]), "danmaku": (OK, [doc(50)])})
+    assert [d["ts"] for d in deltas["reply"]] == [500, 400]
+    assert [d["ts"] for d in deltas["danmaku"]] == [50]
+    assert cursors == {"reply": 500, "danmaku": 50}
+
+
+def test_source_failing_on_the_baseline_poll_gets_its_own_baseline_later():
+    cursors = {}
+    assert advance_cursors(cursors, {"reply": (OK, [doc(100)]), "entry": (None, [])}) == {}
+    assert cursors == {"reply": 100}
+
+    # 入场记录第二次才拉取成功：整段历史只作为基线，不当成新记录
+    history = [doc(ts, "entry") for ts in (10, 20, 30)]
+    assert advance_cursors(cursors, {"reply": (OK, [doc(100)]), "entry": (OK, history)}) == {}
+    assert cursors == {"reply": 100, "entry": 30}
+
+    deltas = advance_cursors(cursors, {"reply": (OK, []), "entry": (OK, history + [doc(40, "entry")])})
+    assert [d["ts"] for d in deltas["entry"]] == [40]
+
+
+def test_failed_source_keeps_its_cursor():
+    cursors = {"reply": 100}
+    assert advance_cursors(cursors, {"reply": (None, [])}) == {}
+    assert cursors == {"reply": 100}
+
+
+def test_cursors_are_dropped_with_the_last_subscriber(tmp_path):
+    watchlist = Watchlist(tmp_path / "watch.json")
+    watchlist.add("群1", "1")
+    watchlist.add("群2", "1")
+    watchlist.set_cursors("1", {"reply": 100})
+    watchlist.remove("群1", "1")
+    assert Watchlist(tmp_path / "watch.json").get_cursors("1") == {"reply": 100}
+    watchlist.remove("群2", "1")
+    assert watchlist.get_cursors("1") == {}
+    # 没有订阅者时不再写入游标
+    watchlist.set_cursors("1", {"reply": 200})
+    assert watchlist.get_cursors("1") == {}
@@ -0,0 +1,128 @@
+"""
+AICU 指令限流与公平调度
+
+- TokenBucket / RateLimiter：按发送者、按会话的令牌桶，超限时给出需要等待的秒数
+- FairScheduler：上游请求、浏览器渲染等共享资源的并发槽位，
+  各会话的等待者轮流获得槽位，单个会话刷屏时只会排在自己的队列里，不会饿死其他会话
+
+当前请求所属的会话通过 contextvars 传递：指令入口设置一次，
+之后在同一任务及其派生任务（gather / create_task）中的请求都会归到该会话。
+"""
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+# 当前请求所属的会话，后台任务（监控轮询、预热等）为空字符串
+current_group: ContextVar[str] = ContextVar("aicu_current_group", default="")
+
+
+class TokenBucket:
+    """令牌桶：每秒补充 rate 个令牌，最多积攒 capacity 个"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated_at")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def retry_after(self, cost: float = 1) -> float:
+        """取走 cost 个令牌需要再等的秒数，0 表示现在就够"""
+        self._refill(time.monotonic())
+        if self.tokens >= cost:
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        return (cost - self.tokens) / self.rate
+
+    def take(self, cost: float = 1):
+        self._refill(time.monotonic())
+        self.tokens -= cost
+
+
+class RateLimiter:
+    """按键（发送者、会话等）分别维护令牌桶，只保留最近活跃的 maxsize 个键"""
+
+    def __init__(self, per_minute: float, burst: float, maxsize: int = 4096):
+        self.rate = per_minute / 60
+        self.burst = max(burst, 1)
+        self.maxsize = maxsize
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+
+    def bucket(self, key: str) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        self._buckets.move_to_end(key)
+        return bucket
+
+
+class FairScheduler:
+    """共享资源的并发槽位，按会话轮转分配"""
+
+    def __init__(self, concurrency: int):
+        self.concurrency = max(1, concurrency)
+        self.active = 0
+        self._queues: OrderedDict[str, deque[asyncio.Future]] = OrderedDict()
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def acquire(self, group: str):
+        if self.active < self.concurrency and not self._queues:
+            self.active += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(group, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 已分到槽位但等待者被取消：把槽位让给下一个
+                self.release()
+            else:
+                self._discard(group, future)
+            raise
+
+    def release(self):
+        self.active -= 1
+        while self._queues and self.active < self.concurrency:
+            # 取队首会话的一个等待者，再把该会话移到队尾，实现轮转
+            group, queue = next(iter(self._queues.items()))
+            future = queue.popleft()
+            if queue:
+                self._queues.move_to_end(group)
+            else:
+                del self._queues[group]
+            if not future.done():
+                self.active += 1
+                future.set_result(None)
+
+    def _discard(self, group: str, future: asyncio.Future):
+        queue = self._queues.get(group)
+        if queue is None:
+            return
+        try:
+            queue.remove(future)
+        except ValueError:
+            pass
+        if not queue:
+            del self._queues[group]
+
+    @asynccontextmanager
+    async def slot(self, group: str = None):
+        await self.acquire(current_group.get() if group is None else group)
+        try:
+            yield
+        finally:
+            self.release()
@@ -0,0 +1,112 @@
+"""
+AICU 监控列表
+
+按会话（群聊 / 私聊的 unified_msg_origin）记录需要定时轮询的 UID。
+同一个 UID 被多个会话监控时只轮询一次；每个 UID 按数据来源记录游标（已见过的最新时间戳），
+轮询时只取比游标更新的记录，用于推送增量提醒。
+"""
+import json
+import threading
+from pathlib import Path
+
+# 数据来源 -> 提醒中显示的名称
+WATCH_KINDS = {
+    "reply": "💬 新评论",
+    "danmaku": "📺 新视频弹幕",
+    "live": "🎙️ 新直播弹幕",
+    "entry": "🚪 新入场",
+}
+
+
+def advance_cursors(cursors: dict[str, int], sources: dict[str, tuple]) -> dict[str, list[dict]]:
+    """
+    按本次拉取结果推进游标（原地修改 cursors），返回 {来源: 新记录列表}（按时间倒序）。
+    sources 为 {来源: (原始响应, 文档列表)}；原始响应为 None 表示请求失败，保留其原游标。
+    每个来源各自建立基线：还没有游标的来源这次只记录游标，不产生提醒，
+    首次轮询时失败、之后才成功的来源也不会把历史记录当成新记录。
+    """
+    deltas = {}
+    for kind, (raw, docs) in sources.items():
+        if raw is None:
+            continue
+        baseline = kind not in cursors
+        since = cursors.get(kind, 0)
+        new_docs = sorted((d for d in docs if (d["ts"] or 0) > since), key=lambda d: d["ts"], reverse=True)
+        cursors[kind] = new_docs[0]["ts"] if new_docs else since
+        if new_docs and not baseline:
+            deltas[kind] = new_docs
+    return deltas
+
+
+class Watchlist:
+    """监控列表与轮询游标，持久化为 JSON，线程安全"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._groups: dict[str, list[str]] = {}
+        self._cursors: dict[str, dict[str, int]] = {}
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            self._groups = stored.get("groups", {})
+            self._cursors = stored.get("cursors", {})
+        except (OSError, ValueError):
+            self._groups, self._cursors = {}, {}
+
+    def _save(self):
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"groups": self._groups, "cursors": self._cursors}, f, ensure_ascii=False)
+        tmp_path.replace(self.path)
+
+    def add(self, origin: str, uid: str) -> bool:
+        with self._lock:
+            uids = self._groups.setdefault(origin, [])
+            if uid in uids:
+                return False
+            uids.append(uid)
+            self._save()
+            return True
+
+    def remove(self, origin: str, uid: str) -> bool:
+        with self._lock:
+            uids = self._groups.get(origin, [])
+            if uid not in uids:
+                return False
+            uids.remove(uid)
+            if not uids:
+                del self._groups[origin]
+            # 没有会话再监控该 UID 时清理游标
+            if not self.subscribers(uid):
+                self._cursors.pop(uid, None)
+            self._save()
+            return True
+
+    def uids_of(self, origin: str) -> list[str]:
+        with self._lock:
+            return list(self._groups.get(origin, []))
+
+    def subscribers(self, uid: str) -> list[str]:
+        with self._lock:
+            return [origin for origin, uids in self._groups.items() if uid in uids]
+
+    def all_uids(self) -> list[str]:
+        with self._lock:
+            return list(dict.fromkeys(uid for uids in self._groups.values() for uid in uids))
+
+    def get_cursors(self, uid: str) -> dict[str, int]:
+        with self._lock:
+            return dict(self._cursors.get(uid, {}))
+
+    def set_cursors(self, uid: str, cursors: dict[str, int]):
+        with self._lock:
+            if not self.subscribers(uid):
+                return
+            self._cursors[uid] = cursors
+            self._save()